@@ -2,11 +2,11 @@
 from __future__ import  annotations
 import types, typing as T
 
-import builtins
+import builtins, sys, os, ast, json, tempfile
 from pathlib import Path
 import inspect, importlib, pkgutil
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, asdict
 
 from wplib import log
 
@@ -14,6 +14,10 @@ from wplib import log
 """
 run over all given modules packages to find functions 
 to expose as nodes
+
+getModules() imports everything it finds - discoverFunctions() only
+parses source files, so nothing runs until a function is actually
+used and loaded through its FnInfo
 """
 
 def getModules(rootNames=(),
@@ -39,6 +43,241 @@ def getModules(rootNames=(),
 					continue
 	return modules
 
+#region static discovery
+@dataclass
+class FnParam:
+	"""one parameter of a discovered function - annotation
+	and default are kept as source text"""
+	name : str
+	kind : str = "POSITIONAL_OR_KEYWORD" # same names as inspect.Parameter kinds
+	annotation : str = None
+	default : str = None
+
+@dataclass
+class FnInfo:
+	"""description of a top-level function, read from source
+	without importing its module"""
+	modulePath : str
+	name : str
+	params : list[FnParam] = field(default_factory=list)
+	returns : str = None
+	doc : str = None
+	lineno : int = 0
+	isAsync : bool = False
+
+	def codeRef(self)->str:
+		return f"{self.modulePath}:{self.name}"
+
+	def signatureStr(self)->str:
+		"""rebuild signature as it was written"""
+		tokens = []
+		kinds = [i.kind for i in self.params] + [None]
+		for n, param in enumerate(self.params):
+			if param.kind == "KEYWORD_ONLY" and kinds[n - 1 if n else -1] not in (
+					"KEYWORD_ONLY", "VAR_POSITIONAL"):
+				tokens.append("*")
+			token = {"VAR_POSITIONAL" : "*", "VAR_KEYWORD" : "**"}.get(param.kind, "") + param.name
+			if param.annotation is not None:
+				token += ":" + param.annotation
+			if param.default is not None:
+				token += "=" + param.default
+			tokens.append(token)
+			if param.kind == "POSITIONAL_ONLY" and kinds[n + 1] != "POSITIONAL_ONLY":
+				tokens.append("/")
+		result = f"{self.name}({', '.join(tokens)})"
+		if self.returns is not None:
+			result += "->" + self.returns
+		return result
+
+	def load(self)->T.Callable:
+		"""import module and return the live function -
+		only call once the function is really needed"""
+		return getattr(importlib.import_module(self.modulePath), self.name)
+
+	@classmethod
+	def fromDict(cls, data:dict)->FnInfo:
+		data = dict(data)
+		data["params"] = [FnParam(**i) for i in data["params"]]
+		return cls(**data)
+
+
+def _unparse(node:ast.AST)->(str, None):
+	return None if node is None else ast.unparse(node)
+
+def _fnParams(args:ast.arguments)->list[FnParam]:
+	params = []
+	positional = args.posonlyargs + args.args
+	# defaults line up with the last positional args
+	defaults = [None] * (len(positional) - len(args.defaults)) + args.defaults
+	for arg, default in zip(positional, defaults):
+		kind = "POSITIONAL_ONLY" if arg in args.posonlyargs else "POSITIONAL_OR_KEYWORD"
+		params.append(FnParam(arg.arg, kind, _unparse(arg.annotation), _unparse(default)))
+	if args.vararg is not None:
+		params.append(FnParam(args.vararg.arg, "VAR_POSITIONAL", _unparse(args.vararg.annotation)))
+	for arg, default in zip(args.kwonlyargs, args.kw_defaults):
+		params.append(FnParam(arg.arg, "KEYWORD_ONLY", _unparse(arg.annotation), _unparse(default)))
+	if args.kwarg is not None:
+		params.append(FnParam(args.kwarg.arg, "VAR_KEYWORD", _unparse(args.kwarg.annotation)))
+	return params
+
+def functionsInSource(source:str, modulePath:str, includePrivate=False)->list[FnInfo]:
+	"""parse source, return info for each top-level function"""
+	result = []
+	for node in ast.parse(source).body:
+		if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+			continue
+		if node.name.startswith("_") and not includePrivate:
+			continue
+		result.append(FnInfo(
+			modulePath=modulePath,
+			name=node.name,
+			params=_fnParams(node.args),
+			returns=_unparse(node.returns),
+			doc=ast.get_docstring(node),
+			lineno=node.lineno,
+			isAsync=isinstance(node, ast.AsyncFunctionDef)
+		))
+	return result
+
+
+def findModuleSource(modulePath:str)->(Path, None):
+	"""find source file for module path on sys.path,
+	without importing it or any parent package"""
+	parts = modulePath.split(".")
+	for entry in sys.path:
+		base = Path(entry or ".").joinpath(*parts)
+		if (base / "__init__.py").is_file():
+			return base / "__init__.py"
+		if base.with_suffix(".py").is_file():
+			return base.with_suffix(".py")
+	return None
+
+def _walkPackageDir(dirPath:Path, prefix:str)->T.Iterator[tuple[str, Path]]:
+	for path in sorted(dirPath.iterdir()):
+		if not path.stem.isidentifier():
+			continue
+		if path.suffix == ".py" and path.name != "__init__.py":
+			yield f"{prefix}.{path.stem}", path
+		elif path.is_dir() and (path / "__init__.py").is_file():
+			yield f"{prefix}.{path.name}", path / "__init__.py"
+			yield from _walkPackageDir(path, f"{prefix}.{path.name}")
+
+def moduleRoots(rootNames=(), rootPaths=())->list[tuple[str, Path]]:
+	"""return (module path, source file) for each root -
+	rootPaths are package folders or single .py files, named after themselves"""
+	roots = []
+	for i in rootNames:
+		path = findModuleSource(i)
+		if path is None:
+			log(f"could not find source for module path {i}, skipping")
+			continue
+		roots.append((i, path))
+	for i in map(Path, rootPaths):
+		roots.append((i.stem, i / "__init__.py" if i.is_dir() else i))
+	return roots
+
+def iterModuleFiles(rootNames=(), rootPaths=(), recurse=False,
+                    roots:list[tuple[str, Path]]=None)->T.Iterator[tuple[str, Path]]:
+	"""yield (module path, source file) for each module under roots"""
+	if roots is None:
+		roots = moduleRoots(rootNames, rootPaths)
+	for name, path in roots:
+		yield name, path
+		if recurse and path.name == "__init__.py":
+			yield from _walkPackageDir(path.parent, name)
+
+
+class FunctionIndex:
+	"""on-disk cache of functions found in source files -
+	entries are reused until file's mtime or size changes"""
+
+	defaultPath = Path(tempfile.gettempdir()) / "chimaera_anyfn_index.json"
+	formatVersion = 1
+
+	def __init__(self, indexPath:Path=None):
+		self.indexPath = Path(indexPath or self.defaultPath)
+		# { file path : { "mtime", "size", "module", "fns" } }
+		self._entries : dict[str, dict] = {}
+		self._dirty = False
+		self.load()
+
+	def load(self):
+		try:
+			data = json.loads(self.indexPath.read_text())
+		except (OSError, ValueError):
+			return
+		if data.get("version") == self.formatVersion:
+			self._entries = data["files"]
+
+	def save(self):
+		"""write index if anything changed"""
+		if not self._dirty:
+			return
+		self.indexPath.parent.mkdir(parents=True, exist_ok=True)
+		tempPath = self.indexPath.with_name(f"{self.indexPath.name}.{os.getpid()}.tmp")
+		tempPath.write_text(json.dumps({"version" : self.formatVersion,
+		                                "files" : self._entries}))
+		os.replace(tempPath, self.indexPath)
+		self._dirty = False
+
+	@staticmethod
+	def key(path:Path)->str:
+		return str(Path(path).resolve())
+
+	def prune(self, dirPaths:T.Iterable[Path], found:set[str]):
+		"""drop entries for files under given folders that weren't found
+		by the last walk over them - deleted, moved, or no longer part
+		of a package"""
+		prefixes = tuple(os.path.join(self.key(i), "") for i in dirPaths)
+		if not prefixes:
+			return
+		for key in [k for k in self._entries
+		            if k.startswith(prefixes) and k not in found]:
+			del self._entries[key]
+			self._dirty = True
+
+	def functionsInFile(self, path:Path, modulePath:str)->list[FnInfo]:
+		stat = path.stat()
+		key = self.key(path)
+		entry = self._entries.get(key)
+		if not (entry and entry["mtime"] == stat.st_mtime_ns
+		        and entry["size"] == stat.st_size and entry["module"] == modulePath):
+			try:
+				fns = functionsInSource(path.read_text(encoding="utf-8"), modulePath)
+			except (SyntaxError, UnicodeDecodeError, ValueError) as e:
+				log(f"could not parse {path}, skipping", e)
+				fns = []
+			entry = self._entries[key] = {
+				"mtime" : stat.st_mtime_ns, "size" : stat.st_size,
+				"module" : modulePath, "fns" : [asdict(i) for i in fns]}
+			self._dirty = True
+		return [FnInfo.fromDict(i) for i in entry["fns"]]
+
+
+def discoverFunctions(rootNames=(),
+                      rootPaths=(),
+                      recurse=False,
+                      index:FunctionIndex=None)->dict[str, FnInfo]:
+	"""find top-level functions under modules without importing
+	anything - return { code ref : FnInfo }
+
+	when recursing, index entries for files that are no longer
+	under the walked packages are dropped"""
+	index = index or FunctionIndex()
+	roots = moduleRoots(rootNames, rootPaths)
+	result = {}
+	found = set()
+	for modulePath, path in iterModuleFiles(recurse=recurse, roots=roots):
+		found.add(index.key(path))
+		for fnInfo in index.functionsInFile(path, modulePath):
+			result[fnInfo.codeRef()] = fnInfo
+	if recurse:
+		index.prune([path.parent for name, path in roots
+		             if path.name == "__init__.py"], found)
+	index.save()
+	return result
+#endregion
+
 def moduleItems(module:types.ModuleType):
 	"""do we allow pulling in constants too"""
 	ms = inspect.getmembers(module)
@@ -55,8 +294,8 @@ def callablesForType(t:type):
 
 
 if __name__ == '__main__':
-	result = getModules(("wplib", ))
+	result = discoverFunctions(("wplib", ), recurse=True)
 	for k, v in result.items():
-		print(k, v)
+		print(k, v.signatureStr())
 
 
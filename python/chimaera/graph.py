@@ -25,16 +25,17 @@ a tree is marked clean if it and all its branches are clean
 """
 
 def inputNodeUids(node:ChimaeraNode)->set[str]:
-	"""get all node uids that are inputs to this node
+	"""get all node uids that are inputs to this node -
+	read from node's dependency index, linking trees are
+	only expanded again if they've changed
 	"""
-	uids = set()
-	for key, wrapper in node._attrMap.items():
-		for branch in wrapper.incomingTreeExpanded().allBranches():
-			for attrRef in branch.value: #type:NodeAttrRef
-				uids.add(attrRef.uid)
-	return uids
-
+	return node.inputNodeUids()
 
+def _nodeForUid(uid:str)->ChimaeraNode:
+	found = ChimaeraNode.getByIndex(uid)
+	if found:
+		return found
+	return ChimaeraNode(Tree.getByIndex(uid))
 
 def graphFromNodes(nodes:T.Iterable[ChimaeraNode])->nx.DiGraph:
 	"""combined history of given nodes - no guarantee that
@@ -47,22 +48,22 @@ def graphFromNodes(nodes:T.Iterable[ChimaeraNode])->nx.DiGraph:
 	visited = set()
 	loopNodes = set()
 	nodes = set(ChimaeraNode(node) for node in nodes)
-	startNodes = set(nodes)
+	startNodes = set(node.uid for node in nodes)
 
 	graph.add_nodes_from(node.uid for node in nodes)
-
-	while nodes:
-		node = nodes.pop()
-		if node.uid in visited:
-			if node.uid in startNodes:
-				pass
-			else:
-				loopNodes.add(node.uid)
+	toVisit = [node.uid for node in nodes]
+	nodeMap = {node.uid : node for node in nodes}
+
+	while toVisit:
+		uid = toVisit.pop()
+		if uid in visited:
+			if uid not in startNodes:
+				loopNodes.add(uid)
 			continue
-		visited.add(node.uid)
+		visited.add(uid)
+		node = nodeMap.get(uid) or _nodeForUid(uid)
 		inputs = inputNodeUids(node)
-		nodes.update(inputs)
-		graph.add_nodes_from(uid for uid in inputs)
-		graph.add_edges_from((uid, node.uid) for uid in inputs)
+		toVisit.extend(inputs)
+		graph.add_nodes_from(inputs)
+		graph.add_edges_from((i, uid) for i in inputs)
 	return graph
-
@@ -14,6 +14,7 @@ from wplib.constant import MAP_TYPES, SEQ_TYPES, STR_TYPES, LITERAL_TYPES, IMMUT
 from wplib.object.visitor import PARAMS_T, CHILD_LIST_T
 from wplib.uid import getUid4
 from wplib.inheritance import clsSuper
+from wplib.time import profiled
 
 from wplib.object import VisitAdaptor, Visitable, ClassMagicMethodMixin, UidElement
 
@@ -133,6 +134,16 @@ may generate new nodes, and nodes are saved as overrides on parent data
 """
 
 
+def _copyExpandedTree(tree:Tree)->Tree:
+	"""structural copy of an expanded linking tree - values are
+	lists of immutable NodeAttrRefs, so no need for a full
+	serialised copy"""
+	result = Tree(tree.name, value=list(tree.value),
+	              branches=[_copyExpandedTree(i) for i in tree.branches])
+	result.auxProperties.update(tree.auxProperties)
+	return result
+
+
 class ChimaeraNode(Modelled,
                    Pathable,
                    Visitable,
@@ -363,6 +374,56 @@ class ChimaeraNode(Modelled,
 
 			branch.value = resultTuples
 
+	# { node uid : { attr name : (linking key, expanded tree, refs) } }
+	# linking key is (linking tree uid, its edit version) - an attribute
+	# is only expanded again once its raw linking tree has been edited.
+	# entries are dropped when nodes are removed through removeBranch()
+	_linkDependencyIndex : dict[str, dict[str, tuple[tuple, Tree, tuple[NodeAttrRef]]]] = {}
+
+	@classmethod
+	def clearLinkDependencyIndex(cls, uid:str=None):
+		"""drop indexed dependencies for one node uid, or for all"""
+		if uid is None:
+			cls._linkDependencyIndex.clear()
+			return
+		cls._linkDependencyIndex.pop(uid, None)
+
+	def _indexedLinking(self, atName:str, linkingTree:Tree, treeName:str=None
+	                    )->tuple[Tree, tuple[NodeAttrRef]]:
+		"""return (expanded linking tree, all refs in it) for attribute,
+		only expanding again if linking tree has been edited since last time.
+		linking values must be set on the tree, not changed in place.
+		expanded tree is shared, copy it before modifying"""
+		key = (linkingTree.uid, linkingTree.editVersion())
+		nodeIndex = self._linkDependencyIndex.setdefault(self.uid, {})
+		entry = nodeIndex.get(atName)
+		if entry is not None and entry[0] == key:
+			return entry[1], entry[2]
+		expanded = linkingTree.copy()
+		expanded.name = treeName or atName
+		self._expandLinkingTree(expanded)
+		refs = tuple(ref for branch in expanded.allBranches(includeSelf=True)
+		             for ref in branch.value)
+		nodeIndex[atName] = (key, expanded, refs)
+		return expanded, refs
+
+	def linkDependencies(self, attrs:T.Iterable[str]=None)->dict[str, tuple[NodeAttrRef]]:
+		"""return { attr name : refs } for each attribute's linking tree -
+		"T" refs to the node type's defaults are included"""
+		wrappers = {i.name() : i for i in self.attrNameRawTreeMap().values()}
+		result = {}
+		for atName in (attrs or wrappers.keys()):
+			wrapper = wrappers[atName]
+			result[atName] = self._indexedLinking(
+				atName, wrapper.linking(),
+				treeName=wrapper.linking().name if atName == "@T" else atName)[1]
+		return result
+
+	def inputNodeUids(self, attrs:T.Iterable[str]=None)->set[str]:
+		"""uids of all nodes this node's linking trees refer to"""
+		return {ref.uid for refs in self.linkDependencies(attrs).values()
+		        for ref in refs if ref.uid != "T"}
+
 	def _populateExpandedLinkingTree(self, expandedTree:Tree):
 		# def populateExpandedTree(expandedTree: Tree[list[NodeAttrRef]],
 		#                          attrWrapper: NodeAttrWrapper,
@@ -371,6 +432,8 @@ class ChimaeraNode(Modelled,
 		"""populate the expanded tree with rich trees -
 		expand each node attr ref into a rich tree"""
 
+		# each node only looked up once, however many branches refer to it
+		foundNodes : dict[str, ChimaeraNode] = {}
 		for branch in expandedTree.allBranches(includeSelf=True):
 			newValue = []
 			for ref in branch.value:  # type:NodeAttrRef
@@ -382,10 +445,12 @@ class ChimaeraNode(Modelled,
 					continue
 				# look at this beautiful line
 				#newValue.append(self.parent.getNodes(i.uid)[0]._attrMap[i.attr].resolve()[i.path])
-				foundNode : ChimaeraNode = self.parent.access(
-					self.parent, ref.uid, one=True, values=False,
-					uid=True
-				)
+				if ref.uid not in foundNodes:
+					foundNodes[ref.uid] = self.parent.access(
+						self.parent, ref.uid, one=True, values=False,
+						uid=True
+					)
+				foundNode : ChimaeraNode = foundNodes[ref.uid]
 				if not foundNode: continue
 				newValue.append(
 					foundNode.resolveAttribute(ref.attr)(ref.path)
@@ -458,6 +523,7 @@ class ChimaeraNode(Modelled,
 			"@NODES" : self._nodes, "nodes" : self._nodes
 		}
 	#endregion
+	@profiled("chimaera.resolveAttribute")
 	def resolveAttribute(self, attr:(Tree, NodeAttrWrapper, str))->Tree:
 		"""return the resolved tree for this attribute.
 
@@ -489,8 +555,8 @@ class ChimaeraNode(Modelled,
 		# special case to resolve type quickly
 		if atName == "@T":
 			# each step expanded for easier debugging
-			t = self.type.linking().copy()
-			self._expandLinkingTree(t)
+			t = _copyExpandedTree(self._indexedLinking(
+				"@T", self.type.linking(), treeName=self.type.linking().name)[0])
 			self._populateExpandedLinkingTree(t)
 			self._collatePopulatedTree(t)
 			treelib.overlayTreeInPlace(t, self.type.override().copy())
@@ -500,9 +566,8 @@ class ChimaeraNode(Modelled,
 		atMap = self.attrNameRawTreeMap()
 		assert atName in atMap, f"Unknown attribute {atName}, not in attr names {atMap.keys()}"
 		wrapper = atMap[atName]
-		t = wrapper.linking().copy() # copy tree to use for evaluations
-		t.name = atName
-		self._expandLinkingTree(t) # expand all links to NodeAttrRef tuples
+		# expand all links to NodeAttrRef tuples, copy tree to use for evaluations
+		t = _copyExpandedTree(self._indexedLinking(atName, wrapper.linking())[0])
 		self._populateExpandedLinkingTree(t) # convert ref tuples to actual trees
 		self._collatePopulatedTree(t) # overlay linked trees together
 		treelib.overlayTreeInPlace(t, wrapper.override().copy()) # overlay override tree on top
@@ -809,6 +874,21 @@ class ChimaeraNode(Modelled,
 		if isinstance(branch, ChimaeraNode): return branch
 		return ChimaeraNode(data)
 
+	def removeBranch(self, branch:(ChimaeraNode, Tree))->Tree:
+		"""remove child node, return its data -
+		indexed link dependencies for it and every node
+		below it are dropped"""
+		if isinstance(branch, ChimaeraNode):
+			data = branch.rawData()
+		else:
+			data = branch
+		self.data("@NODES", "override", data.name).remove()
+		# node uids are their data uids - checking every branch
+		# is cheaper than resolving child nodes on the way out
+		for i in data.allBranches(includeSelf=True):
+			self.clearLinkDependencyIndex(i.uid)
+		return data
+
 	def branchMap(self)->dict[keyT, ChimaeraNode]:
 		return {name : ChimaeraNode(branch)
 		        for name, branch in self.resolveAttribute("@NODES").branchMap().items()}
@@ -0,0 +1,98 @@
+from __future__ import annotations
+import typing as T
+
+import os, sys, shutil, tempfile, unittest
+from pathlib import Path
+
+from chimaera.anyfn.gather import discoverFunctions, FunctionIndex, functionsInSource
+
+
+class TestAnyFnDiscovery(unittest.TestCase):
+	""" tests for finding functions without importing them """
+
+	def setUp(self):
+		self.tempDir = Path(tempfile.mkdtemp())
+		package = self.tempDir / "anyfnpkg"
+		(package / "sub").mkdir(parents=True)
+		(package / "__init__.py").write_text("raise RuntimeError('imported')\n")
+		(package / "sub" / "__init__.py").write_text("")
+		(package / "sub" / "fns.py").write_text(
+			"raise RuntimeError('imported')\n"
+			"def add(a:int, b:int=2, *args, scale:float=1.0, **kwargs)->int:\n"
+			"\t'''add things'''\n"
+			"\treturn (a + b) * scale\n"
+			"def _private(): pass\n"
+			"class Thing:\n"
+			"\tdef method(self): pass\n"
+		)
+		self.indexPath = self.tempDir / "index.json"
+		sys.path.insert(0, str(self.tempDir))
+
+	def tearDown(self):
+		sys.path.remove(str(self.tempDir))
+		shutil.rmtree(self.tempDir, ignore_errors=True)
+
+	def test_discover(self):
+		found = discoverFunctions(("anyfnpkg", ), recurse=True,
+		                          index=FunctionIndex(self.indexPath))
+		self.assertEqual(list(found), ["anyfnpkg.sub.fns:add"])
+		self.assertNotIn("anyfnpkg", sys.modules)
+		fnInfo = found["anyfnpkg.sub.fns:add"]
+		self.assertEqual(fnInfo.doc, "add things")
+		self.assertEqual(fnInfo.signatureStr(),
+		                 "add(a:int, b:int=2, *args, scale:float=1.0, **kwargs)->int")
+
+	def test_signatureStr(self):
+		src = "def f(a, /, b, *, c=1): pass\n"
+		self.assertEqual(functionsInSource(src, "m")[0].signatureStr(),
+		                 "f(a, /, b, *, c=1)")
+
+	def test_index(self):
+		"""unchanged files come from the index, changed files are parsed again"""
+		discoverFunctions(("anyfnpkg", ), recurse=True,
+		                  index=FunctionIndex(self.indexPath))
+		self.assertTrue(self.indexPath.is_file())
+
+		path = self.tempDir / "anyfnpkg" / "sub" / "fns.py"
+		stat = path.stat()
+		text = path.read_text()
+		path.write_text(text.replace("def add", "def sub"))
+		os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+		found = discoverFunctions(("anyfnpkg", ), recurse=True,
+		                          index=FunctionIndex(self.indexPath))
+		self.assertEqual(list(found), ["anyfnpkg.sub.fns:add"])
+
+		os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+		found = discoverFunctions(("anyfnpkg", ), recurse=True,
+		                          index=FunctionIndex(self.indexPath))
+		self.assertEqual(list(found), ["anyfnpkg.sub.fns:sub"])
+
+	def test_indexPruned(self):
+		"""entries for deleted or moved files are dropped from the index"""
+		fnsPath = self.tempDir / "anyfnpkg" / "sub" / "fns.py"
+		otherPath = self.tempDir / "other.py"
+		otherPath.write_text("def other(): pass\n")
+		index = FunctionIndex(self.indexPath)
+		discoverFunctions(("anyfnpkg", ), rootPaths=(otherPath, ), recurse=True,
+		                  index=index)
+		self.assertIn(FunctionIndex.key(fnsPath), index._entries)
+
+		movedPath = fnsPath.with_name("moved.py")
+		fnsPath.rename(movedPath)
+		(self.tempDir / "anyfnpkg" / "sub" / "__init__.py").unlink()
+		(self.tempDir / "anyfnpkg" / "gone.py").write_text("def gone(): pass\n")
+		index = FunctionIndex(self.indexPath)
+		found = discoverFunctions(("anyfnpkg", ), recurse=True, index=index)
+		self.assertEqual(list(found), ["anyfnpkg.gone:gone"])
+
+		# sub is no longer a package, and fns.py moved - both dropped,
+		# files outside the walked packages are left alone
+		keys = set(FunctionIndex(self.indexPath)._entries)
+		self.assertNotIn(FunctionIndex.key(fnsPath), keys)
+		self.assertNotIn(FunctionIndex.key(movedPath), keys)
+		self.assertIn(FunctionIndex.key(otherPath), keys)
+		self.assertIn(FunctionIndex.key(self.tempDir / "anyfnpkg" / "gone.py"), keys)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -9,3 +9,45 @@ from chimaera import ChimaeraNode
 
 class TestGraph(unittest.TestCase):
 	""" tests for executing nodes in sequence """
+
+	def test_linkDependencyIndex(self):
+		graph = ChimaeraNode.create("graph")
+		a = graph.createNode(name="a")
+		b = graph.createNode(name="b")
+		b.flow.linking().value = ["T", (a.uid, "@F", ())]
+		self.assertEqual(b.inputNodeUids(), {a.uid})
+
+		# unchanged linking tree isn't expanded again
+		expanded = ChimaeraNode._linkDependencyIndex[b.uid]["@F"][1]
+		b.linkDependencies()
+		self.assertIs(ChimaeraNode._linkDependencyIndex[b.uid]["@F"][1], expanded)
+
+		# editing the linking tree invalidates it
+		b.flow.linking().value = ["T"]
+		self.assertEqual(b.inputNodeUids(), set())
+		b.flow.linking()("branch", create=True).value = [(a.uid, "@F", ())]
+		self.assertEqual(b.inputNodeUids(), {a.uid})
+
+	def test_linkDependencyIndexPruned(self):
+		graph = ChimaeraNode.create("graph")
+		a = graph.createNode(name="a")
+		b = graph.createNode(name="b")
+		c = b.createNode(name="c")
+		for node in (a, b, c):
+			node.linkDependencies()
+		self.assertTrue({b.uid, c.uid} <= ChimaeraNode._linkDependencyIndex.keys())
+
+		graph.removeBranch(b)
+		self.assertNotIn("b", graph.branchMap())
+		self.assertNotIn(b.uid, ChimaeraNode._linkDependencyIndex)
+		self.assertNotIn(c.uid, ChimaeraNode._linkDependencyIndex)
+		self.assertIn(a.uid, ChimaeraNode._linkDependencyIndex)
+
+	def test_graphFromNodes(self):
+		from chimaera.graph import graphFromNodes
+		graph = ChimaeraNode.create("graph")
+		a = graph.createNode(name="a")
+		b = graph.createNode(name="b")
+		b.flow.linking().value = ["T", (a.uid, "@F", ())]
+		result = graphFromNodes([b])
+		self.assertEqual(list(result.edges), [(a.uid, b.uid)])
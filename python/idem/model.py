@@ -2,16 +2,16 @@
 
 from __future__ import annotations
 
-import types
+import os, types
 import typing as T
 from pathlib import Path
 import orjson
 
-from wplib import Sentinel, log
+from wplib import Sentinel, log, CodeRef
 from wplib.object import Signal
 from wplib.time import TimeBlock
 from wplib.serial import serialise, deserialise
-from wptree import Tree
+from wptree import Tree, TreeDeltas
 from wpdex import *
 from wp import Asset, constant
 
@@ -74,7 +74,19 @@ class IdemSession(Modelled):
 		return self.asset().diskPath() / self.data["filePath"]
 
 	#region serialisation
-	def saveSession(self, toPath:Path=None):
+	# autosave writes a full file after this many journal entries
+	compactJournalAfter = 2000
+
+	def _resolveSavePath(self, toPath:Path=None)->(Path, None):
+		if toPath is None:
+			if self.asset() is None:
+				log("first select an asset and file path to save")
+				return None
+		toPath = str(toPath or self.fullChiPath())
+		# check suffix
+		return Path(toPath.rsplit(".", 1)[0] + ".chi")
+
+	def saveSession(self, toPath:Path=None, stream=True):
 		"""serialises the current session to the given path, or to the currently
 		selected asset/file if none given
 
@@ -85,43 +97,458 @@ class IdemSession(Modelled):
 		protobuf : typing.Any
 		capnproto: AnyPointer
 
+		file is written to a temp file and moved over the old one,
+		so a crash halfway through never leaves a broken .chi.
+		if stream, each branch is serialised and written on its own,
+		never holding the whole serialised session in memory -
+		otherwise writes a single orjson document, as before
 		"""
+		toPath = self._resolveSavePath(toPath)
 		if toPath is None:
-			if self.asset() is None:
-				log("first select an asset and file path to save")
-				return False
-
-		toPath = str(toPath or self.fullChiPath())
-		# check suffix
-		toPath = toPath.rsplit(".", 1)[0] + ".chi"
+			return False
 
 		log("begin saving scene to path", toPath)
-		with TimeBlock() as t:
-			data = self.serialise()
-		log("serialised scene in ", t.time)
-		with TimeBlock() as t:
-			with open(toPath, "wb") as f:
-				f.write(orjson.dumps(data))
-		log("wrote to file in", t.time)
+		with TimeBlock("idem.saveSession") as t:
+			if stream:
+				saved = _SavedRecords(self.rawData())
+				def _iterLines():
+					yield _dumpLine(_streamHeader(self))
+					yield from saved.walkAll()
+				try:
+					_atomicWriteLines(toPath, _iterLines())
+				except BaseException:
+					saved.close()
+					raise
+			else:
+				data = self.serialise()
+				_atomicWriteLines(toPath, (orjson.dumps(data), ))
+				saved = None
+		log("saved scene in ", t.time)
+		# full save makes any journal redundant
+		_journalPath(toPath).unlink(missing_ok=True)
+		self._setSavedRecords(saved)
+		self._savedPath = toPath
+		self._journalLength = 0
+		return True
+
+	def _setSavedRecords(self, saved:(_SavedRecords, None)):
+		"""swap in new saved records, and stop the old ones listening"""
+		old = getattr(self, "_savedRecords", None)
+		if old is not None and old is not saved:
+			old.close()
+		self._savedRecords = saved
+
+	def autosave(self, toPath:Path=None):
+		"""append only the branches changed since the last save
+		to a journal beside the .chi file -
+		falls back to a full save if there's nothing to diff against,
+		or the journal has grown past compactJournalAfter.
+
+		only branches reported by tree edit listeners since the last save
+		are revisited, so values changed in place are only caught by a full save"""
+		toPath = self._resolveSavePath(toPath)
+		if toPath is None:
+			return False
+		saved = getattr(self, "_savedRecords", None)
+		if (saved is None
+				or saved.root is not self.rawData()
+				or getattr(self, "_savedPath", None) != toPath
+				or self._journalLength >= self.compactJournalAfter):
+			return self.saveSession(toPath, stream=True)
+
+		with TimeBlock("idem.autosave") as t:
+			# saved records are updated as changes are found -
+			# if the journal can't be written, they no longer match the file
+			self._savedRecords = None
+			lines = saved.journalLines()
+			if lines:
+				with open(_journalPath(toPath), "ab") as f:
+					f.writelines(lines)
+					f.flush()
+					os.fsync(f.fileno())
+		log("autosaved", len(lines), "changes in", t.time)
+		self._savedRecords = saved
+		self._journalLength += len(lines)
+		return True
 
 	def loadSession(self, fromPath):
+		"""load either format of .chi file, replaying any
+		autosave journal found beside it"""
 		fromPath = Path(fromPath)
 		assert fromPath.is_file()
 		log("load chimaera session from ", fromPath)
-		with TimeBlock() as t:
-			with open(fromPath, mode="rb") as f:
-				serialData = orjson.loads(f.read())
+		with TimeBlock("idem.readSession") as t:
+			header, serialData, records, lines = _readSessionFile(fromPath)
 		log("read from file in ", t.time)
 
-		with TimeBlock() as t:
-			data = deserialise(serialData)
-			self.setDataModel(data)
+		with TimeBlock("idem.buildSession") as t:
+			if header is None:
+				data = deserialise(serialData)
+				if isinstance(data, Modelled):
+					data = data.rawData()
+				self.setDataModel(data)
+				self._setSavedRecords(None)
+			else:
+				journalPath = _journalPath(fromPath)
+				nJournal = 0
+				if journalPath.is_file():
+					nJournal = _replayJournal(journalPath, records, lines)
+				self.setDataModel(_treeFromRecords(records))
+				saved = _SavedRecords(self.rawData())
+				saved.track(lines)
+				self._setSavedRecords(saved)
+				self._journalLength = nJournal
+			self._savedPath = fromPath.with_suffix(".chi")
+			self.rawData()["graph"].session = self
 		log("loaded Idem session in ", t.time)
 
+	#endregion
 
 
+#region streamed session files
+"""streamed .chi files are json lines - a header, then one record
+per tree branch, parents always before their children:
+{ "u" : uid, "t" : uid of branch holding this tree (root branches only),
+  "p" : parent uid, "i" : index in parent, "n" : name,
+  "v" : serialised value, "a" : serialised aux properties, "c" : branch type }
 
-	#endregion
+Modelled values holding a tree (like the graph) are written as a
+marker in "v", followed by records for their own tree.
+
+autosave journals are json lines of { "set" : record } or { "del" : uid },
+replayed in order over the records of the last full save.
+
+anything else is read as a single orjson document, the format
+written before streaming.
+"""
+
+STREAM_FORMAT = "chiStream"
+STREAM_VERSION = 1
+MODELLED_KEY = "@MODELLED"
+
+def _journalPath(chiPath:Path)->Path:
+	chiPath = Path(chiPath)
+	return chiPath.with_name(chiPath.name + ".journal")
+
+def _dumpLine(obj)->bytes:
+	return orjson.dumps(obj) + b"\n"
+
+def _setLine(recordLine:bytes)->bytes:
+	"""journal entry setting a record, from its already dumped line"""
+	return b'{"set":' + recordLine[:-1] + b'}\n'
+
+def _rawRoot(branch:Tree)->Tree:
+	"""topmost parent, ignoring any isRoot breakpoints"""
+	while branch._getRawParent() is not None:
+		branch = branch._getRawParent()
+	return branch
+
+def _streamHeader(session:IdemSession)->dict:
+	return {"format" : STREAM_FORMAT, "version" : STREAM_VERSION,
+	        "type" : CodeRef.get(type(session))}
+
+def _atomicWriteLines(path:Path, lines:T.Iterable[bytes]):
+	"""write to temp file beside path, then swap it in"""
+	path = Path(path)
+	tempPath = path.with_name(path.name + ".tmp")
+	try:
+		with open(tempPath, "wb") as f:
+			for line in lines:
+				f.write(line)
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(tempPath, path)
+	except BaseException:
+		tempPath.unlink(missing_ok=True)
+		raise
+
+def _modelledTree(branch:Tree)->(Tree, None):
+	"""return tree held by a Modelled value of branch, if any"""
+	value = branch._getRawValue()
+	if isinstance(value, Modelled) and isinstance(value.rawData(), Tree):
+		return value.rawData()
+	return None
+
+def _branchRecord(branch:Tree, parentUid:str, index:(int, None))->dict:
+	"""record for a single branch - index None marks the root of a tree,
+	held by the branch with parentUid"""
+	record = {"u" : branch.uid, "n" : branch.name}
+	if index is None:
+		record["t"] = parentUid
+	else:
+		record["p"] = parentUid
+		record["i"] = index
+	if type(branch) is not Tree:
+		record["c"] = CodeRef.get(type(branch))
+	if branch._getRawAuxProperties() != branch.defaultAuxProperties():
+		record["a"] = serialise(dict(branch._getRawAuxProperties()))
+	value = branch._getRawValue()
+	if _modelledTree(branch) is not None:
+		record["v"] = {MODELLED_KEY : CodeRef.get(type(value))}
+	else:
+		record["v"] = serialise(value)
+	return record
+
+class _SavedRecords:
+	"""what was last written to file for each branch of a session.
+	listens for edits on the session tree, and on every tree held by a
+	Modelled value in it, so autosave only revisits branches edited since.
+	held trees count as children of the branch holding them"""
+
+	def __init__(self, root:Tree):
+		self.root = root
+		# { uid : record line }
+		self.lines : dict[str, bytes] = {}
+		# { uid : (parent or holder uid, index, child uids) }
+		self.branches : dict[str, tuple] = {}
+		# { holder uid : (holder branch, held tree root) }
+		self.modelled : dict[str, tuple[Tree, Tree]] = {}
+		# { uid : branch } edited since last walk
+		self._edited : dict[str, Tree] = {}
+		# { uid : branch } with branches added, removed or reordered
+		self._editedParents : dict[str, Tree] = {}
+		# uids added to a parent - anything below may have been
+		# edited while they were out of the tree
+		self._added : set[str] = set()
+		# { id(tree root) : tree root } listened to
+		self._listening : dict[int, Tree] = {}
+
+	def _listen(self, root:Tree):
+		if id(root) not in self._listening:
+			root.addEditListener(self.onTreeEdited)
+			self._listening[id(root)] = root
+
+	def close(self):
+		"""stop listening for edits"""
+		for root in self._listening.values():
+			root.removeEditListener(self.onTreeEdited)
+		self._listening.clear()
+
+	def onTreeEdited(self, delta:TreeDeltas.Base):
+		branch = delta.branchRef
+		self._edited[branch.uid] = branch
+		if isinstance(delta, (TreeDeltas.Create, TreeDeltas.Delete, TreeDeltas.Move)):
+			self._editedParents[delta.parentRef.uid] = delta.parentRef
+		if isinstance(delta, TreeDeltas.Create):
+			self._added.add(branch.uid)
+
+	def _walk(self, root:Tree, parentUid:(str, None), index:(int, None),
+	          visited:set, removed:list, changedOnly=False, lines:dict=None
+	          )->T.Iterator[bytes]:
+		"""yield record lines top-down from root, parents before children,
+		updating saved state as it goes.
+
+		if changedOnly, only yield lines that differ from last time.
+		if lines given, take them as what's already on disk,
+		without serialising anything"""
+		stack = [(root, parentUid, index)]
+		while stack:
+			branch, parentUid, index = stack.pop()
+			uid = branch.uid
+			visited.add(uid)
+			if index is None: # root of session, or of a held tree
+				self._listen(branch)
+			if lines is None:
+				line = _dumpLine(_branchRecord(branch, parentUid, index))
+				if not changedOnly or self.lines.get(uid) != line:
+					yield line
+			else:
+				line = lines[uid]
+			self.lines[uid] = line
+
+			children = branch._getRawBranches()
+			heldRoot = self._updateChildren(branch, parentUid, index, removed)
+			for i in range(len(children) - 1, -1, -1):
+				stack.append((children[i], uid, i))
+			if heldRoot is not None: # held tree directly after its holder
+				stack.append((heldRoot, uid, None))
+
+	def _updateChildren(self, branch:Tree, parentUid:(str, None), index:(int, None),
+	                    removed:list)->(Tree, None):
+		"""save branch's place and child uids, adding any that left it
+		to removed - return its held tree root, if any"""
+		uid = branch.uid
+		childUids = [i.uid for i in branch._getRawBranches()]
+		heldRoot = _modelledTree(branch)
+		if heldRoot is not None:
+			childUids.append(heldRoot.uid)
+			self.modelled[uid] = (branch, heldRoot)
+		else:
+			self.modelled.pop(uid, None)
+		saved = self.branches.get(uid)
+		if saved is not None:
+			current = set(childUids)
+			removed.extend(i for i in saved[2] if i not in current)
+		self.branches[uid] = (parentUid, index, tuple(childUids))
+		return heldRoot
+
+	def _rewrite(self, branch:Tree, parentUid:(str, None), index:(int, None),
+	             visited:set, removed:list)->list[bytes]:
+		"""record lines for single branch, if it changed,
+		and for all of a tree newly held in its value"""
+		uid = branch.uid
+		visited.add(uid)
+		result = []
+		line = _dumpLine(_branchRecord(branch, parentUid, index))
+		if self.lines.get(uid) != line:
+			result.append(line)
+			self.lines[uid] = line
+		heldRoot = self._updateChildren(branch, parentUid, index, removed)
+		if heldRoot is not None and heldRoot.uid not in self.branches:
+			result.extend(self._walk(heldRoot, uid, None, visited, removed))
+		return result
+
+	def _isLive(self, branch:Tree, cache:dict)->bool:
+		"""is branch still in the session tree, or in a tree
+		held by a live branch"""
+		top = _rawRoot(branch)
+		if top is self.root:
+			return True
+		if id(top) not in cache:
+			cache[id(top)] = False
+			for holder, heldRoot in tuple(self.modelled.values()):
+				if heldRoot is top:
+					cache[id(top)] = (_modelledTree(holder) is top
+					                  and self._isLive(holder, cache))
+					break
+		return cache[id(top)]
+
+	def walkAll(self)->T.Iterator[bytes]:
+		"""yield every record line of the session, for a full save"""
+		yield from self._walk(self.root, None, None, set(), [])
+
+	def track(self, lines:dict[str, bytes]):
+		"""take lines as the records on disk for the freshly loaded root"""
+		for _ in self._walk(self.root, None, None, set(), [], lines=lines):
+			pass
+
+	def journalLines(self)->list[bytes]:
+		"""return journal entries for everything edited since
+		the last walk"""
+		edited, editedParents, added = self._edited, self._editedParents, self._added
+		self._edited, self._editedParents, self._added = {}, {}, set()
+		liveCache = {}
+		visited = set()
+		removed = []
+		lines = []
+
+		# new, moved and reordered branches
+		for parent in editedParents.values():
+			saved = self.branches.get(parent.uid)
+			if saved is None or not self._isLive(parent, liveCache):
+				continue # new parents are walked from their own parent
+			lines.extend(self._rewrite(parent, saved[0], saved[1], visited, removed))
+			for i, child in enumerate(parent._getRawBranches()):
+				childSaved = self.branches.get(child.uid)
+				if (child.uid in added or childSaved is None
+						or childSaved[0] != parent.uid):
+					lines.extend(self._walk(child, parent.uid, i, visited, removed,
+					                        changedOnly=True))
+				elif childSaved[1] != i:
+					lines.extend(self._rewrite(child, parent.uid, i, visited, removed))
+
+		# names, values and properties
+		for uid, branch in edited.items():
+			if uid in visited:
+				continue
+			saved = self.branches.get(uid)
+			if saved is None or not self._isLive(branch, liveCache):
+				continue
+			lines.extend(self._rewrite(branch, saved[0], saved[1], visited, removed))
+
+		lines = [_setLine(i) for i in lines]
+
+		# anything that left its parent and didn't turn up anywhere else
+		# is gone, along with everything saved below it
+		toDelete = [i for i in removed if i not in visited]
+		while toDelete:
+			uid = toDelete.pop()
+			if uid in visited or uid not in self.branches:
+				continue
+			toDelete.extend(self.branches.pop(uid)[2])
+			self.lines.pop(uid, None)
+			self.modelled.pop(uid, None)
+			lines.append(_dumpLine({"del" : uid}))
+		for key, root in tuple(self._listening.items()):
+			if root.uid not in self.branches:
+				root.removeEditListener(self.onTreeEdited)
+				del self._listening[key]
+		return lines
+
+def _readSessionFile(path:Path)->tuple[(dict, None), T.Any, dict, dict]:
+	"""return (header, serial data, records, record lines) from .chi file -
+	streamed files have no serial data, single documents have
+	no header or records"""
+	with open(path, mode="rb") as f:
+		firstLine = f.readline()
+		try:
+			header = orjson.loads(firstLine)
+		except orjson.JSONDecodeError: # document spread over lines
+			header = None
+		if not (isinstance(header, dict) and header.get("format") == STREAM_FORMAT):
+			return None, orjson.loads(firstLine + f.read()), {}, {}
+		records = {}
+		lines = {}
+		for line in f:
+			record = orjson.loads(line)
+			records[record["u"]] = record
+			lines[record["u"]] = line
+	return header, None, records, lines
+
+def _replayJournal(journalPath:Path, records:dict, lines:dict)->int:
+	"""apply journal entries over records in place,
+	return number of entries - a torn last line from
+	a crash mid-write is ignored"""
+	n = 0
+	with open(journalPath, "rb") as f:
+		for line in f:
+			try:
+				entry = orjson.loads(line)
+			except orjson.JSONDecodeError:
+				log("ignoring incomplete journal entry in", journalPath)
+				break
+			n += 1
+			if "del" in entry:
+				records.pop(entry["del"], None)
+				lines.pop(entry["del"], None)
+				continue
+			record = entry["set"]
+			records[record["u"]] = record
+			lines[record["u"]] = _dumpLine(record)
+	return n
+
+def _treeFromRecords(records:dict[str, dict])->Tree:
+	"""rebuild session tree, and any modelled trees
+	held in its values"""
+	branches : dict[str, Tree] = {}
+	children : dict[str, list] = {}
+	roots : dict[str, Tree] = {} # { holder uid : tree root }
+	for uid, record in records.items():
+		branchType = CodeRef.resolve(record["c"]) if "c" in record else Tree
+		branch = branchType(record["n"], uid=uid)
+		if "a" in record:
+			branch.auxProperties.update(deserialise(record["a"]))
+		branches[uid] = branch
+		if "p" in record:
+			children.setdefault(record["p"], []).append((record["i"], uid))
+		else:
+			roots[record["t"]] = branch
+
+	for parentUid, childList in children.items():
+		parent = branches[parentUid]
+		for index, uid in sorted(childList, key=lambda x: x[0]):
+			parent.addBranch(branches[uid])
+
+	# values last, so modelled trees are complete before wrapping
+	for uid, record in records.items():
+		value = record.get("v")
+		if isinstance(value, dict) and MODELLED_KEY in value:
+			value = CodeRef.resolve(value[MODELLED_KEY]).decode(roots[uid])
+		else:
+			value = deserialise(value)
+		branches[uid]._setRawValue(value)
+	return roots[None]
+#endregion
 
 if __name__ == '__main__':
 	s = IdemSession.create(name="testIdem")
@@ -0,0 +1,135 @@
+
+from __future__ import annotations
+import typing as T
+
+import os, tempfile, unittest
+from pathlib import Path
+
+import orjson
+
+from wptree import Tree
+from idem.model import (_SavedRecords, _atomicWriteLines, _dumpLine, _streamHeader,
+                        _journalPath, _readSessionFile, _replayJournal, _treeFromRecords)
+
+
+class TestSessionFile(unittest.TestCase):
+	""" tests for streamed .chi files and autosave journals """
+
+	def setUp(self):
+		self.tempDir = tempfile.TemporaryDirectory()
+		self.path = Path(self.tempDir.name) / "test.chi"
+		root = Tree("root")
+		root("a").value = 1
+		root("a", "leaf").value = "leafValue"
+		root("b").value = [1, 2, 3]
+		root("b").setAuxProperty("key", "auxValue")
+		for i in range(5):
+			root("c", "x" + str(i)).value = i
+		self.root = root
+
+	def tearDown(self):
+		self.tempDir.cleanup()
+		if getattr(self, "saved", None) is not None:
+			self.saved.close()
+
+	def assertTreesEqual(self, a:Tree, b:Tree):
+		self.assertEqual(
+			(a.uid, a.name, a.value, dict(a._getRawAuxProperties())),
+			(b.uid, b.name, b.value, dict(b._getRawAuxProperties())))
+		self.assertEqual([i.uid for i in a.branches], [i.uid for i in b.branches])
+		for x, y in zip(a.branches, b.branches):
+			self.assertTreesEqual(x, y)
+
+	def _save(self)->_SavedRecords:
+		self.saved = _SavedRecords(self.root)
+		_atomicWriteLines(self.path, (
+			_dumpLine(_streamHeader(self)), *self.saved.walkAll()))
+		return self.saved
+
+	def _autosave(self, saved:_SavedRecords)->int:
+		lines = saved.journalLines()
+		with open(_journalPath(self.path), "ab") as f:
+			f.writelines(lines)
+		return len(lines)
+
+	def _load(self)->Tree:
+		header, serialData, records, lines = _readSessionFile(self.path)
+		self.assertIsNotNone(header)
+		if _journalPath(self.path).is_file():
+			_replayJournal(_journalPath(self.path), records, lines)
+		return _treeFromRecords(records)
+
+	def test_saveLoad(self):
+		self._save()
+		with open(self.path, "rb") as f:
+			lines = f.readlines()
+		# header, then one line per branch, parents first
+		self.assertEqual(len(lines), 1 + len(self.root.allBranches(includeSelf=True)))
+		seen = set()
+		for line in lines[1:]:
+			record = orjson.loads(line)
+			self.assertTrue(record.get("p") is None or record["p"] in seen)
+			seen.add(record["u"])
+		self.assertTreesEqual(self._load(), self.root)
+
+	def test_loadSingleDocument(self):
+		"""files from before streaming are one document,
+		maybe indented over many lines"""
+		data = {"format" : "old", "branches" : [1, 2, 3]}
+		self.path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+		header, serialData, records, lines = _readSessionFile(self.path)
+		self.assertIsNone(header)
+		self.assertEqual(serialData, data)
+		self.assertEqual(records, {})
+
+	def test_atomicReplace(self):
+		"""a save failing halfway leaves the last file untouched"""
+		self._save()
+		before = self.path.read_bytes()
+		def _failingLines():
+			yield b"partial\n"
+			raise RuntimeError("crash mid-save")
+		self.assertRaises(RuntimeError, _atomicWriteLines, self.path, _failingLines())
+		self.assertEqual(self.path.read_bytes(), before)
+		self.assertEqual(os.listdir(self.tempDir.name), [self.path.name])
+
+	def test_journalReplay(self):
+		saved = self._save()
+		self.assertEqual(self._autosave(saved), 0)
+
+		# value edit only writes that branch
+		self.root("a", "leaf").value = "newValue"
+		self.assertEqual(self._autosave(saved), 1)
+		self.assertTreesEqual(self._load(), self.root)
+
+		# subtree edited while out of the tree, then put back
+		branch = self.root("c", "x4")
+		branch.remove()
+		branch("below").value = "detached"
+		self.root("c").addBranch(branch)
+		self._autosave(saved)
+		self.assertTreesEqual(self._load(), self.root)
+
+		# insert at front shifts later siblings, removing
+		# a subtree deletes everything below it
+		self.root("c").addBranch(Tree("new", value=5), index=0)
+		self.root("a").remove()
+		self.root("b").setAuxProperty("key", "newAux")
+		self._autosave(saved)
+		self.assertTreesEqual(self._load(), self.root)
+
+		# moved branch keeps its subtree, from a removed parent
+		moved = self.root("c", "x2")
+		moved("below").value = 2
+		self._autosave(saved)
+		moved.remove()
+		self.root("b").addBranch(moved)
+		self.root("c").remove()
+		self._autosave(saved)
+		self.assertTreesEqual(self._load(), self.root)
+
+		# torn last entry from a crash mid-write is skipped
+		with open(_journalPath(self.path), "ab") as f:
+			f.write(b'{"del":"' + self.root("b").uid.encode())
+		self.assertTreesEqual(self._load(), self.root)
+
@@ -1,24 +1,96 @@
-
 from __future__ import annotations
 import typing as T
 
-import time, logging, threading, os
+import time, logging, threading, os, queue
 
 from pathlib import Path
+from dataclasses import dataclass
 
 from watchdog.observers import Observer
-from watchdog.events import LoggingEventHandler, FileSystemEventHandler
+from watchdog.events import LoggingEventHandler, FileSystemEventHandler, FileSystemEvent
+
+"""
+raw watchdog events are noisy - one save from most programs writes a temp
+file, renames it and modifies it again, each firing its own event.
+
+events are gathered per path, and only passed on once that path has been
+quiet for quietPeriod seconds - everything that happened to it in that
+time is merged into a single FileChange. All paths ready at the same time
+are delivered together as one batch.
+
+inotify and friends don't work on network shares, so watchers can poll
+instead - stat-ing every file under the watched paths, slowing down
+while nothing changes, and speeding back up when something does.
+"""
+
+@dataclass(frozen=True)
+class FileChange:
+	"""everything that happened to one path within a quiet period"""
+	path : str
+	kinds : frozenset[str] # "created", "modified", "deleted", "moved", "closed"
+	isDirectory : bool = False
+	destPath : str = None # set if path was moved
+
+	# match watchdog event attributes, for callbacks written against those
+	@property
+	def src_path(self)->str:
+		return self.path
+
+	@property
+	def event_type(self)->str:
+		return next(iter(self.kinds)) if len(self.kinds) == 1 else "modified"
+
+
+class _ForwardingHandler(FileSystemEventHandler):
+	def __init__(self, watcher:ThreadedFileWatcher):
+		super().__init__()
+		self.watcher = watcher
+
+	def on_any_event(self, event:FileSystemEvent):
+		self.watcher._onRawEvent(event)
 
 
 class ThreadedFileWatcher:
 	"""watch for file changes in a separate thread -
-	main-thread object remains for control purposes"""
+	main-thread object remains for control purposes
+
+	by default changes are debounced and delivered in batches to
+	onFileChanges() / setBatchCallback(), on the watcher's own thread -
+	pass deliverFn to hand each delivery to another thread, eg
+	deliverFn=lambda fn: QtCore.QTimer.singleShot(0, fn)
+	or use setBatchQueue() to have batches put on a queue instead.
+
+	with quietPeriod=0, every raw watchdog event goes straight
+	to onFileEvent(), as before
+	"""
 
-	def __init__(self, pathMasks:list[Path]=()):
+	def __init__(self, pathMasks:list[Path]=(),
+	             quietPeriod:float=0.25,
+	             usePolling=False,
+	             pollInterval:float=0.5,
+	             maxPollInterval:float=8.0,
+	             deliverFn:T.Callable[[T.Callable[[], None]], None]=None,
+	             ):
 		self._pathMasks : list[Path] = list(map(Path, pathMasks))
-		self._observer : Observer = Observer()
+		self._observer : Observer = None
 		self._handlers : list[FileSystemEventHandler] = []
 
+		self.quietPeriod = quietPeriod
+		self.usePolling = usePolling
+		self.pollInterval = pollInterval
+		self.maxPollInterval = maxPollInterval
+		self.deliverFn = deliverFn
+
+		self._fileEventCallback = self.onFileEvent
+		self._batchCallback = self.onFileChanges
+		self._batchQueue : queue.Queue = None
+
+		# { path : [kinds, isDirectory, destPath, time of last event] }
+		self._pending : dict[str, list] = {}
+		self._lock = threading.Condition()
+		self._stopEvent = threading.Event()
+		self._threads : list[threading.Thread] = []
+
 		self._isRunning = False
 
 		self.setPathMasks(*pathMasks)
@@ -29,30 +101,166 @@ class ThreadedFileWatcher:
 
 	def setPathMasks(self, *pathMasks:Path):
 		"""set paths to watch, can be specific files
-		or wildcards, or directories"""
-		self._pathMasks = list(pathMasks)
+		or directories - restarts watcher if it was running"""
+		wasRunning = self.isRunning()
 		self.stop()
-		self._observer.unschedule_all()
-
-		self._handlers = []
-		for i in self._pathMasks:
-			handler = FileSystemEventHandler()
-			#print("schedule handler for", i)
-			self._observer.schedule(
-				handler, str(i), recursive=True)
-			self._handlers.append(handler)
-		self.setFileEventCallback(self.onFileEvent)
+		self._pathMasks = list(map(Path, pathMasks))
+		if wasRunning:
+			self.start()
 
+	#region receiving events
 	def onFileEvent(self, event):
-		"""OVERRIDE any file event"""
+		"""OVERRIDE any file event - only called directly
+		if quietPeriod is 0, otherwise called for each FileChange
+		in a batch"""
 		pass
 
-	def setFileEventCallback(self, callback):
+	def onFileChanges(self, changes:list[FileChange]):
+		"""OVERRIDE debounced batch of file changes -
+		by default passes each on to file event callback"""
+		for i in changes:
+			self._fileEventCallback(i)
+
+	def setFileEventCallback(self, callback:T.Callable[[(FileChange, FileSystemEvent)], None]):
 		"""set callback for file events -
 		overrides onFileEvent if called"""
-		for i in self._handlers:
-			i.on_any_event = callback
+		self._fileEventCallback = callback
 
+	def setBatchCallback(self, callback:T.Callable[[list[FileChange]], None]):
+		"""set callback for batches of debounced changes -
+		overrides onFileChanges if called"""
+		self._batchCallback = callback
+
+	def setBatchQueue(self, batchQueue:queue.Queue=None):
+		"""put batches on given queue instead of calling back -
+		pass None to go back to callbacks"""
+		self._batchQueue = batchQueue
+
+	def _onRawEvent(self, event:FileSystemEvent):
+		"""called on observer thread"""
+		if not self.quietPeriod:
+			self._fileEventCallback(event)
+			return
+		self._addPending(event.src_path, event.event_type, event.is_directory,
+		                 getattr(event, "dest_path", None) or None)
+
+	def _addPending(self, path:str, kind:str, isDirectory=False, destPath:str=None):
+		with self._lock:
+			entry = self._pending.get(path)
+			if entry is None:
+				self._pending[path] = [{kind}, isDirectory, destPath, time.monotonic()]
+				self._lock.notify()
+				return
+			entry[0].add(kind)
+			entry[2] = destPath or entry[2]
+			entry[3] = time.monotonic()
+	#endregion
+
+	#region delivering
+	def _deliver(self, changes:list[FileChange]):
+		if self._batchQueue is not None:
+			self._batchQueue.put(changes)
+			return
+		if self.deliverFn is not None:
+			self.deliverFn(lambda: self._batchCallback(changes))
+			return
+		self._batchCallback(changes)
+
+	def _takeReady(self)->tuple[list[FileChange], float]:
+		"""pop all pending paths quiet for long enough -
+		returns (changes, seconds until next path is ready or None)"""
+		now = time.monotonic()
+		ready = []
+		nextReady = None
+		for path, (kinds, isDirectory, destPath, lastTime) in tuple(self._pending.items()):
+			wait = lastTime + self.quietPeriod - now
+			if wait > 0:
+				nextReady = wait if nextReady is None else min(wait, nextReady)
+				continue
+			self._pending.pop(path)
+			ready.append(FileChange(path, frozenset(kinds), isDirectory, destPath))
+		return ready, nextReady
+
+	def _runDebounce(self):
+		"""thread waiting for pending paths to go quiet"""
+		while not self._stopEvent.is_set():
+			with self._lock:
+				ready, nextReady = self._takeReady()
+				if not ready:
+					self._lock.wait(timeout=nextReady)
+					continue
+			try:
+				self._deliver(ready)
+			except Exception:
+				logging.exception("error delivering file changes")
+	#endregion
+
+	#region polling
+	def _snapshot(self)->dict[str, tuple]:
+		"""{ path : (mtime, size, isDirectory) } for everything watched"""
+		result = {}
+		toScan = []
+		for i in self._pathMasks:
+			try:
+				stat = os.stat(i)
+			except OSError:
+				continue
+			result[str(i)] = (stat.st_mtime_ns, stat.st_size, i.is_dir())
+			if i.is_dir():
+				toScan.append(str(i))
+		while toScan:
+			try:
+				it = os.scandir(toScan.pop())
+			except OSError: # removed while scanning
+				continue
+			with it:
+				for entry in it:
+					try:
+						stat = entry.stat(follow_symlinks=False)
+						isDir = entry.is_dir(follow_symlinks=False)
+					except OSError:
+						continue
+					result[entry.path] = (stat.st_mtime_ns, stat.st_size, isDir)
+					if isDir:
+						toScan.append(entry.path)
+		return result
+
+	def _runPolling(self):
+		"""compare snapshots, backing off while nothing changes"""
+		interval = self.pollInterval
+		before = self._snapshot()
+		while not self._stopEvent.wait(interval):
+			after = self._snapshot()
+			changed = False
+			for path, data in after.items():
+				old = before.get(path)
+				if old is None:
+					self._emitPolled(path, "created", data[2])
+				elif old != data and not data[2]: # dir mtimes follow their contents
+					self._emitPolled(path, "modified", data[2])
+				else:
+					continue
+				changed = True
+			for path in before.keys() - after.keys():
+				self._emitPolled(path, "deleted", before[path][2])
+				changed = True
+			before = after
+			if changed:
+				interval = self.pollInterval
+			else:
+				interval = min(interval * 1.5, self.maxPollInterval)
+
+	def _emitPolled(self, path:str, kind:str, isDirectory:bool):
+		if self.quietPeriod:
+			self._addPending(path, kind, isDirectory)
+		else:
+			self._fileEventCallback(FileChange(path, frozenset((kind, )), isDirectory))
+	#endregion
+
+	def _startThread(self, fn:T.Callable, name:str):
+		thread = threading.Thread(target=fn, name=name, daemon=True)
+		thread.start()
+		self._threads.append(thread)
 
 	def start(self):
 		"""start watching"""
@@ -60,15 +268,41 @@ class ThreadedFileWatcher:
 		if self.isRunning():
 			return
 		self._isRunning = True
+		self._stopEvent.clear()
+		if self.quietPeriod:
+			self._startThread(self._runDebounce, "fileWatcherDebounce")
+		if self.usePolling:
+			self._startThread(self._runPolling, "fileWatcherPoll")
+			return
+
+		# observers can't be restarted once stopped, make a new one each time
+		self._observer = Observer()
+		self._handlers = []
+		for i in self._pathMasks:
+			handler = _ForwardingHandler(self)
+			#print("schedule handler for", i)
+			self._observer.schedule(
+				handler, str(i), recursive=True)
+			self._handlers.append(handler)
 		self._observer.start()
 		#print("observer started", self._observer.is_alive())
 
 	def stop(self):
-		"""stop watching"""
+		"""stop watching - any pending changes are dropped"""
 		if not self.isRunning():
 			return
-		self._observer.stop()
-		self._observer.join()
+		self._stopEvent.set()
+		if self._observer is not None:
+			self._observer.stop()
+			self._observer.join()
+			self._observer = None
+		with self._lock:
+			self._pending.clear()
+			self._lock.notify_all()
+		for i in self._threads:
+			if i is not threading.current_thread():
+				i.join()
+		self._threads = []
 		self._isRunning = False
 
 
@@ -88,4 +322,3 @@ def main():
 
 if __name__ == '__main__':
 	main()
-
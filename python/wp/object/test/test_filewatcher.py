@@ -0,0 +1,93 @@
+
+from __future__ import annotations
+
+import time, tempfile, shutil, queue, threading
+from collections import Counter
+from pathlib import Path
+
+import unittest
+
+from wp.object.filewatcher import ThreadedFileWatcher, FileChange
+
+
+class TestFileWatcher(unittest.TestCase):
+	""" repeated events on one path should arrive as one change,
+	once that path has gone quiet """
+
+	def setUp(self):
+		self.dir = Path(tempfile.mkdtemp())
+		self.batches = queue.Queue()
+
+	def tearDown(self):
+		shutil.rmtree(self.dir, ignore_errors=True)
+
+	def makeWatcher(self, **kwargs)->ThreadedFileWatcher:
+		watcher = ThreadedFileWatcher([self.dir], **kwargs)
+		watcher.setBatchQueue(self.batches)
+		watcher.start()
+		self.addCleanup(watcher.stop)
+		return watcher
+
+	def gatherChanges(self, timeout=3.0)->dict[str, FileChange]:
+		"""collect batches until nothing arrives for a while"""
+		changes = {}
+		try:
+			while True:
+				for i in self.batches.get(timeout=timeout):
+					changes[i.path] = i
+				timeout = 0.5
+		except queue.Empty:
+			pass
+		return changes
+
+	def saveFile(self, path:Path):
+		"""write, then rename over and touch again -
+		the way most programs save"""
+		tempPath = path.with_suffix(".tmp")
+		tempPath.write_text("a")
+		tempPath.replace(path)
+		with open(path, "a") as f:
+			f.write("b")
+
+	def test_debounce(self):
+		"""each path saved repeatedly within the quiet period
+		is delivered exactly once"""
+		deliveries = Counter()
+		kinds = {}
+		lock = threading.Lock()
+		def _onBatch(changes:list[FileChange]):
+			with lock:
+				for i in changes:
+					deliveries[i.path] += 1
+					kinds[i.path] = i.kinds
+
+		watcher = ThreadedFileWatcher([self.dir], quietPeriod=0.3)
+		watcher.setBatchCallback(_onBatch)
+		watcher.start()
+		self.addCleanup(watcher.stop)
+		time.sleep(0.2)
+		targets = [self.dir / "out.txt", self.dir / "other.txt"]
+		for i in range(3):
+			for target in targets:
+				self.saveFile(target)
+		time.sleep(1.5)
+
+		with lock:
+			for target in targets:
+				self.assertEqual(deliveries[str(target)], 1)
+				self.assertIn("modified", kinds[str(target)])
+
+	def test_polling(self):
+		self.makeWatcher(quietPeriod=0.1, usePolling=True,
+		                 pollInterval=0.05, maxPollInterval=0.2)
+		time.sleep(0.2)
+		target = self.dir / "sub" / "out.txt"
+		target.parent.mkdir()
+		self.saveFile(target)
+		changes = self.gatherChanges()
+		self.assertIn(str(target), changes)
+		self.assertIn("created", changes[str(target)].kinds)
+
+		target.unlink()
+		changes = self.gatherChanges()
+		self.assertEqual(changes[str(target)].kinds, {"deleted"})
@@ -0,0 +1,198 @@
+from __future__ import annotations
+import typing as T
+import os
+from pathlib import Path
+
+import orjson
+
+from wplib import log
+
+"""single-file cache of a show's asset hierarchy, so walking
+assets doesn't have to glob every folder and parse every _asset.json.
+
+each folder entry records its own mtime - adding, removing or renaming
+anything directly inside a folder updates its mtime, so an entry is
+valid as long as the mtimes match.
+_asset.json files are edited in place, so asset records are checked
+against the file's own mtime instead.
+
+with validate=False nothing is stat-ed at all, we just trust the file -
+fine for batch tools running on a show that isn't changing under them
+
+catalogue layout:
+{
+	"version" : 1,
+	"dirs" : { relative dir path : {"mtime", "isAsset", "dirs" : [child names]} },
+	"assets" : { relative dir path : {"mtime", "uid", "tags"} }
+}
+"""
+
+CATALOGUE_VERSION = 1
+CATALOGUE_NAME = "_catalogue.json"
+ASSET_FILE_NAME = "_asset.json"
+
+def _emptyData()->dict:
+	return {"version" : CATALOGUE_VERSION, "dirs" : {}, "assets" : {}}
+
+def _mtime(path:Path)->(float, None):
+	try:
+		return os.stat(path).st_mtime
+	except (FileNotFoundError, NotADirectoryError):
+		return None
+
+
+class ShowCatalogue(object):
+	"""cache of folder and asset data under a single show folder -
+	loaded lazily, saved with save() if anything changed"""
+
+	def __init__(self, rootPath:Path, validate=True):
+		self.rootPath = Path(rootPath)
+		self.validate = validate
+		self._data : dict = None
+		self._dirty = False
+
+	def cataloguePath(self)->Path:
+		return self.rootPath / CATALOGUE_NAME
+
+	def _key(self, dirPath:Path)->str:
+		return Path(dirPath).relative_to(self.rootPath).as_posix()
+
+	def data(self)->dict:
+		if self._data is None:
+			self.load()
+		return self._data
+
+	def load(self):
+		"""read catalogue file, starting over if it's missing,
+		broken or from an old version"""
+		self._dirty = False
+		try:
+			data = orjson.loads(self.cataloguePath().read_bytes())
+		except (FileNotFoundError, orjson.JSONDecodeError):
+			data = None
+		if not isinstance(data, dict) or data.get("version") != CATALOGUE_VERSION:
+			data = _emptyData()
+		self._data = data
+
+	def save(self, force=False):
+		"""write catalogue if it changed since loading -
+		written to temp file first, so a reader never sees half a catalogue"""
+		if not (self._dirty or force) or self._data is None:
+			return
+		path = self.cataloguePath()
+		tempPath = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+		try:
+			tempPath.write_bytes(orjson.dumps(self._data))
+			os.replace(tempPath, path)
+		except OSError:
+			tempPath.unlink(missing_ok=True)
+			raise
+		self._dirty = False
+
+	def clear(self):
+		self._data = _emptyData()
+		self._dirty = True
+
+	def isDirty(self)->bool:
+		return self._dirty
+
+	#region folders
+	def _scanDir(self, dirPath:Path, mtime:float)->dict:
+		childDirs = []
+		isAsset = False
+		with os.scandir(dirPath) as it:
+			for entry in it:
+				if entry.is_dir():
+					childDirs.append(entry.name)
+				elif entry.name == ASSET_FILE_NAME:
+					isAsset = True
+		return {"mtime" : mtime, "isAsset" : isAsset, "dirs" : sorted(childDirs)}
+
+	def dirEntry(self, dirPath:Path)->(dict, None):
+		"""return cached entry for folder, rescanning it if the folder's
+		mtime has changed - None if folder doesn't exist"""
+		key = self._key(dirPath)
+		dirs = self.data()["dirs"]
+		entry = dirs.get(key)
+		if entry is not None and not self.validate:
+			return entry
+		mtime = _mtime(dirPath)
+		if mtime is None:
+			if entry is not None:
+				self._forget(key)
+			return None
+		if entry is not None and entry["mtime"] == mtime:
+			return entry
+		newEntry = self._scanDir(dirPath, mtime)
+		if entry is not None and newEntry == dict(entry, mtime=mtime):
+			# contents unchanged - saving the catalogue itself touches
+			# the show folder's mtime, don't rewrite the file just for that
+			entry["mtime"] = mtime
+			return entry
+		entry = newEntry
+		dirs[key] = entry
+		self._dirty = True
+		return entry
+
+	def _forget(self, key:str):
+		"""remove a folder and everything below it"""
+		prefix = key + "/"
+		for mapName in ("dirs", "assets"):
+			entries = self._data[mapName]
+			for k in [k for k in entries if k == key or k.startswith(prefix)]:
+				entries.pop(k)
+		self._dirty = True
+
+	def childDirs(self, dirPath:Path)->list[str]:
+		entry = self.dirEntry(dirPath)
+		return entry["dirs"] if entry else []
+
+	def isAssetDir(self, dirPath:Path)->bool:
+		entry = self.dirEntry(dirPath)
+		return bool(entry and entry["isAsset"])
+	#endregion
+
+	#region assets
+	def assetRecord(self, dirPath:Path)->(dict, None):
+		"""return {"mtime", "uid", "tags"} for asset in given folder,
+		rereading _asset.json if it changed"""
+		key = self._key(dirPath)
+		assets = self.data()["assets"]
+		record = assets.get(key)
+		if record is not None and not self.validate:
+			return record
+		dataPath = Path(dirPath) / ASSET_FILE_NAME
+		mtime = _mtime(dataPath)
+		if mtime is None:
+			if record is not None:
+				assets.pop(key)
+				self._dirty = True
+			return None
+		if record is not None and record["mtime"] == mtime:
+			return record
+		try:
+			data = orjson.loads(dataPath.read_bytes())
+		except orjson.JSONDecodeError:
+			log("invalid asset data, not cataloguing", dataPath)
+			return None
+		record = {"mtime" : mtime,
+		          "uid" : data.get("uid"),
+		          "tags" : data.get("tags", {})}
+		assets[key] = record
+		self._dirty = True
+		return record
+
+	def walkAssetDirs(self, dirPath:Path=None)->T.Iterator[Path]:
+		"""iterate over all asset folders below given folder -
+		folders starting with "_" are never entered, those are
+		asset internals like _work and _out"""
+		toIter = [Path(dirPath or self.rootPath)]
+		while toIter:
+			current = toIter.pop(0)
+			entry = self.dirEntry(current)
+			if entry is None: continue
+			if entry["isAsset"]:
+				yield current
+			toIter = [current / i for i in entry["dirs"]
+			          if not i.startswith("_")] + toIter
+	#endregion
@@ -14,6 +14,7 @@ from wplib.pathable import Pathable, DirPathable, RootDirPathable
 from wplib.sequence import toSeq, flatten
 
 from wp.constant import getAssetRoot, WP_ROOT
+from wp.pipe.asset.catalogue import ShowCatalogue
 
 
 """main asset object, to be integrated with chimaera
@@ -37,6 +38,41 @@ class Show(DirPathable):
 	 """
 	parent : AssetRoot
 
+	# if true, walk child folders through the show's catalogue file
+	# instead of globbing disk every time
+	useCatalogue = True
+
+	def __init__(self, name, parent:DirPathable):
+		super().__init__(name, parent)
+		self._catalogue = None
+
+	def catalogue(self)->(ShowCatalogue, None):
+		if not self.useCatalogue:
+			return None
+		if self._catalogue is None:
+			self._catalogue = ShowCatalogue(self.diskPath())
+		return self._catalogue
+
+	def saveCatalogue(self):
+		"""save catalogue if it changed - a read-only show folder
+		just means we carry on uncached"""
+		if self._catalogue is None:
+			return
+		try:
+			self._catalogue.save()
+		except OSError as e:
+			log("could not save show catalogue, continuing uncached",
+			    self._catalogue.cataloguePath(), e)
+
+	def syncCatalogue(self):
+		"""walk every asset folder in show, updating catalogue entries
+		and asset records, then save"""
+		catalogue = self.catalogue()
+		if catalogue is None: return
+		for assetDir in catalogue.walkAssetDirs():
+			catalogue.assetRecord(assetDir)
+		catalogue.save()
+
 	def configDict(self)->dict:
 		"""maybe there's a good way to automate this"""
 		return {"prefix" : self.prefix}
@@ -98,20 +134,12 @@ class Show(DirPathable):
 		AssetFolder objects
 		:param **kwargs:
 		"""
-		children = {}
-		for childDir in self.diskPath().glob("*"):
-			#print("childDir", childDir)
-			if not childDir.is_dir(): continue
-			child = self._buildChildPathable(
-				childDir, name=childDir.name)
-			if child is None: continue
-			children[childDir.name] = child
-		return children
+		return _buildAssetDirBranchMap(self)
 
 	def _buildChildPathable(self, obj:Path, name:keyT):
 		"""we pass a Path object as obj, check if that should be a full
 		Asset wrapper or not"""
-		if Asset.isAssetDir(obj):
+		if _isAssetDir(self, obj):
 			return Asset(name, parent=self)
 		elif obj.is_dir():
 			return StepDir(parent=self, name=name)
@@ -141,6 +169,7 @@ class Show(DirPathable):
 		result = []
 		for category in self.branchMap()["asset"].branches:
 			result.extend(i for i in category.branches if isinstance(i, Asset))
+		self.saveCatalogue()
 		return result
 
 
@@ -157,10 +186,13 @@ class StepDir(DirPathable):
 	 - LATER, find some way to integrate this with the "expected" subtree descriptors, basically a way to use python classes as schemas to set out consistent folder formats
 	"""
 
+	def _buildBranchMap(self, **kwargs) ->dict[keyT, Pathable]:
+		return _buildAssetDirBranchMap(self)
+
 	def _buildChildPathable(self, obj:Path, name:keyT):
 		"""we pass a Path object as obj, check if that should be a full
 		Asset wrapper or not"""
-		if Asset.isAssetDir(obj):
+		if _isAssetDir(self, obj):
 			return Asset(name, parent=self)
 		elif obj.is_dir():
 			return StepDir(parent=self, name=name)
@@ -222,20 +254,12 @@ class Asset(Pathable, Visitable):
 		AssetFolder objects
 		:param **kwargs:
 		"""
-		children = {}
-		for childDir in self.diskPath().glob("*"):
-			#log("childDir", childDir)
-			if not childDir.is_dir(): continue
-			child = self._buildChildPathable(
-				childDir, name=childDir.name)
-			if child is None: continue
-			children[childDir.name] = child
-		return children
+		return _buildAssetDirBranchMap(self)
 
 	def _buildChildPathable(self, obj:Path, name:keyT):
 		"""we pass a Path object as obj, check if that should be a full
 		Asset wrapper or not"""
-		if Asset.isAssetDir(obj):
+		if _isAssetDir(self, obj):
 			return Asset(name, parent=self) # no child dirs below asset
 		# elif obj.is_dir():
 		# 	return StepDir(parent=self, name=name)
@@ -285,6 +309,14 @@ class Asset(Pathable, Visitable):
 		self.smartFolder().assetData.write_text(orjson.dumps(data or self._data))
 
 	def tags(self)->dict:
+		"""read from show catalogue if we can, to avoid parsing
+		the full asset file"""
+		if self._data is None:
+			catalogue = _catalogueFor(self)
+			if catalogue is not None:
+				record = catalogue.assetRecord(self.diskPath())
+				if record is not None:
+					return record["tags"]
 		return self.data()["tags"]
 
 	@classmethod
@@ -340,6 +372,36 @@ class Asset(Pathable, Visitable):
 			result.extend(show.topAssets())
 		return result
 
+def _catalogueFor(pathable:Pathable)->(ShowCatalogue, None):
+	"""find catalogue of the show above the given asset pathable, if any"""
+	test = pathable
+	while test is not None and not isinstance(test, Show):
+		test = test.parent
+	return test.catalogue() if test is not None else None
+
+def _isAssetDir(pathable:Pathable, path:Path)->bool:
+	catalogue = _catalogueFor(pathable)
+	if catalogue is None:
+		return Asset.isAssetDir(path)
+	return catalogue.isAssetDir(path)
+
+def _buildAssetDirBranchMap(pathable:(Show, StepDir, Asset))->dict[keyT, Pathable]:
+	"""shared by shows, step dirs and assets - get child folders
+	from the show's catalogue if it has one, else glob the folder"""
+	catalogue = _catalogueFor(pathable)
+	if catalogue is None:
+		childDirs = [i for i in pathable.diskPath().glob("*") if i.is_dir()]
+	else:
+		diskPath = pathable.diskPath()
+		childDirs = [diskPath / i for i in catalogue.childDirs(diskPath)]
+	children = {}
+	for childDir in childDirs:
+		child = pathable._buildChildPathable(
+			childDir, name=childDir.name)
+		if child is None: continue
+		children[childDir.name] = child
+	return children
+
 def toAssetPath(path)->list[str]:
 	"""filter given path to start with a show token, strip
 	out any file stuff, etc
@@ -1,7 +1,8 @@
 
 from __future__ import annotations
 
-import shutil
+import shutil, threading
+from pathlib import Path
 import typing as T
 
 from whoosh.fields import *
@@ -24,7 +25,13 @@ SEARCH_DIR = WP_LOCAL_ROOT / "assetSearch"
 
 # build schema for searching assets
 assetSchema = Schema(
-	#uid=ID(stored=True),
+	# uid of asset if it defines one, else its string path -
+	# copied asset folders can share a uid, so not unique
+	uid=ID(stored=True),
+	# path to asset's _asset.json and its mtime at last sync -
+	# unique key for update_document
+	dataPath=ID(stored=True, unique=True),
+	mtime=STORED(),
 	#tags=KEYWORD(stored=True),
 	#path=ID(stored=True, unique=True, sortable=True)
 	path=KEYWORD(stored=True,
@@ -47,41 +54,123 @@ assetSchema = Schema(
 
 
 
-def getIndex()->Index:
-	# if SEARCH_DIR.exists():
-	# 	shutil.rmtree(SEARCH_DIR)
-	if not SEARCH_DIR.exists():
-		SEARCH_DIR.mkdir(parents=1, exist_ok=1)
-		indexModule.create_in(str(SEARCH_DIR), schema=assetSchema)
-		index = indexModule.open_dir(str(SEARCH_DIR))
-		# syncIndex(index)
-	index = indexModule.open_dir(str(SEARCH_DIR))
-	# sync index all the time now
-	# TODO: get this to run lazily on load or something
-	# syncIndex(index)
-	return index
+def _schemaKey(schema:Schema)->set[tuple[str, bool]]:
+	"""field names and which of them are unique -
+	changing the unique key needs a fresh index too"""
+	return {(name, bool(getattr(field, "unique", False)))
+	        for name, field in schema.items()}
 
-def syncIndex(index:Index):
-	"""iterate over every asset and put it here
-	for now we replace the original one
+def getIndex()->Index:
+	"""open the local asset index, creating it if missing -
+	if the schema on disk is out of date, wipe it and start again.
+	Does NOT sync the index with assets on disk, see ensureSynced()
 	"""
-	#log("syncIndex")
-	writer = index.writer()
+	if SEARCH_DIR.exists() and indexModule.exists_in(str(SEARCH_DIR)):
+		index = indexModule.open_dir(str(SEARCH_DIR))
+		if _schemaKey(index.schema) == _schemaKey(assetSchema):
+			return index
+		index.close()
+		shutil.rmtree(SEARCH_DIR)
+	SEARCH_DIR.mkdir(parents=1, exist_ok=1)
+	return indexModule.create_in(str(SEARCH_DIR), schema=assetSchema)
+
+def assetUid(asset:Asset)->str:
+	"""key for asset in index - not all assets define
+	a uid yet, fall back to string path"""
+	return asset.data().get("uid") or asset.strPath()
+
+def assetDataPath(asset:Asset)->Path:
+	return asset.diskPath() / "_asset.json"
+
+def indexedAssetData(index:Index)->dict[str, dict]:
+	"""return map of { dataPath : stored fields } for every asset
+	currently in index"""
+	with index.reader() as reader:
+		return {i["dataPath"] : i for i in reader.all_stored_fields()
+		        if "dataPath" in i}
+
+_syncLock = threading.Lock()
+def allAssets()->T.Iterator[Asset]:
+	"""every asset in every show"""
 	for top in Asset.topAssets():
 		for asset in top.allBranches(includeSelf=True):
-			#log("check asset", asset, isinstance(asset, Asset))
+			if isinstance(asset, Asset):
+				yield asset
+
+def syncIndex(index:Index, assets:T.Iterable[Asset]=None)->tuple[int, int]:
+	"""incrementally update index to match assets on disk -
+	assets whose _asset.json mtime matches the index are skipped without
+	reading their data, changed or new assets are updated in place by
+	data path, and entries for assets no longer on disk are removed.
+
+	only one sync may write at once, whoosh locks the index anyway
+
+	:param assets: assets to index, defaults to allAssets() -
+		anything indexed but not given here is removed
+	:return (number of assets updated, number removed)
+	"""
+	with _syncLock:
+		indexed = indexedAssetData(index)
+		toUpdate = []
+		found = set()
+		uidPaths = {}
+		for asset in (allAssets() if assets is None else assets):
+			dataPath = assetDataPath(asset)
+			try:
+				mtime = dataPath.stat().st_mtime
+			except FileNotFoundError: # deleted during sync
+				continue
+			key = str(dataPath)
+			found.add(key)
+			stored = indexed.get(key)
+			if stored is not None and stored.get("mtime") == mtime:
+				uid = stored["uid"]
+			else:
+				uid = assetUid(asset)
+				toUpdate.append(dict(
+					uid=uid, path=asset.path,
+					dataPath=key, mtime=mtime))
+			if uid in uidPaths:
+				log("duplicate asset uid, copied asset folder?", uid,
+				    uidPaths[uid], key)
+			uidPaths[uid] = key
+
+		toRemove = set(indexed) - found
+		if not (toUpdate or toRemove):
+			return 0, 0
+		writer = index.writer()
+		for key in toRemove:
+			writer.delete_by_term("dataPath", key)
+		for fields in toUpdate:
+			writer.update_document(**fields)
+		writer.commit()
+		return len(toUpdate), len(toRemove)
+
+_synced = False
+_syncedLock = threading.Lock()
+def ensureSynced(index:Index=None)->Index:
+	"""sync the index the first time it's needed in this session -
+	call syncIndex() directly to pick up changes after that.
+	A caller arriving while the background sync runs waits for it
+	rather than starting a second one"""
+	global _synced
+	index = index or getIndex()
+	if _synced:
+		return index
+	with _syncedLock:
+		if not _synced:
+			syncIndex(index)
+			_synced = True
+	return index
 
-			if not isinstance(asset, Asset): continue
-			writer.add_document(#path=asset.strPath()
-								path=asset.path
-			                    )
-	writer.commit(#mergeType=writing.CLEAR
-	              )
+def syncIndexInBackground()->threading.Thread:
+	"""run ensureSynced() on a daemon thread, so tools can start
+	syncing on startup without blocking on it"""
+	thread = threading.Thread(target=ensureSynced, name="assetSearchSync",
+	                          daemon=True)
+	thread.start()
+	return thread
 
-def _startIndex():
-	index = getIndex()
-	syncIndex(index)
-_startIndex()
 
 class VeryFuzzyTermPlugin(FuzzyTermPlugin):
 	"""remove the single-digit limit on how fuzzy a query can be"""
@@ -94,7 +183,7 @@ pathParser.add_plugin(FuzzyTermPlugin())
 
 def searchPaths(path="", limit=10)->list[str]:
 	"""todo: clean this, restructure this, everyone sing along"""
-	index = getIndex()
+	index = ensureSynced()
 	log("search", path, index.doc_count())
 	log("all", allPaths())
 	# qp = QueryParser("path", schema=assetSchema,
@@ -114,7 +203,7 @@ def searchPaths(path="", limit=10)->list[str]:
 		return [i["path"] for i in results]
 
 def allPaths()->list[str]:
-	index = getIndex()
+	index = ensureSynced()
 	reader = index.reader()
 
 	#with index.reader() as reader:
@@ -0,0 +1,109 @@
+
+from __future__ import annotations
+
+import os, tempfile
+
+import unittest
+from pathlib import Path
+
+import orjson
+
+from wp.pipe.asset.catalogue import ShowCatalogue, CATALOGUE_NAME, ASSET_FILE_NAME
+
+
+def makeAsset(dirPath:Path, uid:str, tags:dict=None):
+	dirPath.mkdir(parents=True, exist_ok=True)
+	(dirPath / ASSET_FILE_NAME).write_bytes(
+		orjson.dumps({"uid" : uid, "tags" : tags or {}}))
+
+def setMtime(path:Path, mtime:float):
+	os.utime(path, (mtime, mtime))
+
+
+class TestShowCatalogue(unittest.TestCase):
+
+	def setUp(self):
+		self.tempDir = tempfile.TemporaryDirectory()
+		self.root = Path(self.tempDir.name)
+		makeAsset(self.root / "asset" / "char" / "cait", "uidCait")
+		makeAsset(self.root / "asset" / "char" / "ben", "uidBen")
+		# asset internals should never be walked
+		makeAsset(self.root / "asset" / "char" / "ben" / "_work" / "old", "uidOld")
+
+	def tearDown(self):
+		self.tempDir.cleanup()
+
+	def test_walkAndReload(self):
+		catalogue = ShowCatalogue(self.root)
+		assetDirs = list(catalogue.walkAssetDirs())
+		self.assertEqual({i.name for i in assetDirs}, {"cait", "ben"})
+		for i in assetDirs:
+			catalogue.assetRecord(i)
+		self.assertTrue(catalogue.isDirty())
+		catalogue.save()
+		self.assertFalse(catalogue.isDirty())
+		self.assertTrue((self.root / CATALOGUE_NAME).is_file())
+		self.assertEqual([i.name for i in self.root.iterdir() if i.name.endswith(".tmp")], [])
+
+		# reloaded catalogue is valid straight away, nothing to rescan
+		reloaded = ShowCatalogue(self.root)
+		self.assertEqual({i.name for i in reloaded.walkAssetDirs()}, {"cait", "ben"})
+		self.assertEqual(reloaded.assetRecord(self.root / "asset" / "char" / "cait")["uid"],
+		                 "uidCait")
+		self.assertFalse(reloaded.isDirty())
+
+	def test_dirHitAndMiss(self):
+		charDir = self.root / "asset" / "char"
+		setMtime(charDir, 1000.0)
+		catalogue = ShowCatalogue(self.root)
+		self.assertEqual(catalogue.childDirs(charDir), ["ben", "cait"])
+
+		# new folder, but mtime put back - entry trusted, so it's a hit
+		makeAsset(charDir / "zed", "uidZed")
+		setMtime(charDir, 1000.0)
+		self.assertEqual(catalogue.childDirs(charDir), ["ben", "cait"])
+
+		# mtime changed - rescanned
+		setMtime(charDir, 2000.0)
+		self.assertEqual(catalogue.childDirs(charDir), ["ben", "cait", "zed"])
+		self.assertTrue(catalogue.isAssetDir(charDir / "zed"))
+
+		# without validation nothing is stat-ed, cached entry wins
+		catalogue.save()
+		setMtime(charDir, 3000.0)
+		(charDir / "zed" / ASSET_FILE_NAME).unlink()
+		(charDir / "zed").rmdir()
+		trusting = ShowCatalogue(self.root, validate=False)
+		self.assertEqual(trusting.childDirs(charDir), ["ben", "cait", "zed"])
+
+		# with validation, removed folder is forgotten along with its assets
+		catalogue = ShowCatalogue(self.root)
+		self.assertEqual(catalogue.childDirs(charDir), ["ben", "cait"])
+		self.assertIsNone(catalogue.dirEntry(charDir / "zed"))
+		self.assertNotIn("asset/char/zed", catalogue.data()["assets"])
+
+	def test_assetRecordInvalidation(self):
+		assetDir = self.root / "asset" / "char" / "cait"
+		catalogue = ShowCatalogue(self.root)
+		setMtime(assetDir / ASSET_FILE_NAME, 1000.0)
+		self.assertEqual(catalogue.assetRecord(assetDir)["tags"], {})
+
+		makeAsset(assetDir, "uidCait", {"part" : "body"})
+		setMtime(assetDir / ASSET_FILE_NAME, 2000.0)
+		self.assertEqual(catalogue.assetRecord(assetDir)["tags"], {"part" : "body"})
+
+		(assetDir / ASSET_FILE_NAME).unlink()
+		self.assertIsNone(catalogue.assetRecord(assetDir))
+		self.assertNotIn("asset/char/cait", catalogue.data()["assets"])
+
+	def test_corruptCatalogue(self):
+		for contents in (b"{\"version\" : 1, \"dirs\" : {", b"[1, 2]",
+		                 orjson.dumps({"version" : -1, "dirs" : {}, "assets" : {}})):
+			(self.root / CATALOGUE_NAME).write_bytes(contents)
+			catalogue = ShowCatalogue(self.root)
+			self.assertEqual(catalogue.data()["dirs"], {})
+			self.assertEqual({i.name for i in catalogue.walkAssetDirs()}, {"cait", "ben"})
+			catalogue.save()
+			self.assertEqual(orjson.loads((self.root / CATALOGUE_NAME).read_bytes())["version"],
+			                 catalogue.data()["version"])
+
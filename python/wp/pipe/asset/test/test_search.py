@@ -0,0 +1,125 @@
+
+from __future__ import annotations
+
+import os, tempfile, threading
+
+import unittest
+from pathlib import Path
+
+import orjson
+from whoosh import index as indexModule
+
+from wp.pipe.asset import search
+from wp.pipe.asset.search import assetSchema, syncIndex, indexedAssetData
+
+
+class DiskAsset(object):
+	"""stands in for Asset over a plain folder, counting
+	how often its data is read"""
+
+	def __init__(self, dirPath:Path, uid:str=None):
+		self.dirPath = dirPath
+		self.path = list(dirPath.parts[-2:])
+		self.nReads = 0
+		dirPath.mkdir(parents=True, exist_ok=True)
+		self.write({"uid" : uid} if uid else {})
+
+	def write(self, data:dict, mtime:float=None):
+		dataPath = self.dirPath / "_asset.json"
+		dataPath.write_bytes(orjson.dumps(data))
+		if mtime is not None:
+			os.utime(dataPath, (mtime, mtime))
+
+	def data(self)->dict:
+		self.nReads += 1
+		return orjson.loads((self.dirPath / "_asset.json").read_bytes())
+
+	def diskPath(self)->Path:
+		return self.dirPath
+
+	def strPath(self)->str:
+		return "/".join(self.path)
+
+
+class TestSyncIndex(unittest.TestCase):
+
+	def setUp(self):
+		self.tempDir = tempfile.TemporaryDirectory()
+		root = Path(self.tempDir.name)
+		(root / "index").mkdir()
+		self.index = indexModule.create_in(str(root / "index"), schema=assetSchema)
+		self.cait = DiskAsset(root / "char" / "cait", "uidCait")
+		self.ben = DiskAsset(root / "char" / "ben")
+		self.assets = [self.cait, self.ben]
+
+	def tearDown(self):
+		self.index.close()
+		self.tempDir.cleanup()
+
+	def indexed(self)->dict[str, dict]:
+		return {"/".join(i["path"]) : i for i in indexedAssetData(self.index).values()}
+
+	def test_unchangedSkipped(self):
+		self.assertEqual(syncIndex(self.index, self.assets), (2, 0))
+		self.assertEqual(self.indexed()["char/cait"]["uid"], "uidCait")
+		# no uid, falls back to string path
+		self.assertEqual(self.indexed()["char/ben"]["uid"], "char/ben")
+
+		reads = [i.nReads for i in self.assets]
+		self.assertEqual(syncIndex(self.index, self.assets), (0, 0))
+		self.assertEqual([i.nReads for i in self.assets], reads)
+
+	def test_changedReindexed(self):
+		self.ben.write({}, mtime=1000.0)
+		syncIndex(self.index, self.assets)
+		self.ben.write({"uid" : "uidBen"}, mtime=2000.0)
+		self.assertEqual(syncIndex(self.index, self.assets), (1, 0))
+		self.assertEqual(self.ben.nReads, 2)
+		self.assertEqual(self.indexed()["char/ben"]["uid"], "uidBen")
+		self.assertEqual(self.indexed()["char/ben"]["mtime"], 2000.0)
+		self.assertEqual(self.index.doc_count(), 2)
+
+	def test_deletedRemoved(self):
+		syncIndex(self.index, self.assets)
+		self.assertEqual(syncIndex(self.index, [self.cait]), (0, 1))
+		self.assertEqual(set(self.indexed()), {"char/cait"})
+
+		# asset folder gone from disk while still listed
+		(self.cait.dirPath / "_asset.json").unlink()
+		self.assertEqual(syncIndex(self.index, self.assets), (1, 1))
+		self.assertEqual(set(self.indexed()), {"char/ben"})
+
+	def test_sharedUid(self):
+		"""copying an asset folder copies its uid -
+		both copies stay in the index"""
+		copy = DiskAsset(self.cait.dirPath.parent / "caitCopy", "uidCait")
+		self.assertEqual(syncIndex(self.index, self.assets + [copy]), (3, 0))
+		self.assertEqual(set(self.indexed()), {"char/cait", "char/caitCopy", "char/ben"})
+		self.assertEqual(syncIndex(self.index, self.assets), (0, 1))
+		self.assertEqual(set(self.indexed()), {"char/cait", "char/ben"})
+
+	def test_ensureSyncedOnce(self):
+		"""concurrent first calls only sync once"""
+		calls = []
+		started = threading.Event()
+		release = threading.Event()
+		def slowSync(index, assets=None):
+			calls.append(index)
+			started.set()
+			release.wait(5)
+			return 0, 0
+		oldSync, oldSynced = search.syncIndex, search._synced
+		search.syncIndex, search._synced = slowSync, False
+		try:
+			first = threading.Thread(target=search.ensureSynced, args=(self.index,))
+			first.start()
+			started.wait(5)
+			second = threading.Thread(target=search.ensureSynced, args=(self.index,))
+			second.start()
+			release.set()
+			first.join(5)
+			second.join(5)
+		finally:
+			search.syncIndex, search._synced = oldSync, oldSynced
+		self.assertEqual(len(calls), 1)
+
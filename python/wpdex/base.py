@@ -21,6 +21,7 @@ from wplib.object.visitor import VisitAdaptor, Visitable, CHILD_LIST_T, DeepVisi
 from wplib.object.proxy import Proxy, FlattenProxyOp
 from wplib.pathable import Pathable, PathAdaptor
 from wplib.delta import DeltaAtom, DeltaAid, SetValueDelta
+from wplib.time import profileScope
 
 if T.TYPE_CHECKING:
 	from .proxy import WpDexProxy
@@ -359,7 +360,8 @@ class WpDex(Adaptor,  # integrate with type adaptor system
 		#self._restoreChildDatasFromRoot()
 
 	def updateBranchMap(self, **kwargs):
-		self._branchMap = self._buildBranchMap(**kwargs)
+		with profileScope("wpdex.buildBranchMap"):
+			self._branchMap = self._buildBranchMap(**kwargs)
 
 	def __repr__(self):
 		if self.obj is self:
@@ -385,21 +387,18 @@ class WpDex(Adaptor,  # integrate with type adaptor system
 			return [self.parent]
 		return []
 
-	def _handleEvent(self, event:dict, key:str= "main"):
+	def _eventRoutePaths(self, route:tuple[WpDex, ...])->tuple[tuple]:
 		"""test a more flexible way of identifying by paths -
-		as an event propagates from its source dex, it prepends its
-		own key to the event path
-
-		that way it even works for a diamond shape, without worrying
-		about unique vs alias paths, I think it's cool"""
-		#log("handleEvent", self)
-		#log(event)
-		if "path" in event:
-			event["path"].insert(0, self.name)
-		else:
-			event["path"] = []
-		return super()._handleEvent(event, key)
-			
+		each dex in route gets the path from itself down to
+		the event's source dex, built once per route"""
+		paths = []
+		path = ()
+		for i, dex in enumerate(route):
+			if i:
+				path = (route[i - 1].name, ) + path
+			paths.append(path)
+		return tuple(paths)
+
 	def staticCopy(self)->WpDex:
 		"""return a fully separate hierarchy, wrapped in a separate
 		network of WpDex objects"""
@@ -572,6 +571,17 @@ class WpDex(Adaptor,  # integrate with type adaptor system
 	def _getOverrideAncestors(self, forKey="") ->T.Iterable[OverrideProvider]:
 		return (self.parent, )
 
+	def _setParent(self, parent:WpDex):
+		"""overrides resolved through old parent are stale"""
+		super()._setParent(parent)
+		self.invalidateOverrideCache()
+		self.invalidateEventRoutes()
+
+	def setName(self, name:Pathable.keyT):
+		"""event paths are built from names"""
+		super().setName(name)
+		self.invalidateEventRoutes()
+
 	def controllerTies(self)->list[tuple[WpDexController, WpDex]]:
 		"""return a list of (WpDexController, WpDex with that controller set)
 		for now only one controller can be set on a wpDex at once
@@ -83,6 +83,9 @@ class WpDexProxy(Proxy, metaclass=WpDexProxyMeta):
 	_classProxyCache : dict[type, dict[type, type]] = defaultdict(dict) # { class : { class cache } }
 
 	_proxyAttrs = {"_reactData" : {}}
+	# results of these never need wrapping, and never mutate -
+	# __getitem__, keys() etc still go through hooks to return child proxies
+	_proxyPassthroughMethods = frozenset(("__len__", "__bool__"))
 	_generated = False
 	_objIdProxyCache : dict[int, WpDexProxy] = {}
 
@@ -22,6 +22,25 @@ class TestWPDex(unittest.TestCase):
 		obj = WpDex(testDict)
 		self.assertIsInstance(obj, DictDex)
 
+	def test_eventRoute(self):
+		"""events carry the path from each handler down to their
+		source, and routes are only rebuilt when hierarchy changes"""
+		root = WpDex({"a" : {"b" : [1, 2]}})
+		a = root.branchMap()["a"]
+		leaf = a.branchMap()["b"].branchMap()[0]
+		received = []
+		root.getEventSignal("main").connect(lambda e : received.append(("root", e["path"])))
+		a.getEventSignal("main").connect(lambda e : received.append(("a", e["path"])))
+
+		leaf.sendEvent({"type" : "test"})
+		self.assertEqual(received, [("a", ("b", 0)), ("root", ("a", "b", 0))])
+
+		route = leaf._eventRoute({}, "main")[0]
+		self.assertEqual(route, (leaf, leaf.parent, a, root))
+		self.assertIs(leaf._eventRoute({}, "main")[0], route)
+		leaf._setParent(a)
+		self.assertEqual(leaf._eventRoute({}, "main")[0], (leaf, a, root))
+
 	def test_dictDex(self):
 
 		obj = {"a" : 1, "b" : 2}
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import os
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide2 import QtWidgets
+
+from wpdex import WpDexProxy
+from wpdex.ui.atomic import AtomicStandardItemModel
+import wpdex.ui # register dict / seq models
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+class TestModelReconcile(unittest.TestCase):
+	"""models should only touch rows that changed"""
+
+	def _model(self, proxy:WpDexProxy)->AtomicStandardItemModel:
+		return AtomicStandardItemModel.adaptorForObject(proxy.dex())(value=proxy.dex())
+
+	def _valueItems(self, model):
+		return [model.item(row, model.columnCount() - 1) for row in range(model.rowCount())]
+
+	def test_rebuildKeepsItems(self):
+		p = WpDexProxy({"a" : 1, "b" : {"c" : 2}, "l" : [1, 2, 3]})
+		model = self._model(p)
+		items = self._valueItems(model)
+		childModels = model.childModels()
+		model.build()
+		self.assertEqual(self._valueItems(model), items)
+		self.assertEqual(model.childModels(), childModels)
+
+	def test_addRemove(self):
+		p = WpDexProxy({"a" : 1, "b" : {"c" : 2}, "l" : [1, 2, 3]})
+		model = self._model(p)
+		items = self._valueItems(model)
+		childModels = model.childModels()
+
+		p["d"] = 5
+		p.dex().updateChildren()
+		model.build()
+		self.assertEqual(model._rowKeys, ["a", "b", "l", "d"])
+		self.assertEqual(self._valueItems(model)[:3], items)
+
+		del p["a"]
+		p.dex().updateChildren()
+		model.build()
+		self.assertEqual(model._rowKeys, ["b", "l", "d"])
+		self.assertEqual(self._valueItems(model)[:2], items[1:])
+		# nested models kept, and point at current dexes
+		self.assertEqual(model.childModels(), childModels)
+		for i in model.childModels():
+			self.assertIs(i.dex(), p.dex().branchMap()[i.dex().name])
+
+	def test_changedValueReplacesRow(self):
+		p = WpDexProxy({"a" : 1, "b" : 2})
+		model = self._model(p)
+		items = self._valueItems(model)
+		p["a"] = 3
+		p.dex().updateChildren()
+		model.build()
+		newItems = self._valueItems(model)
+		self.assertIsNot(newItems[0], items[0])
+		self.assertIs(newItems[1], items[1])
+		self.assertEqual(newItems[0].dex().obj, 3)
+
+	def test_nestedSeq(self):
+		p = WpDexProxy({"l" : [1, 2, 3]})
+		model = self._model(p)
+		seqModel, = model.childModels()
+		p["l"].append(4)
+		p.dex().updateChildren(recursive=True)
+		model.build()
+		self.assertEqual(model.childModels(), [seqModel])
+		self.assertEqual(seqModel._rowKeys, [0, 1, 2, 3])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -146,6 +146,16 @@ class AtomicUiInterface(
 	def dex(self) -> WpDex:
 		return EVAL(self._dex)
 
+	def _rebindDex(self, dex:WpDex):
+		"""point at a new dex for the same underlying object,
+		without committing any value - dexes are rebuilt around
+		unchanged data whenever their parent changes"""
+		if self.dex() is dex:
+			return
+		self._dex = dex
+		self._proxy = dex.getValueProxy()
+		self._value = dex.ref()
+
 	def setValue(self, value:(WpDex, WpDexProxy, WX, T.Any)):
 		"""
 		TODO: should distinguish between setting the literal value pointed at,
@@ -520,6 +530,8 @@ class AtomicStandardItemModel(
 
 	def __init__(self, value, parent=None):
 		QtGui.QStandardItemModel.__init__(self, parent)
+		# key of each top-level row, in order
+		self._rowKeys : list[WpDex.pathT] = []
 		AtomicUiInterface.__init__(
 			self, value=value)
 
@@ -544,10 +556,8 @@ class AtomicStandardItemModel(
 	def _onDataChanged(self, *args, **kwargs):
 		"""
 		- block signals before and after to stop infinites
-		- clear out items and models
-		- rebuild
-		- signal view SOMEHOW to redraw widgets - either custom signal or something like
-			rowsReset, rowsAboutToBeReset etc
+		- reconcile items and models against current dex branches
+		- signal view to match up widgets with modelsChanged
 
 		TODO: if we edit multiple items, only fire this once somehow
 		"""
@@ -577,6 +587,16 @@ class AtomicStandardItemModel(
 		self._buildChildModels()
 		self.blockSignals(False)
 		self.modelsChanged.emit(self)
+	def _rowDexes(self)->list[tuple[WpDex.pathT, tuple[WpDex, ...]]]:
+		""" OVERRIDE
+		return (key, (dex for each column)) for each row
+		this model should show, in order"""
+		return [(k, (dex, )) for k, dex in self.dex().branchMap().items()]
+
+	def _newRowItems(self, dexes:tuple[WpDex, ...])->list[AtomStandardItem]:
+		return [AtomStandardItem.adaptorForObject(dex)(value=dex)
+		        for dex in dexes]
+
 	def _buildItems(self):
 		""" OVERRIDE
 		create standardItems for each branch of
@@ -588,26 +608,74 @@ class AtomicStandardItemModel(
 		construct and match up child view widgets for
 		each entry that needs them?
 		that might actually be the least complicated
+
+		rows are matched to dex branches by key - rows whose dexes
+		are unchanged are kept, only rows that actually changed
+		are inserted, removed or moved
 		"""
-		self.clear()
-		for k, dex in self.dex().branchMap().items():
-			itemType = AtomStandardItem.adaptorForObject(dex)
-			item = itemType(value=dex)
-			self.appendRow([item])
+		root = self.invisibleRootItem()
+		if root.rowCount() != len(self._rowKeys): # rows changed outside of this
+			self.clear()
+			self._rowKeys = []
+		newRows = self._rowDexes()
+		newRowMap = dict(newRows)
+
+		# keep rows showing the same objects in every column
+		kept = set()
+		for row, key in enumerate(self._rowKeys):
+			dexes = newRowMap.get(key)
+			if dexes is None or len(dexes) != root.columnCount():
+				continue
+			items = [root.child(row, col) for col in range(len(dexes))]
+			if not all(isinstance(item, AtomStandardItem) and item.dex().obj is dex.obj
+			           for item, dex in zip(items, dexes)):
+				continue
+			kept.add(key)
+			for item, dex in zip(items, dexes):
+				item._rebindDex(dex)
 
+		for row in reversed(range(len(self._rowKeys))):
+			if self._rowKeys[row] not in kept:
+				self.removeRow(row)
+		rowKeys = [i for i in self._rowKeys if i in kept]
+
+		for row, (key, dexes) in enumerate(newRows):
+			if row < len(rowKeys) and rowKeys[row] == key:
+				continue
+			if key in kept: # move existing row up to here
+				oldRow = rowKeys.index(key, row)
+				items = self.takeRow(oldRow)
+				rowKeys.pop(oldRow)
+			else:
+				items = self._newRowItems(dexes)
+			self.insertRow(row, items)
+			rowKeys.insert(row, key)
+		self._rowKeys = rowKeys
 
 	def _buildChildModels(self):
-		for i in self.children():
-			if isinstance(i, AtomicStandardItemModel):
-				i.deleteLater()
-				i.setParent(None)
+		"""child models for container items - models for objects
+		still shown are kept and rebuilt in place, others removed"""
+		oldModels = {id(i.dex().obj) : i for i in self.childModels()}
 		for item in libmodel.iterAllItems(model=self):
 			if not isinstance(item, AtomStandardItem):
 				continue
 			modelType = AtomicStandardItemModel.adaptorForObject(item.dex())
-			if modelType: # add a child model and build it (maybe build should be done in init)
-				newModel = modelType(value=item.dex(),
-				                     parent=self)
+			if not modelType:
+				continue
+			model = oldModels.pop(id(item.dex().obj), None)
+			if type(model) is modelType:
+				model._rebindDex(item.dex())
+				model.build()
+				continue
+			if model is not None:
+				model.deleteLater()
+				model.setParent(None)
+			# add a child model and build it (maybe build should be done in init)
+			newModel = modelType(value=item.dex(),
+			                     parent=self)
+		for i in oldModels.values():
+			i.deleteLater()
+			i.setParent(None)
 
 	def _modelIndexForKey(self, key:WpDex.pathT)->QtCore.QModelIndex:
 		key = WpDex.toPath(key)
@@ -764,38 +832,42 @@ class AtomicView(QtWidgets.QTreeView,
 		self.setUniformRowHeights(False)
 
 	def _onModelsChanged(self, *args, **kwargs):
-		"""easiest solution here is to just rip out all
-		the models under item, rebuild them
-		and rebuild child widgets afterwards"""
+		"""models reconcile their own items, match up
+		child widgets afterwards"""
 		self.buildChildWidgets()
 
 	def dex(self):
 		return self.model().dex()
 
 	def buildChildWidgets(self):
-
-		for i in self.children():
-			if isinstance(i, (AtomicView, AtomicWindow)):
-				i.close()
-				i.deleteLater()
-				#i.setParent(None)
-
-
-		# set up index widgets on container dex items
+		"""set up index widgets on container dex items -
+		widgets still showing the right model are kept, only
+		new container rows get new widgets"""
 		pathItemMap = self.model().pathItemMap()
 		pathModelMap = self.model().pathModelMap()
 		#log("path item map", pathItemMap)
 		#log("pathModelMap", pathModelMap)
+		keep = set()
 		for path, model in pathModelMap.items():
 			item = pathItemMap[path]
-			widget = AtomicWindow.adaptorForObject(item.dex())(
-				value=item.dex(), parent=self,
-				model=model)
-			self.setIndexWidget(item.index(), widget)
-			self._childAtomics[path] = widget
+			widget = self.indexWidget(item.index())
+			if not (isinstance(widget, AtomicWindow) and widget.view.model() is model):
+				widget = AtomicWindow.adaptorForObject(item.dex())(
+					value=item.dex(), parent=self,
+					model=model)
+				self.setIndexWidget(item.index(), widget)
+			keep.add(widget)
+		self._childAtomics = WeakValueDictionary(
+			{path : self.indexWidget(pathItemMap[path].index()) for path in pathModelMap})
+
+		for i in self.findChildren(AtomicWindow):
+			if i not in keep and i.atomicViewParent() is self:
+				i.close()
+				i.deleteLater()
 
-		self.setItemDelegate(  # use single type, manage dispatching from inside it
-			AtomStyledItemDelegate(parent=self))
+		if not isinstance(self.itemDelegate(), AtomStyledItemDelegate):
+			self.setItemDelegate(  # use single type, manage dispatching from inside it
+				AtomStyledItemDelegate(parent=self))
 
 		for item in libmodel.iterAllItems(model=self.model()):
 			self.setExpanded(item.index(), True)
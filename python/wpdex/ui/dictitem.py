@@ -11,20 +11,17 @@ from wpdex.ui.atomic import AtomicWidgetOld, AtomicView, AtomicStandardItemModel
 
 class DictDexModel(AtomicStandardItemModel):
 	forTypes = (DictDex, )
-	def _buildItems(self):
-		self.clear()
+	def _rowDexes(self):
+		"""one row per (key, value) pair"""
 		items = tuple(self.dex().branchMap().items())
 		keyTies = [i for i in items if "key:" in str(i[0])]
 		valueTies = [i for i in items if "key:" not in str(i[0])]
-		for i, ((keyKey, keyDex),
-		     (valueKey, valueDex)) in enumerate(zip(keyTies, valueTies)):
-			keyItemType = AtomStandardItem.adaptorForObject(keyDex)
-			assert keyItemType
-			valueItemType = AtomStandardItem.adaptorForObject(valueDex)
-			assert valueItemType
-			keyItem = keyItemType(value=keyDex)
-			valueItem = valueItemType(value=valueDex)
-			self.appendRow([keyItem, valueItem])
+		rows = []
+		for (keyKey, keyDex), (valueKey, valueDex) in zip(keyTies, valueTies):
+			assert AtomStandardItem.adaptorForObject(keyDex)
+			assert AtomStandardItem.adaptorForObject(valueDex)
+			rows.append((valueKey, (keyDex, valueDex)))
+		return rows
 
 
 class DictDexView(AtomicView
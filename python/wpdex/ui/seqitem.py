@@ -18,13 +18,6 @@ class SeqDexItem(AtomStandardItem):
 class SeqDexModel(AtomicStandardItemModel):
 	forTypes = (SeqDex, )
 
-	def _buildItems(self):
-		self.clear()
-		for k, dex in self.dex().branchMap().items():
-			itemType = AtomStandardItem.adaptorForObject(dex)
-			item = itemType(value=dex)
-			self.appendRow([item])
-
 #class SeqDexView(AtomicWidget, QtWidgets.QTreeView):
 class SeqDexView(AtomicView
                  ):
@@ -54,6 +54,16 @@ class Wreactive_ops(reactive_ops):
 		# 	reactive_ops.value.fset(self, new)
 		# 	wx.WRITE(resolve_value(new))
 		# 	return
+		# derived refs into a dex can't be set directly -
+		# write back through the dex path, root updates from there
+		if (isinstance(self._reactive, WX)
+				and "_dexPath" in self._reactive._kwargs
+				and self._reactive._root is not self._reactive):
+			# writing the dex its own value back would swap it for a copy
+			if new is self._reactive.RESOLVE(dex=True).obj:
+				return
+			self._reactive.WRITE(resolve_value(value=new))
+			return
 		reactive_ops.value.fset(self, new)
 		if isinstance(self._reactive, WX):
 			resolved = resolve_value(value=new)
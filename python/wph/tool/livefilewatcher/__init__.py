@@ -65,11 +65,12 @@ def makeNewWatcher(node:hou.Node, kwargs:dict):
 			#print("pressed button")
 			pressed.add(parm)
 
+	# changes are debounced - one batch per save, not one per raw event
 	watcher = ThreadedFileWatcher(paths)
-	def fileEvent(event):
-		#print(f"file event {event}")
+	def fileChanges(changes):
+		#print(f"file changes {changes}")
 		pressButtons()
-	watcher.setFileEventCallback(fileEvent)
+	watcher.setBatchCallback(fileChanges)
 
 	nodeWatcherMap[node] = watcher
 	#print("final node map", nodeWatcherMap)
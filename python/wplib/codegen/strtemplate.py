@@ -2,10 +2,15 @@
 from __future__ import annotations
 import typing as T
 import string, textwrap
+from contextlib import contextmanager
 
 """
 TODO: maybe refactor to make ArgT, ArgsKwargsT, TypeT, etc. into classes
 
+templates render() into a shared CodeWriter, which tracks indentation
+as it goes - nested blocks are written once at their final depth,
+rather than each level re-indenting all the text of its children.
+finalString() just renders into a fresh writer.
 
 """
 
@@ -43,6 +48,84 @@ def formatLines(thing:T.Any)->str:
 		return "\n".join(map(formatLines, thing))
 	return str(thing)
 
+class CodeWriter:
+	"""buffer of output text, indenting lines as they're written.
+	matches textwrap.indent() - lines with only whitespace
+	are left alone"""
+
+	def __init__(self, indentStr="\t"):
+		self.indentStr = indentStr
+		self.depth = 0
+		self._parts : list[str] = []
+		self._pending = "" # leading whitespace of current line
+		self._lineStarted = False # current line has content
+
+	@contextmanager
+	def indented(self, n=1):
+		self.depth += n
+		try:
+			yield self
+		finally:
+			self.depth -= n
+
+	def write(self, text:str):
+		"""write text, may contain newlines"""
+		lines = str(text).split("\n")
+		self._writeInLine(lines[0])
+		for line in lines[1:]:
+			self._parts.append(self._pending + "\n")
+			self._pending = ""
+			self._lineStarted = False
+			self._writeInLine(line)
+
+	def tell(self)->tuple:
+		"""position in output - changes if anything is written"""
+		return len(self._parts), self._pending
+
+	def _writeInLine(self, text:str):
+		if not text:
+			return
+		if self._lineStarted:
+			self._parts.append(text)
+			return
+		if not text.strip(): # don't know yet if line is blank
+			self._pending += text
+			return
+		self._parts.append(self.indentStr * self.depth + self._pending + text)
+		self._pending = ""
+		self._lineStarted = True
+
+	def getvalue(self)->str:
+		return "".join(self._parts) + self._pending
+
+
+def writeValue(writer:CodeWriter, thing:T.Any):
+	"""render templates in place, write anything else as a string"""
+	if isinstance(thing, StringCodeTemplate):
+		thing.render(writer)
+	else:
+		writer.write(str(thing))
+
+def writeLines(writer:CodeWriter, thing:T.Any):
+	"""write thing as formatLines() would"""
+	if isinstance(thing, (list, tuple)):
+		for i, item in enumerate(thing):
+			if i:
+				writer.write("\n")
+			writeLines(writer, item)
+		return
+	writeValue(writer, thing)
+
+def renderTemplates(templates:T.Iterable[StringCodeTemplate], sep="\n")->str:
+	"""render several templates into one string, joined by sep"""
+	writer = CodeWriter()
+	for i, template in enumerate(templates):
+		if i:
+			writer.write(sep)
+		writeValue(writer, template)
+	return writer.getvalue()
+
+
 class StringCodeTemplate:
 
 	def __init__(self,
@@ -52,14 +135,22 @@ class StringCodeTemplate:
 
 	def _resultString(self)->str:
 		""" OVERRIDE
-		return the result string"""
+		return the result string - simple templates can just
+		define this, anything with nested blocks should
+		override render() instead"""
 		raise NotImplementedError
 
+	def render(self, writer:CodeWriter):
+		""" OVERRIDE
+		write this template into writer, at writer's current indent"""
+		writer.write(self._resultString())
+
 	def finalString(self)->str:
 		"""return the final string indented"""
 		#self.updateChildDepths()
-		#return textwrap.indent(self._resultString(), "\t" * (self.indentDepth or 0))
-		return self._resultString()
+		writer = CodeWriter()
+		self.render(writer)
+		return writer.getvalue()
 
 	def updateChildDepths(self):
 		"""update the depths of child templates"""
@@ -122,13 +213,18 @@ class IfBlock(StringCodeTemplate):
 		self.conditionBlocks=conditionBlocks
 		self.elseBlock = elseBlock
 
-	def _resultString(self):
-		conditionStrs = [
-			f"if {str(cond)}:\n" + textwrap.indent(
-				formatLines(block), "\t") for cond, block in self.conditionBlocks]
+	def render(self, writer:CodeWriter):
+		for i, (cond, block) in enumerate(self.conditionBlocks):
+			if i:
+				writer.write("\n")
+			writer.write(f"if {str(cond)}:\n")
+			with writer.indented():
+				writeLines(writer, block)
 		if self.elseBlock:
-			conditionStrs.append(f"else:\n{str(self.elseBlock[1])}")
-		return "\n".join(conditionStrs)
+			if self.conditionBlocks:
+				writer.write("\n")
+			writer.write("else:\n")
+			writeValue(writer, self.elseBlock[1])
 
 	# def updateChildDepths(self):
 	# 	print("update depths", self.conditionBlocks, self.elseBlock)
@@ -198,10 +294,11 @@ class Assign(StringCodeTemplate):
 		self.left = left
 		self.right = right
 
-	def _resultString(self):
+	def render(self, writer:CodeWriter):
+		writer.write(formatArg(self.left, space=True))
 		if self.right:
-			return f"{formatArg(self.left, space=True)} = {str(self.right)}"
-		return f"{formatArg(self.left, space=True)}"
+			writer.write(" = ")
+			writeValue(writer, self.right)
 
 	def childTemplates(self) ->T.Iterable[StringCodeTemplate]:
 		#return [self.right]
@@ -263,12 +360,12 @@ class FunctionTemplate(StringCodeTemplate):
 		kwargStrs = [f"{formatArg(k)}={v}" for k, v in self.fnKwargs.items()]
 		return " ,\n\t".join([formatArg(arg) for arg in self.fnArgs] + kwargStrs)
 
-	def _resultString(self):
-		baseStr = ""
+	def render(self, writer:CodeWriter):
 		if self.fnDecorator:
-			baseStr += f"@{self.fnDecorator}\n"
-		baseStr += f"""def {self.fnName}({self.formatArgs()})->{self.returnType}:\n""" + indent(self.fnBody)
-		return baseStr
+			writer.write(f"@{self.fnDecorator}\n")
+		writer.write(f"""def {self.fnName}({self.formatArgs()})->{self.returnType}:\n""")
+		with writer.indented():
+			writeValue(writer, self.fnBody)
 
 	def childTemplates(self):
 		return [self.fnBody]
@@ -301,23 +398,25 @@ class ClassTemplate(StringCodeTemplate):
 		"""format the base classes"""
 		return ", ".join(self.classBaseClasses)
 
-	def _resultString(self):
+	def render(self, writer:CodeWriter):
 		if self.classBaseClasses:
-			defStr = f"class {self.className}({self.formatBaseClasses()}):"
+			writer.write(f"class {self.className}({self.formatBaseClasses()}):\n")
 		else:
-			defStr = f"class {self.className}:"
-		lineStr = ""
-		methodStr = ""
-
-		if self.classLines:
-			lineStr = "\n".join([str(line) for line in self.classLines])
-		if self.classMethods:
-			methodStr = "\n\n".join([str(method) for method in self.classMethods])
-		childBlock = "\n".join(filter(None, [lineStr, methodStr, "pass"]))
-		childBlock = indent(childBlock)
-		endStr = "\n".join([defStr, childBlock])
-
-		return endStr
+			writer.write(f"class {self.className}:\n")
+		with writer.indented():
+			self._renderSection(writer, self.classLines, "\n")
+			self._renderSection(writer, self.classMethods, "\n\n")
+			writer.write("pass")
+
+	def _renderSection(self, writer:CodeWriter, templates:T.Sequence, sep:str):
+		"""sections are only followed by a newline if they wrote any text"""
+		mark = writer.tell()
+		for i, template in enumerate(templates):
+			if i:
+				writer.write(sep)
+			writeValue(writer, template)
+		if writer.tell() != mark:
+			writer.write("\n")
 
 	def childTemplates(self):
 		return [*self.classLines, *self.classMethods]
@@ -159,68 +159,133 @@ class coerce(UserDecorator):
 		anns = targetFunction.__annotations__
 		log("anns", anns)
 
-		# get globals of calling module
-		outerFrame = inspect.currentframe().f_back
-		outerGlobals = dict(outerFrame.f_globals)
-		outerGlobals.update(builtins.__dict__)
-		outerGlobals.pop("copyright")
-		outerGlobals.pop("__doc__")
-		outerGlobals.pop("credits")
+		# get globals of module defining function
+		outerGlobals = dict(builtins.__dict__)
+		outerGlobals.update(getattr(targetFunction, "__globals__", {}))
+
+		sig = inspect.signature(targetFunction)
 
 		# dict of argument name to target type
 		argNameTypeMap = {}
 
 		for argName, argTypeStr in anns.items():
-			try:
-				# argtypestr is just a string, so we can't catch tuples
-				# has to be eval here to catch tuples of types
-				argType = eval(argTypeStr, outerGlobals)
-			except KeyError:
-				raise TypeError(
-					f"Unable to find type name '{argTypeStr}' in calling module's globals:\n{outerGlobals};\nCannot coerce arguments {argName} of function {targetFunction.__name__}"
-				)
+			# only named parametres can be coerced
+			param = sig.parameters.get(argName)
+			if param is None or param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+				continue
+			if not isinstance(argTypeStr, str): # annotations already evaluated
+				argType = argTypeStr
+			else:
+				try:
+					# argtypestr is just a string, so we can't catch tuples
+					# has to be eval here to catch tuples of types
+					argType = eval(argTypeStr, outerGlobals)
+				except (KeyError, NameError):
+					raise TypeError(
+						f"Unable to find type name '{argTypeStr}' in function module's globals;\nCannot coerce arguments {argName} of function {targetFunction.__name__}"
+					)
 			# check for tuples, skip if found
 			if not isinstance(argType, type):
 				log("skipping", argType)
 				continue
 			argNameTypeMap[argName] = argType
 
+		return self._compileWrapper(targetFunction, sig, argNameTypeMap)
 
-		@functools.wraps(targetFunction)
-		def wrapper(*args, **kwargs):
-			bound = inspect.signature(targetFunction).bind(*args, **kwargs)
-			for k, v in bound.arguments.items():
-
-				# if no valid annotation, skip
-				if k not in argNameTypeMap:
-					continue
-
-				# if already correct type, skip
-				if isinstance(v, argNameTypeMap[k]):
-					continue
-
-				# if in type convert map, use that
-				if k in self.typeConvertFnMap:
-					try:
-						bound.arguments[k] = self.typeConvertFnMap[k](v)
-						continue
-					except Exception as e:
-						e.args = (*e.args, (
-							f"Cannot coerce argument {v} of param {k} to type {argNameTypeMap[k]} for function {targetFunction.__name__};\n tried to use typeConvertFnMap {self.typeConvertFnMap} function {self.typeConvertFnMap[k]} "
-						))
-						raise e
-
-				# convert directly
+	def _makeConverter(self, targetFunction:callable, argName:str,
+	                   argType:type)->callable:
+		"""return function converting a value that isn't already argType"""
+		convertFn = self.typeConvertFnMap.get(argName)
+		if convertFn is not None:
+			def _convert(v):
 				try:
-					# convert to type
-					bound.arguments[k] = argNameTypeMap[k](v)
+					return convertFn(v)
 				except Exception as e:
 					e.args = (*e.args, (
-						f"Cannot directly coerce argument {v} of param {k} to type {argNameTypeMap[k]} for function {targetFunction.__name__}"
+						f"Cannot coerce argument {v} of param {argName} to type {argType} for function {targetFunction.__name__};\n tried to use typeConvertFnMap {self.typeConvertFnMap} function {convertFn} "
 					))
 					raise e
-			return targetFunction(**bound.arguments)
-		return wrapper
+			return _convert
+
+		def _convert(v):
+			try:
+				return argType(v)
+			except Exception as e:
+				e.args = (*e.args, (
+					f"Cannot directly coerce argument {v} of param {argName} to type {argType} for function {targetFunction.__name__}"
+				))
+				raise e
+		return _convert
+
+	def _compileWrapper(self, targetFunction:callable,
+	                    sig:inspect.Signature,
+	                    argNameTypeMap:dict[str, type])->callable:
+		"""generate wrapper with the same signature as target function,
+		checking only the annotated arguments - no binding
+		or looping over arguments on each call
+
+		helpers are passed into a factory function, so the wrapper
+		sees them as closure variables -
+		their names are prefixed to never match a parameter name
+
+		def _coerce_factory(_coerce_target, _coerce_type0, _coerce_convert0, _coerce_default1):
+			def wrapper(a, b=_coerce_default1, *args, c, **kwargs):
+				if not isinstance(a, _coerce_type0): a = _coerce_convert0(a)
+				return _coerce_target(a, b, *args, c=c, **kwargs)
+			return wrapper
+		"""
+		prefix = "_coerce_"
+		while any(i.startswith(prefix) for i in sig.parameters):
+			prefix = "_" + prefix
+		helpers = {prefix + "target" : targetFunction}
+		paramStrs = []
+		callStrs = []
+		checkLines = []
+		prevKind = None
+		for i, (name, param) in enumerate(sig.parameters.items()):
+			# markers for positional-only and keyword-only params
+			if prevKind == param.POSITIONAL_ONLY and param.kind != prevKind:
+				paramStrs.append("/")
+			if param.kind == param.KEYWORD_ONLY and prevKind not in (
+					param.KEYWORD_ONLY, param.VAR_POSITIONAL):
+				paramStrs.append("*")
+			prevKind = param.kind
+
+			paramStr = name
+			if param.default is not param.empty:
+				helpers[f"{prefix}default{i}"] = param.default
+				paramStr += f"={prefix}default{i}"
+			callStr = name
+			if param.kind == param.VAR_POSITIONAL:
+				paramStr = callStr = "*" + name
+			elif param.kind == param.VAR_KEYWORD:
+				paramStr = callStr = "**" + name
+			elif param.kind == param.KEYWORD_ONLY:
+				callStr = f"{name}={name}"
+			paramStrs.append(paramStr)
+			callStrs.append(callStr)
+
+			if name in argNameTypeMap:
+				helpers[f"{prefix}type{i}"] = argNameTypeMap[name]
+				helpers[f"{prefix}convert{i}"] = self._makeConverter(
+					targetFunction, name, argNameTypeMap[name])
+				checkLines.append(
+					f"\t\tif not isinstance({name}, {prefix}type{i}): {name} = {prefix}convert{i}({name})")
+		if prevKind == inspect.Parameter.POSITIONAL_ONLY:
+			paramStrs.append("/")
+
+		factoryStr = "\n".join((
+			f"def {prefix}factory({', '.join(helpers)}):",
+			f"\tdef wrapper({', '.join(paramStrs)}):",
+			*checkLines,
+			f"\t\treturn {prefix}target({', '.join(callStrs)})",
+			"\treturn wrapper"
+		))
+		factoryGlobals = {}
+		exec(compile(factoryStr, f"<coerce {targetFunction.__qualname__}>", "exec"),
+		     factoryGlobals)
+		wrapper = factoryGlobals[prefix + "factory"](**helpers)
+		return functools.wraps(targetFunction)(wrapper)
 
 
 
@@ -1,6 +1,6 @@
 from __future__ import annotations, print_function
 
-import types
+import types, abc
 import typing as T
 import inspect
 from ordered_set import OrderedSet
@@ -143,11 +143,20 @@ class SuperClassLookupMap:
 	can maybe pass this as param to class initialisation,
 	as well as defining at class scope, to set different type
 	overrides for different parts of the program
+
+	lookups walk the type's __mro__ against the map, instead of
+	testing every registered class - only abstract classes (which
+	can match without appearing in the mro) are checked with issubclass.
+	Misses are cached too, as Sentinel.FailToFind
 	"""
 	def __init__(self, classMap:dict[type, T.Any]=None):
 		self.classMap : dict[type, T.Any] = {}
 		self.cacheMap : dict[type, T.Any] = {}
 		self._hasMatchFunctions = False
+		# { registered type : position in sorted classMap }
+		self._rankMap : dict[type, int] = {}
+		# registered abstract types, that may match by registration or hook
+		self._abcKeys : tuple[type, ...] = ()
 		if classMap is not None:
 			self.updateClassMap(classMap)
 
@@ -178,44 +187,79 @@ class SuperClassLookupMap:
 			       key=lambda i: len(i[0].__mro__) if isinstance(i[0], type) else 0,
 			       reverse=True)
 		)
+		self._rankMap = {k : i for i, k in enumerate(self.classMap)
+		                 if isinstance(k, type)}
+		self._abcKeys = tuple(k for k in self._rankMap if isinstance(k, abc.ABCMeta))
 		for i in self.classMap.keys():
 			if isinstance(i, types.FunctionType):
 				self._hasMatchFunctions = True
 
 	def updateClassMap(self, classMap:dict[(type, tuple[type, ...]), T.Any]):
-		"""register a map of {type : value}"""
+		"""register a map of {type : value}
+
+		only cached lookups for subclasses of the new types are
+		invalidated - match functions could match anything, so adding
+		one clears the whole cache"""
 		#log("updateClassMap", classMap)
-		self.classMap.update(self._expandTypeTupleKeys(classMap))
+		newMap = self._expandTypeTupleKeys(classMap)
+		self.classMap.update(newMap)
 		self._sortMap()
-		self.cacheMap.clear()
+		if any(not isinstance(k, type) for k in newMap):
+			self.cacheMap.clear()
+			return
+		newTypes = tuple(newMap)
+		for k in tuple(self.cacheMap):
+			if k is None:
+				continue
+			if issubclass(k if isinstance(k, type) else type(k), newTypes):
+				self.cacheMap.pop(k)
 		#log("end hasfn", self._hasMatchFunctions)
 
+	def _resolve(self, lookupCls:(type, object)):
+		"""find value for lookupCls, or Sentinel.FailToFind"""
+		if lookupCls is None: # None messes up everything
+			return self.classMap.get(None, Sentinel.FailToFind)
+		lookupType = lookupCls if isinstance(lookupCls, type) else type(lookupCls)
+
+		# most specific registered class wins - same order as
+		# scanning the sorted map
+		rankMap = self._rankMap
+		found = None
+		foundRank = len(rankMap)
+		for i in lookupType.__mro__:
+			rank = rankMap.get(i, foundRank)
+			if rank < foundRank:
+				found, foundRank = i, rank
+		for i in self._abcKeys:
+			if rankMap[i] < foundRank and issubclass(lookupType, i):
+				found, foundRank = i, rankMap[i]
+		if found is not None:
+			return self.classMap[found]
+
+		result = Sentinel.FailToFind
+		if self._hasMatchFunctions: # check against functions now
+			for k, v in self.classMap.items():
+				#log("check", k, v)
+				if isinstance(k, types.FunctionType):
+					if k(lookupCls):
+						result = v
+		return result
+
 	def lookup(self, lookupCls:type, default=Sentinel.FailToFind):
 		"""lookup a value using lookupCls,
-		add found results to cache.
+		add result to cache, whether found or not.
 
 		Explicitly specify default=None to pass None from failure,
 		otherwise it will raise a KeyError
 		"""
 		#log(f"lookup {lookupCls} in {self.classMap}")
-		if lookupCls in self.cacheMap:
-			return self.cacheMap[lookupCls]
-		if lookupCls is None: # None messes up everything
-			result = self.classMap.get(None, default=Sentinel.FailToFind)
-		else:
-			result = superClassLookup(
-				self.classMap, lookupCls, default=Sentinel.FailToFind)
+		try:
+			result = self.cacheMap[lookupCls]
+		except KeyError:
+			result = self.cacheMap[lookupCls] = self._resolve(lookupCls)
 		#log(f"result {result}")
-		if result is Sentinel.FailToFind: # not found in map
-			if self._hasMatchFunctions: # check against functions now
-				for k, v in self.classMap.items():
-					#log("check", k, v)
-					if isinstance(k, types.FunctionType):
-						if k(lookupCls):
-							result = v
 
 		if result is not Sentinel.FailToFind: # found in map
-			self.cacheMap[lookupCls] = result
 			return result
 
 		if default is Sentinel.FailToFind :
@@ -127,6 +127,59 @@ def closestParamOnSegment(segment:arrT,
 	                   np.linalg.norm(pos - segment[1]))
 
 
+#region batched
+"""batched versions of the above, for testing many points against
+many segments in one go - points are (N, D), segments (M, 2, D),
+results are indexed [point, segment]
+"""
+
+def polygonSegments(points:arrT, closed=True)->arrT:
+	"""return (M, 2, D) array of edges between consecutive
+	points, wrapping back to the start if closed"""
+	points = np.asarray(points, dtype=float)
+	ends = np.roll(points, -1, axis=0) if closed else points[1:]
+	return np.stack((points[:len(ends)], ends), axis=1)
+
+def closestParamsOnSegments(segments:arrT, points:arrT)->arrT:
+	"""(N, M) params of closest position on each segment to each point -
+	degenerate segments give 0"""
+	segments = np.asarray(segments, dtype=float)
+	points = np.atleast_2d(np.asarray(points, dtype=float))
+	v = segments[:, 1] - segments[:, 0] # (M, D)
+	u = points[:, None, :] - segments[None, :, 0] # (N, M, D)
+	lengthSq = np.einsum("md,md->m", v, v)
+	with np.errstate(divide="ignore", invalid="ignore"):
+		t = np.einsum("nmd,md->nm", u, v) / lengthSq
+	# past either end, the nearest end is the closest point
+	return np.clip(np.nan_to_num(t, nan=0.0, posinf=0.0, neginf=0.0), 0.0, 1.0)
+
+def closestOnSegments(segments:arrT, points:arrT)->tuple[arrT, arrT, arrT]:
+	"""return (params (N, M), positions (N, M, D), distances (N, M))
+	of closest positions on each segment to each point"""
+	segments = np.asarray(segments, dtype=float)
+	points = np.atleast_2d(np.asarray(points, dtype=float))
+	t = closestParamsOnSegments(segments, points)
+	positions = (segments[None, :, 0] * (1.0 - t)[..., None]
+	             + segments[None, :, 1] * t[..., None])
+	distances = np.linalg.norm(positions - points[:, None, :], axis=-1)
+	return t, positions, distances
+
+def closestPosOnSegments(segments:arrT, points:arrT)->arrT:
+	"""(N, M, D) closest position on each segment to each point"""
+	return closestOnSegments(segments, points)[1]
+
+def distancesToSegments(segments:arrT, points:arrT)->arrT:
+	"""(N, M) distance from each point to each segment"""
+	return closestOnSegments(segments, points)[2]
+
+def distancesToPoints(targets:arrT, points:arrT)->arrT:
+	"""(N, M) distance from each point to each target point"""
+	targets = np.atleast_2d(np.asarray(targets, dtype=float))
+	points = np.atleast_2d(np.asarray(points, dtype=float))
+	return np.linalg.norm(points[:, None, :] - targets[None, :, :], axis=-1)
+#endregion
+
+
 if __name__ == '__main__':
 
 	v = V3(1, 2, 3)
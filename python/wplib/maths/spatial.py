@@ -0,0 +1,94 @@
+from __future__ import annotations
+import typing as T
+import math
+from itertools import product
+
+"""spatial lookups for finding things near a point without
+checking every thing"""
+
+class PointGrid:
+	"""uniform grid hashing arbitrary keys by point position -
+	works for any number of dimensions.
+
+	queries only check the cells overlapping the search radius, so
+	with cellSize close to the usual query radius, finding the nearest
+	point is constant time however many points there are
+	"""
+
+	def __init__(self, cellSize:float):
+		assert cellSize > 0, "grid cell size must be positive"
+		self.cellSize = float(cellSize)
+		# { cell : { key : pos } }
+		self._cells : dict[tuple[int, ...], dict[T.Hashable, tuple[float, ...]]] = {}
+		# { key : cell }
+		self._keyCells : dict[T.Hashable, tuple[int, ...]] = {}
+
+	def _cellFor(self, pos:T.Sequence[float])->tuple[int, ...]:
+		return tuple(math.floor(i / self.cellSize) for i in pos)
+
+	def __len__(self):
+		return len(self._keyCells)
+
+	def __contains__(self, key):
+		return key in self._keyCells
+
+	def insert(self, key:T.Hashable, pos:T.Sequence[float]):
+		"""add key at pos, or move it there if already present"""
+		pos = tuple(pos)
+		cell = self._cellFor(pos)
+		oldCell = self._keyCells.get(key)
+		if oldCell is not None and oldCell != cell:
+			self._removeFromCell(key, oldCell)
+		self._cells.setdefault(cell, {})[key] = pos
+		self._keyCells[key] = cell
+
+	def remove(self, key:T.Hashable):
+		cell = self._keyCells.pop(key, None)
+		if cell is not None:
+			self._removeFromCell(key, cell)
+
+	def _removeFromCell(self, key, cell):
+		entries = self._cells[cell]
+		entries.pop(key, None)
+		if not entries:
+			self._cells.pop(cell)
+
+	def clear(self):
+		self._cells.clear()
+		self._keyCells.clear()
+
+	def position(self, key:T.Hashable)->(tuple[float, ...], None):
+		cell = self._keyCells.get(key)
+		if cell is None:
+			return None
+		return self._cells[cell][key]
+
+	def near(self, pos:T.Sequence[float], radius:float
+	         )->T.Iterator[tuple[T.Hashable, tuple[float, ...], float]]:
+		"""yield (key, pos, distance) for every point within radius
+		of pos - in no particular order"""
+		span = math.ceil(radius / self.cellSize)
+		centre = self._cellFor(pos)
+		radiusSq = radius * radius
+		for offset in product(range(-span, span + 1), repeat=len(centre)):
+			entries = self._cells.get(tuple(c + o for c, o in zip(centre, offset)))
+			if not entries:
+				continue
+			for key, keyPos in entries.items():
+				distSq = sum((a - b) ** 2 for a, b in zip(keyPos, pos))
+				if distSq <= radiusSq:
+					yield key, keyPos, math.sqrt(distSq)
+
+	def nearest(self, pos:T.Sequence[float], radius:float,
+	            filterFn:T.Callable[[T.Hashable], bool]=None
+	            )->(tuple[T.Hashable, tuple[float, ...], float], None):
+		"""return (key, pos, distance) of closest point within radius
+		that passes filterFn, or None"""
+		found = None
+		for result in self.near(pos, radius):
+			if found is not None and result[2] >= found[2]:
+				continue
+			if filterFn is not None and not filterFn(result[0]):
+				continue
+			found = result
+		return found
@@ -9,7 +9,7 @@ import uuid
 import typing as T
 #from tree.lib.python import seedUid, bitwiseXor
 from wplib.wpstring import incrementName
-#from tree.lib import uid as libuid
+from wplib import uid as libuid
 class HashIdElement:
 	"""element that has a hashable id
 	smaller than others, not compatible with the others"""
@@ -86,12 +86,8 @@ class UidElement(IdElementBase):
 	@classmethod
 	def getNewElementId(cls, instance:IdElementBase=None, seed=None, readable=False) ->keyT:
 		if seed is not None:
-			if readable:
-				return libuid.getReadableUid(seed)
-			return seedUid(seed)
-		if readable:
-			return  libuid.getReadableUid()
-		return str(uuid.uuid4())
+			return libuid.getUid4(seed)
+		return libuid.getNewUid()
 
 	# @classmethod
 	# def byUid(cls:type[C], uid)->C:
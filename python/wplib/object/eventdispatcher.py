@@ -16,14 +16,31 @@ for simplicity, no accepting system - all listeners will receive all events.
 if listeners want to implement more complicated systems, they can
 
 allow subscribing to different streams of events?
+
+each dispatcher caches its full route of destinations per key, stamped
+with a global generation - call invalidateEventRoutes() whenever
+hierarchy changes, so any route from before is rebuilt on next send.
+routes can't see destinations that depend on the event itself -
+set cacheEventRoutes False on classes that filter by event
 """
 
 
 class EventDispatcher:
 	"""base class for objects that can send events to other objects"""
 
+	# bumped whenever any dispatcher's destinations may have changed
+	_eventRouteGeneration = 0
+	cacheEventRoutes = True
+
 	def __init__(self):
 		self._eventNameSignalMap : dict[str, Signal] = {}
+		# { key : (generation, route, route paths) }
+		self._eventRouteCache : dict[str, tuple] = {}
+
+	@staticmethod
+	def invalidateEventRoutes():
+		"""mark all cached event routes as stale"""
+		EventDispatcher._eventRouteGeneration += 1
 
 	def __hash__(self):
 		return id(self)
@@ -72,6 +89,26 @@ class EventDispatcher:
 			sources.extend(destinations)
 		return toSend
 
+	def _eventRoutePaths(self, route:tuple[EventDispatcher, ...])->(tuple[tuple], None):
+		"""OVERRIDE
+		return a path for each dispatcher in route, set as event["path"]
+		when it handles the event - or None to leave path alone"""
+		return None
+
+	def _eventRoute(self, forEvent:dict, key:str)->tuple[tuple[EventDispatcher, ...], (tuple[tuple], None)]:
+		"""return (all destinations, their paths), reusing
+		last route for this key if hierarchy hasn't changed"""
+		generation = EventDispatcher._eventRouteGeneration
+		cache = self.__dict__.get("_eventRouteCache")
+		if cache is not None and self.cacheEventRoutes:
+			entry = cache.get(key)
+			if entry is not None and entry[0] == generation:
+				return entry[1], entry[2]
+		route = tuple(self._allEventDestinations(forEvent, key))
+		paths = self._eventRoutePaths(route)
+		if cache is not None and self.cacheEventRoutes:
+			cache[key] = (generation, route, paths)
+		return route, paths
 
 
 	def _handleEvent(self, event:dict, key:str= "main"):
@@ -93,8 +130,14 @@ class EventDispatcher:
 			event["sender"] = self
 
 		try:
-			for i in self._allEventDestinations(event, key):
-				i._handleEvent(event, key)
+			route, paths = self._eventRoute(event, key)
+			if paths is None:
+				for i in route:
+					i._handleEvent(event, key)
+			else:
+				for i, path in zip(route, paths):
+					event["path"] = path
+					i._handleEvent(event, key)
 		except Exception as e:
 			print("error in event handling", e)
 			traceback.print_exc()
@@ -1,17 +1,36 @@
 from __future__ import annotations
 import types, typing as T
 import pprint
+from collections import deque
 #from wplib import log
 
 from wplib.sentinel import Sentinel
 
+"""resolved overrides are cached on each provider, stamped with a
+global generation - setOverride() anywhere bumps the generation,
+so any cached result from before is stale.
+
+this can't see changes in hierarchy - call invalidateOverrideCache()
+whenever ancestors of a provider may have changed
+"""
+
 class OverrideProvider:
 	"""Mixin to allow pinning values at points
 	in a hierarchy, affecting all elements below
 	"""
 
+	# bumped whenever any override is set, or hierarchy changes
+	_overrideGeneration = 0
+
 	def __init__(self):
 		self._overrides = {}
+		# { (key, onlyFirst) : (generation, [(provider, value)]) }
+		self._overrideCache = {}
+
+	@staticmethod
+	def invalidateOverrideCache():
+		"""mark all cached override lookups as stale"""
+		OverrideProvider._overrideGeneration += 1
 
 	def _getDirectOverrides(self)->dict:
 		"""
@@ -22,12 +41,20 @@ class OverrideProvider:
 	def setOverride(self, key:str, value):
 		"""set an override value on this object"""
 		self._getDirectOverrides()[key] = value
+		self.invalidateOverrideCache()
 
 	def _getOverrideAncestors(self, forKey="")->T.Iterable[OverrideProvider]:
 		"""return the direct ancestor(s) of this
 		provider to look at for the given key"""
 		raise NotImplementedError(self)
 
+	def _getOverrideCache(self)->dict:
+		try:
+			return self._overrideCache
+		except AttributeError: # subclass didn't run OverrideProvider.__init__
+			self._overrideCache = {}
+			return self._overrideCache
+
 	def getOverride(self, key:str, default=Sentinel.FailToFind,
 	                returnValue=True, returnProvider=False,
 	                onlyFirst=True)->(T.Any, T.Iterable):
@@ -43,37 +70,96 @@ class OverrideProvider:
 			so external processes can check returned overrides and decide outside if they
 			need to continue
 		"""
-		toCheck = [self]
-		found = []
-		while toCheck:
-			provider = toCheck.pop(0)
-			overrides = provider._getDirectOverrides()
-			result = overrides.get(key, default=Sentinel.FailToFind)
-			if result is Sentinel.FailToFind: # on miss, go looking up on ancestors
-				toCheck.extend(provider._getOverrideAncestors(forKey=key))
-				continue
-			# check if we want all matching overrides
-			if not onlyFirst:
-				found.append((provider, result))
-				toCheck.extend(provider._getOverrideAncestors(forKey=key))
-				continue
-			# check if we want object or value
-			if returnValue and returnProvider: # fizzbuzz pros in shambles
-				found.append((result, provider))
-			elif returnProvider:
-				found.append(provider)
-			elif returnValue:
-				found.append(result)
-			break
+		found = _cachedFindOverrides(
+			self._getOverrideCache(), (key, onlyFirst),
+			lambda visited: _findOverrides(
+				self, key,
+				getOverridesFn=lambda p: p._getDirectOverrides(),
+				getAncestorsFn=lambda p: p._getOverrideAncestors(forKey=key),
+				onlyFirst=onlyFirst, visited=visited)
+		)
 
 		if not found: # nothing found
 			if not onlyFirst: # return empty list
-				return found
+				return []
 			if default is Sentinel.FailToFind:
 				raise KeyError(f"No override found for key {key} on object {self} ")
 			return default
 
-		return found[0]
+		if not onlyFirst:
+			return list(found)
+		# check if we want object or value
+		provider, result = found[0]
+		if returnValue and returnProvider: # fizzbuzz pros in shambles
+			return (result, provider)
+		elif returnProvider:
+			return provider
+		return result
+
+def _findOverrides(obj, key:str,
+                   getOverridesFn:T.Callable[[T.Any], dict],
+                   getAncestorsFn:T.Callable[[T.Any], T.Iterable],
+                   onlyFirst=True,
+                   visited:list=None)->list[tuple[T.Any, T.Any]]:
+	"""breadth-first walk up from obj, return list of
+	(provider, value) for each provider with key set
+
+	if visited is given, every object checked is appended to it"""
+	toCheck = deque((obj, ))
+	found = []
+	while toCheck:
+		provider = toCheck.popleft()
+		if provider is None: # past the root
+			continue
+		if visited is not None:
+			visited.append(provider)
+		result = getOverridesFn(provider).get(key, Sentinel.FailToFind)
+		if result is not Sentinel.FailToFind:
+			found.append((provider, result))
+			if onlyFirst:
+				break
+		# on miss, or if we want all matches, go looking up on ancestors
+		toCheck.extend(getAncestorsFn(provider) or ())
+	return found
+
+def _cachedFindOverrides(cache:dict, cacheKey:tuple,
+                         findFn:T.Callable[[list], list])->list:
+	"""return cached result of findFn if it's still current,
+	otherwise run it and cache it.
+	findFn is passed a list to fill with every object it checks -
+	only OverrideProviders bump the generation when they change,
+	so if the walk touched anything else, the result isn't cached"""
+	generation = OverrideProvider._overrideGeneration
+	entry = cache.get(cacheKey)
+	if entry is not None and entry[0] == generation:
+		return entry[1]
+	visited = []
+	found = findFn(visited)
+	if all(isinstance(i, OverrideProvider) for i in visited):
+		cache[cacheKey] = (generation, found)
+	else:
+		cache.pop(cacheKey, None)
+	return found
+
+def _stableFnKey(fn:T.Callable)->(T.Hashable, None):
+	"""key for an ancestor function that stays the same
+	across calls - a lambda written inline is a new object each time,
+	but shares its code.
+	returns None if fn can't be keyed safely"""
+	if not isinstance(fn, types.FunctionType):
+		# bound methods compare equal on same function and instance
+		return fn
+	if fn.__closure__: # depends on captured values, can't tell if they changed
+		return None
+	key = (fn.__code__, fn.__defaults__)
+	try:
+		hash(key)
+	except TypeError:
+		return None
+	return key
+
+def invalidateOverrideCache():
+	OverrideProvider.invalidateOverrideCache()
 
 # test for a more flexible approach looking for
 # arbitrary attributes on objects
@@ -91,37 +177,35 @@ def getOverride(obj, key: str,
                 ):
 	"""TODO: we don't need a whole other system of adaptors for this -
 			maybe could extend visitAdaptor
+
+	results are only cached if every object walked is an OverrideProvider -
+	other objects' override dicts may be edited directly, without
+	bumping the override generation
 	"""
-	toCheck = [obj]
-	found = []
-	while toCheck:
-		provider = toCheck.pop(0)
-		#overrides = provider._getDirectOverrides()
-		#ancestors = provider._getOverrideAncestors(forKey=key) if isinstance(provider, OverrideProvider) else getAncestorsFn(obj)
-		ancestors = getAncestorsFn(obj)
-		overrides = _getDirectOverrides(obj, attributeDictName, {})
-		result = overrides.get(key, default=Sentinel.FailToFind)
-		if result is Sentinel.FailToFind:  # on miss, go looking up on ancestors
-			#toCheck.extend(provider._getOverrideAncestors(forKey=key))
-			toCheck.extend(ancestors)
-			continue
-		# check if we want all matching overrides
-		if not onlyFirst:
-			found.append((provider, result))
-			toCheck.extend(ancestors)
-			continue
-		# check if we want object or value
-		if returnObj:
-			found.append(provider)
-		else:
-			found.append(result)
-		break
+	findFn = lambda visited: _findOverrides(
+		obj, key,
+		getOverridesFn=lambda p: _getDirectOverrides(p, attributeDictName, {}),
+		getAncestorsFn=getAncestorsFn,
+		onlyFirst=onlyFirst, visited=visited)
+	fnKey = _stableFnKey(getAncestorsFn)
+	if isinstance(obj, OverrideProvider) and fnKey is not None:
+		found = _cachedFindOverrides(
+			obj._getOverrideCache(),
+			(key, onlyFirst, attributeDictName, fnKey),
+			findFn)
+	else:
+		found = findFn(None)
 
 	if not found:  # nothing found
 		if not onlyFirst:  # return empty list
-			return found
+			return []
 		if default is Sentinel.FailToFind:
-			raise KeyError(f"No override found for key {key} on object {self} ")
+			raise KeyError(f"No override found for key {key} on object {obj} ")
 		return default
 
-	return found[0]
\ No newline at end of file
+	if not onlyFirst:
+		return list(found)
+	# check if we want object or value
+	if returnObj:
+		return found[0][0]
+	return found[0][1]
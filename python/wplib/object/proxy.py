@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-import weakref
+import weakref, threading
 from collections import defaultdict
 import typing as T
 
@@ -131,10 +131,9 @@ class ProxyMeta(type):
 
 	@staticmethod
 	def construct(cls, obj, proxyData=None, shared=True, **kwargs):
-		# look up existing proxy classes
-		# cache = cls.__dict__["_classProxyCache"]
-		#log("construct", obj, cls)
-		cache = inheritance.mroMergedDict(cls)["_classProxyCache"]
+		# look up existing proxy classes -
+		# plain attribute lookup finds the most-derived cache declared
+		cache = cls._classProxyCache
 		# log("proxy new", cls, obj, type(obj), vars=0)
 
 		# check that we don't start generating classes from generated classes
@@ -149,8 +148,13 @@ class ProxyMeta(type):
 		try:
 			genClass = cache[cls][objCls]
 		except KeyError:
-			genClass = cls._createClassProxy(objCls)
-			cache[cls] = {objCls: genClass}
+			with _classProxyLock:
+				# another thread may have generated it while we waited
+				clsCache = cache[cls]
+				genClass = clsCache.get(objCls)
+				if genClass is None:
+					genClass = cls._createClassProxy(objCls)
+					clsCache[objCls] = genClass
 
 		# create new proxy instance of type-specific proxy class
 		# sometimes gives "not safe" errors on builtin types
@@ -166,6 +170,9 @@ class ProxyMeta(type):
 		return ins
 
 
+# guards generating new proxy classes - lookups of existing ones don't lock
+_classProxyLock = threading.RLock()
+
 class ProxyData(T.TypedDict):
 	"""user data for a proxy object"""
 	target : object
@@ -267,6 +274,11 @@ class Proxy(#ABC,
 		"__le__", "__lt__", "__ne__",
 	)
 
+	# methods known not to mutate or need filtering - these call straight
+	# through to the target, skipping _beforeProxyCall and _afterProxyCall.
+	# only add methods here if this class's hooks don't need to see them
+	_proxyPassthroughMethods : frozenset[str] = frozenset()
+
 	# insert modified methods on the target object itself where possible -
 	# clear these up once all proxies pointing to it are deleted
 	_watchMethodNames = set()
@@ -383,6 +395,13 @@ class Proxy(#ABC,
 
 		return _proxyMethod
 
+	@classmethod
+	def _makePassthroughMethod(cls, methodName, targetCls):
+		"""method calling directly on target, without any hooks"""
+		def _passthroughMethod(self:Proxy, *args, **kw):
+			return getattr(self._proxyTarget(), methodName)(*args, **kw)
+		return _passthroughMethod
+
 
 	def _beforeProxySetAttr(self, attrName:str, attrVal:T.Any,
 	                     targetInstance:object
@@ -446,6 +465,7 @@ class Proxy(#ABC,
 		             "_proxySuperCls" : _proxySuperCls,
 		             }
 		toWrap = classCallables(targetCls)
+		passthroughNames = cls._proxyPassthroughMethods
 
 		for methodName in toWrap:
 			# do not override methods if they appear in proxy class
@@ -455,7 +475,10 @@ class Proxy(#ABC,
 				if ((methodName in cls._wrapTheseMethodsAnyway)
 						or (not methodName in dir(cls))):
 					#print("wrapping", methodName)
-					namespace[methodName] = cls._makeProxyMethod(methodName, targetCls)
+					if methodName in passthroughNames:
+						namespace[methodName] = cls._makePassthroughMethod(methodName, targetCls)
+					else:
+						namespace[methodName] = cls._makeProxyMethod(methodName, targetCls)
 
 		clsType = ProxyMeta
 
@@ -714,8 +737,13 @@ class LinkProxy(Proxy):
 		try:
 			genClass = cache[cls][objCls]
 		except KeyError:
-			genClass = cls._createClassProxy(objCls)
-			cache[cls] = {objCls: genClass}
+			with _classProxyLock:
+				# another thread may have generated it while we waited
+				clsCache = cache[cls]
+				genClass = clsCache.get(objCls)
+				if genClass is None:
+					genClass = cls._createClassProxy(objCls)
+					clsCache[objCls] = genClass
 
 		# create new proxy instance of type-specific proxy class
 		# sometimes gives "not safe" errors on builtin types
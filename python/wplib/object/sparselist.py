@@ -1,28 +1,34 @@
-
 from __future__ import annotations
 import typing as T
+from bisect import bisect_left, bisect_right
 
 
 VT = T.TypeVar("VT")
 class SparseList(T.Generic[VT]):
-	"""list that can have gaps in it"""
-	__slots__ = ("_indexMap", )
+	"""list that can have gaps in it
+
+	values are held in a dict by index, alongside a sorted list of
+	indices - iteration is always in index order, and nearest-index
+	and range lookups are binary searches
+	"""
+	__slots__ = ("_indexMap", "_indices")
 
 	def __init__(self):
 		self._indexMap : dict[int, VT] = {}
+		self._indices : list[int] = [] # always sorted
 
 	@classmethod
 	def fromItems(cls, items:dict[int, VT]):
 		"""create a sparse list from a dict"""
 		self = cls()
-		self._indexMap = {k: items[k] for k in sorted(items.keys())}
+		self.update(items)
 		return self
 
 	@classmethod
 	def fromTies(cls, ties:T.Iterable[T.Tuple[int, VT]]):
 		"""create a sparse list from a list of tuples"""
 		self = cls()
-		self._indexMap = dict(sorted(ties, key=lambda x: x[0]))
+		self.update(ties)
 		return self
 
 	@classmethod
@@ -30,35 +36,125 @@ class SparseList(T.Generic[VT]):
 		"""create a sparse list from two lists"""
 		self = cls()
 		assert len(indices) == len(values), f"len(indices) != len(values) {len(indices)} != {len(values)}"
-		self._indexMap = dict(sorted(zip(indices, values)), key=lambda x: x[0])
+		self.update(zip(indices, values))
 		return self
 
-	def __getitem__(self, key:int)->VT:
-		if key in self._indexMap:
+	def __getitem__(self, key:(int, slice))->VT:
+		if isinstance(key, slice):
+			assert key.step is None, "sparse list slices can't take a step"
+			return self.slice(key.start, key.stop)
+		try:
 			return self._indexMap[key]
-		raise IndexError(f"Index {key} not in {self}")
+		except KeyError:
+			raise IndexError(f"Index {key} not in {self}")
 
 	def __setitem__(self, key:int, value:VT):
 		assert isinstance(key, int), f"key must be int, not {type(key)}"
+		if key not in self._indexMap:
+			# appending in order is the usual case
+			if not self._indices or key > self._indices[-1]:
+				self._indices.append(key)
+			else:
+				self._indices.insert(bisect_left(self._indices, key), key)
 		self._indexMap[key] = value
 
+	def __delitem__(self, key:int):
+		try:
+			self._indexMap.pop(key)
+		except KeyError:
+			raise IndexError(f"Index {key} not in {self}")
+		del self._indices[bisect_left(self._indices, key)]
+
+	def __contains__(self, key:int):
+		return key in self._indexMap
+
 	def __repr__(self):
-		return f'<{self.__class__.__name__}({self._indexMap})>'
+		return f'<{self.__class__.__name__}({dict(self.enum())})>'
 
 	def __iter__(self)->T.Iterator[VT]:
-		return iter(self._indexMap.values())
+		indexMap = self._indexMap
+		return (indexMap[i] for i in self._indices)
 
 	def __len__(self):
-		return len(self._indexMap)
+		return len(self._indices)
+
+	def update(self, items:(dict[int, VT], T.Iterable[T.Tuple[int, VT]])):
+		"""set many values at once - indices are only
+		sorted once, not on each insert"""
+		if isinstance(items, SparseList):
+			items = items.enum()
+		elif isinstance(items, dict):
+			items = items.items()
+		indexMap = self._indexMap
+		newIndices = []
+		for k, v in items:
+			if k not in indexMap:
+				newIndices.append(k)
+			indexMap[k] = v
+		if not newIndices:
+			return
+		newIndices.sort()
+		if not self._indices or newIndices[0] > self._indices[-1]:
+			self._indices.extend(newIndices)
+		else: # merging sorted runs is cheap
+			self._indices = sorted(self._indices + newIndices)
+
+	def clear(self):
+		self._indexMap.clear()
+		self._indices.clear()
+
+	def copy(self)->SparseList[VT]:
+		result = type(self)()
+		result._indexMap = dict(self._indexMap)
+		result._indices = list(self._indices)
+		return result
+
+	#region ordered lookups
+	def floor(self, index:int, default=None)->(T.Tuple[int, VT], None):
+		"""return (index, value) of the highest set index at or
+		below given index, or default"""
+		pos = bisect_right(self._indices, index)
+		if not pos:
+			return default
+		found = self._indices[pos - 1]
+		return found, self._indexMap[found]
+
+	def ceil(self, index:int, default=None)->(T.Tuple[int, VT], None):
+		"""return (index, value) of the lowest set index at or
+		above given index, or default"""
+		pos = bisect_left(self._indices, index)
+		if pos == len(self._indices):
+			return default
+		found = self._indices[pos]
+		return found, self._indexMap[found]
+
+	def _sliceIndices(self, start:int=None, stop:int=None)->list[int]:
+		lo = 0 if start is None else bisect_left(self._indices, start)
+		hi = len(self._indices) if stop is None else bisect_left(self._indices, stop)
+		return self._indices[lo:hi]
+
+	def slice(self, start:int=None, stop:int=None)->SparseList[VT]:
+		"""return new sparse list of entries with
+		start <= index < stop, keeping their indices"""
+		result = type(self)()
+		result._indices = self._sliceIndices(start, stop)
+		indexMap = self._indexMap
+		result._indexMap = {i : indexMap[i] for i in result._indices}
+		return result
+	#endregion
 
 	def enum(self)->list[T.Tuple[int, VT]]:
-		return list(self._indexMap.items())
+		indexMap = self._indexMap
+		return [(i, indexMap[i]) for i in self._indices]
 
 	def indices(self)->list[int]:
-		return list(self._indexMap.keys())
+		return list(self._indices)
+
+	def values(self)->list[VT]:
+		return list(self)
 
 	def fullEnum(self)->list[tuple[int, int, VT]]:
 		"""return (rawIndex, sparseIndex, value)"""
-		return list((i, k, v) for i, (k, v) in enumerate(self._indexMap.items()))
+		return list((i, k, v) for i, (k, v) in enumerate(self.enum()))
 
 
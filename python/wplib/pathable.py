@@ -140,8 +140,6 @@ class Pathable(#Adaptor
 		self.setName(name)
 		self._setParent(parent)
 
-		self._overrides = {} # we're doing it
-
 		self._branchMap = None # built on request
 
 		self.isRoot = False #TEST for breakpoints without excessive tooling
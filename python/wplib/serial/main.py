@@ -5,6 +5,7 @@ import pprint
 from wplib.constant import IMMUTABLE_TYPES, LITERAL_TYPES, MAP_TYPES, SEQ_TYPES
 from wplib import CodeRef, inheritance, log, dictlib
 from wplib.inheritance import SuperClassLookupMap
+from wplib.time import profiled
 
 from .adaptor import SerialAdaptor
 
@@ -30,6 +31,7 @@ collide, only one adaptor per class.
 
 
 
+@profiled("wplib.serialise")
 def serialise(obj, serialiseOp=None, serialParams=None)->dict:
 	"""top-level serialise function -
 	serialises the given object into a dict
@@ -50,6 +52,7 @@ def serialise(obj, serialiseOp=None, serialParams=None)->dict:
 	)
 	return result
 
+@profiled("wplib.deserialise")
 def deserialise(serialData:dict, deserialiseOp=None, serialParams=None)->T.Any:
 	"""top-level deserialise function -
 	deserialises the given dict into an object
@@ -0,0 +1,74 @@
+from __future__ import annotations
+import typing as T
+
+import unittest
+
+from wplib.coerce import coerce
+
+
+class TestCoerce(unittest.TestCase):
+
+	def test_positionalOnly(self):
+		@coerce
+		def f(a:int, b:str="x", /, c:float=1):
+			return a, b, c
+		self.assertEqual(f("1"), (1, "x", 1))
+		self.assertEqual(f("1", 2, "3.5"), (1, "2", 3.5))
+		self.assertEqual(f("1", c=2), (1, "x", 2.0))
+		with self.assertRaises(TypeError):
+			f(a=1)
+
+	def test_keywordOnly(self):
+		@coerce
+		def f(a, *, b:int, c:str="d"):
+			return a, b, c
+		self.assertEqual(f("1", b="2"), ("1", 2, "d"))
+		self.assertEqual(f(1, b=2, c=3), (1, 2, "3"))
+		with self.assertRaises(TypeError):
+			f(1, 2)
+
+	def test_varArgs(self):
+		@coerce
+		def f(a:int, *args:int, b:str="", **kwargs:int):
+			return a, args, b, kwargs
+		# star args are passed through untouched
+		self.assertEqual(f("1", "2", "3", b=4, c="5"),
+		                 (1, ("2", "3"), "4", {"c" : "5"}))
+
+	def test_method(self):
+		class A:
+			@coerce
+			def m(self, x:int, y:str="a"):
+				return self, x, y
+		a = A()
+		self.assertEqual(a.m("3"), (a, 3, "a"))
+		self.assertEqual(a.m("3", y=4), (a, 3, "4"))
+
+	def test_collidingNames(self):
+		@coerce
+		def g(_target:int):
+			return _target
+		self.assertEqual(g("2"), 2)
+
+		@coerce
+		def h(x:int, target:int=0, _convert_x:int=3, wrapper:str="w"):
+			return x, target, _convert_x, wrapper
+		self.assertEqual(h("1"), (1, 0, 3, "w"))
+		self.assertEqual(h("1", "2", "4", 5), (1, 2, 4, "5"))
+
+		# names matching the generated helper prefix
+		@coerce
+		def k(_coerce_target:int, _coerce_type0:str="a", **_coerce_default1):
+			return _coerce_target, _coerce_type0, _coerce_default1
+		self.assertEqual(k("1", 2, z=3), (1, "2", {"z" : 3}))
+
+	def test_defaultsKeptByIdentity(self):
+		sentinel = object()
+		@coerce
+		def f(a:int, b=sentinel):
+			return b
+		self.assertIs(f(1), sentinel)
+
+
+if __name__ == '__main__':
+	unittest.main()
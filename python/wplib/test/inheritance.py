@@ -0,0 +1,44 @@
+from __future__ import annotations
+import typing as T
+
+import unittest
+from collections import abc
+
+from wplib.inheritance import SuperClassLookupMap
+
+
+class TestSuperClassLookupMap(unittest.TestCase):
+	""" """
+
+	def test_lookup(self):
+		"""most specific registered class should win,
+		including abstract classes outside the mro"""
+		class Base: pass
+		class Derived(Base): pass
+		lookupMap = SuperClassLookupMap({object : "object",
+		                                 Base : "base",
+		                                 abc.Mapping : "mapping"})
+		self.assertEqual(lookupMap.lookup(Derived), "base")
+		self.assertEqual(lookupMap.lookup(Derived()), "base")
+		self.assertEqual(lookupMap.lookup(dict), "mapping")
+		self.assertEqual(lookupMap.lookup(int), "object")
+
+	def test_missCacheInvalidation(self):
+		"""misses are cached, and only dropped when a
+		matching type is registered"""
+		class Base: pass
+		class Derived(Base): pass
+		lookupMap = SuperClassLookupMap({int : "int"})
+		self.assertIsNone(lookupMap.lookup(Derived, default=None))
+		self.assertIsNone(lookupMap.lookup(str, default=None))
+		self.assertIn(Derived, lookupMap.cacheMap)
+		self.assertRaises(KeyError, lookupMap.lookup, Derived)
+
+		lookupMap.updateClassMap({Base : "base"})
+		self.assertNotIn(Derived, lookupMap.cacheMap)
+		self.assertIn(str, lookupMap.cacheMap)
+		self.assertEqual(lookupMap.lookup(Derived), "base")
+
+		# functions could match anything
+		lookupMap.updateClassMap({(lambda x: x is str) : "fn"})
+		self.assertEqual(lookupMap.lookup(str), "fn")
@@ -0,0 +1,80 @@
+from __future__ import annotations
+import typing as T
+
+import unittest
+
+from wplib.object.override import OverrideProvider, getOverride
+
+
+class Node(OverrideProvider):
+	def __init__(self, parent:Node=None):
+		super().__init__()
+		self.parent = parent
+
+	def _getOverrideAncestors(self, forKey="") ->T.Iterable[OverrideProvider]:
+		return (self.parent, )
+
+
+class TestOverride(unittest.TestCase):
+	""" """
+
+	def test_cachedOverride(self):
+		"""cached results should be dropped when any
+		ancestor sets an override"""
+		root = Node()
+		branch = Node(root)
+		leaf = Node(branch)
+		self.assertIsNone(leaf.getOverride("a", default=None))
+		self.assertRaises(KeyError, leaf.getOverride, "a")
+
+		root.setOverride("a", 1)
+		self.assertEqual(leaf.getOverride("a"), 1)
+		self.assertIs(leaf.getOverride("a", returnValue=False, returnProvider=True),
+		              root)
+
+		branch.setOverride("a", 2)
+		self.assertEqual(leaf.getOverride("a"), 2)
+		self.assertEqual(leaf.getOverride("a", onlyFirst=False),
+		                 [(branch, 2), (root, 1)])
+
+	def test_freeGetOverride(self):
+		"""free function should walk up from each provider in turn"""
+		root = Node()
+		leaf = Node(Node(root))
+		root.setOverride("a", 1)
+		self.assertEqual(
+			getOverride(leaf, "a", "_overrides",
+			            getAncestorsFn=lambda x: (x.parent, )),
+			1)
+
+	def test_freeGetOverrideCache(self):
+		"""inline ancestor lambdas should share one cache entry,
+		and walks through plain objects shouldn't be cached"""
+		root = Node()
+		leaf = Node(Node(root))
+		root.setOverride("a", 1)
+		for i in range(10):
+			getOverride(leaf, "a", "_overrides",
+			            getAncestorsFn=lambda x: (x.parent, ))
+		self.assertEqual(len(leaf._getOverrideCache()), 1)
+
+		# ancestor that isn't a provider - edits to it bump nothing
+		class Plain:
+			def __init__(self):
+				self._overrides = {}
+				self.parent = None
+		plain = Plain()
+		mixed = Node(plain)
+		getAncestors = lambda x: (x.parent, )
+		self.assertIsNone(getOverride(mixed, "a", "_overrides",
+		                              getAncestorsFn=getAncestors, default=None))
+		plain._overrides["a"] = 3
+		self.assertEqual(getOverride(mixed, "a", "_overrides",
+		                             getAncestorsFn=getAncestors), 3)
+		self.assertEqual(len(mixed._getOverrideCache()), 0)
+
+		# closures aren't cached, captured values may change
+		parents = {leaf : root}
+		getOverride(leaf, "b", "_overrides", default=None,
+		            getAncestorsFn=lambda x: (parents.get(x), ))
+		self.assertEqual(len(leaf._getOverrideCache()), 1)
@@ -0,0 +1,98 @@
+from __future__ import annotations
+import typing as T
+
+import threading, unittest
+
+from wplib import time as wptime
+from wplib.time import (profiled, profileScope, profiling, profileTree,
+                        profileTrees, collapsedStacks, enableProfiling, TimeBlock)
+
+
+@profiled("outer")
+def outer(n):
+	for i in range(n):
+		inner()
+
+@profiled
+def inner():
+	with profileScope("leaf"):
+		pass
+
+
+class TestProfile(unittest.TestCase):
+
+	def tearDown(self):
+		enableProfiling(False)
+
+	def test_disabled(self):
+		"""nothing recorded, and no timing taken, while disabled"""
+		wptime.resetProfile()
+		calls = []
+		realCounter = wptime.perf_counter
+		wptime.perf_counter = lambda : calls.append(1) or realCounter()
+		try:
+			outer(3)
+		finally:
+			wptime.perf_counter = realCounter
+		self.assertEqual(calls, [])
+		self.assertEqual(profileTree().children, {})
+
+	def test_tree(self):
+		with profiling() as root:
+			outer(3)
+			outer(2)
+		outerNode = root.children["outer"]
+		innerNode = outerNode.children[f"{__name__}.inner"]
+		leafNode = innerNode.children["leaf"]
+		self.assertEqual(outerNode.count, 2)
+		self.assertEqual(innerNode.count, 5)
+		self.assertEqual(leafNode.count, 5)
+		self.assertGreaterEqual(outerNode.total, innerNode.total)
+		self.assertAlmostEqual(outerNode.selfTime + innerNode.total, outerNode.total)
+		self.assertGreaterEqual(outerNode.max, outerNode.total / 2)
+		self.assertIn("leaf", root.report())
+
+	def test_timeBlock(self):
+		with profiling() as root:
+			with TimeBlock("block") as t:
+				outer(1)
+		self.assertGreater(t.time, 0)
+		self.assertEqual(root.children["block"].count, 1)
+		self.assertIn("outer", root.children["block"].children)
+
+	def test_threads(self):
+		with profiling() as root:
+			thread = threading.Thread(target=outer, args=(4, ), name="profileWorker")
+			thread.start()
+			thread.join()
+		self.assertNotIn("outer", root.children)
+		outerNode = profileTrees()["profileWorker"].children["outer"]
+		self.assertEqual(outerNode.count, 1)
+		self.assertEqual(outerNode.children[f"{__name__}.inner"].count, 4)
+
+	def test_collapsedStacks(self):
+		with profiling():
+			outer(2)
+		lines = collapsedStacks().splitlines()
+		self.assertTrue(lines)
+		for line in lines:
+			stack, micros = line.rsplit(" ", 1)
+			self.assertTrue(stack.startswith("outer"))
+			self.assertGreater(int(micros), 0)
+
+	def test_disabledMidScope(self):
+		"""scopes open across a disable / enable are dropped cleanly"""
+		enableProfiling()
+		scope = profileScope("stale")
+		scope.__enter__()
+		enableProfiling(False)
+		enableProfiling()
+		with profileScope("fresh"):
+			pass
+		scope.__exit__(None, None, None)
+		self.assertEqual(profileTree().children["fresh"].count, 1)
+		self.assertEqual(profileTree().children["stale"].count, 0)
+
+
+if __name__ == '__main__':
+	unittest.main()
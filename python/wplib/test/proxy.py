@@ -67,3 +67,26 @@ class TestProxy(unittest.TestCase):
 		self.assertEqual(baseObj, getProxy)
 		self.assertEqual(getProxy, baseObj)
 
+
+	def test_classCacheKeepsTypes(self):
+		"""generated classes should persist across alternating
+		target types, not be rebuilt each time"""
+		listCls = type(Proxy([1, 2]))
+		dictCls = type(Proxy({"a" : 1}))
+		self.assertIs(type(Proxy([3, 4])), listCls)
+		self.assertIs(type(Proxy({"b" : 2})), dictCls)
+
+	def test_passthroughMethods(self):
+		"""passthrough methods should skip call hooks"""
+		calls = []
+		class CountProxy(Proxy):
+			_proxyPassthroughMethods = frozenset(("__len__", ))
+			def _beforeProxyCall(self, methodName, *args, **kwargs):
+				calls.append(methodName)
+				return super()._beforeProxyCall(methodName, *args, **kwargs)
+
+		p = CountProxy([1, 2, 3], )
+		self.assertEqual(len(p), 3)
+		self.assertEqual(calls, [])
+		self.assertEqual(p[0], 1)
+		self.assertEqual(calls, ["__getitem__"])
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import unittest
+
+import numpy as np
+
+from wplib.maths import shape
+
+
+class TestBatchedSegments(unittest.TestCase):
+
+	def _check(self, segments, points):
+		params, positions, distances = shape.closestOnSegments(segments, points)
+		self.assertEqual(params.shape, (len(points), len(segments)))
+		self.assertEqual(positions.shape, (len(points), len(segments), points.shape[1]))
+		for n, point in enumerate(points):
+			for m, seg in enumerate(segments):
+				pos = shape.closestPosOnSegment(seg, point)
+				self.assertAlmostEqual(params[n, m], shape.closestParamOnSegment(seg, point))
+				np.testing.assert_allclose(positions[n, m], pos, atol=1e-9)
+				self.assertAlmostEqual(distances[n, m], np.linalg.norm(point - pos))
+
+	def test_matchesScalar2d(self):
+		rng = np.random.default_rng(4)
+		segments = rng.uniform(-10, 10, (30, 2, 2))
+		points = rng.uniform(-15, 15, (40, 2))
+		self._check(segments, points)
+
+	def test_matchesScalar3d(self):
+		rng = np.random.default_rng(5)
+		segments = rng.uniform(-10, 10, (20, 2, 3))
+		points = rng.uniform(-15, 15, (25, 3))
+		self._check(segments, points)
+
+	def test_singlePoint(self):
+		segments = np.array([[(0, 0), (2, 0)], [(0, 1), (0, 3)]], dtype=float)
+		distances = shape.distancesToSegments(segments, (1, 1))
+		np.testing.assert_allclose(distances, [[1.0, 1.0]])
+		np.testing.assert_allclose(shape.closestPosOnSegments(segments, (3, 0))[0],
+		                           [(2, 0), (0, 1)])
+
+	def test_degenerateSegment(self):
+		segments = np.array([[(1, 1), (1, 1)]], dtype=float)
+		params, positions, distances = shape.closestOnSegments(segments, [(4, 5)])
+		self.assertEqual(params[0, 0], 0.0)
+		self.assertAlmostEqual(distances[0, 0], 5.0)
+
+	def test_polygonSegments(self):
+		points = np.array([(0, 0), (1, 0), (1, 1)], dtype=float)
+		segments = shape.polygonSegments(points)
+		self.assertEqual(segments.shape, (3, 2, 2))
+		np.testing.assert_array_equal(segments[2], [(1, 1), (0, 0)])
+		self.assertEqual(shape.polygonSegments(points, closed=False).shape, (2, 2, 2))
+		np.testing.assert_allclose(shape.distancesToPoints(points, (0, 2)),
+		                           [[2.0, 5 ** 0.5, 2 ** 0.5]])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,41 @@
+from __future__ import annotations
+import typing as T
+
+import unittest
+
+from wplib.object import SparseList
+
+
+class TestSparseList(unittest.TestCase):
+	""" """
+
+	def test_order(self):
+		"""iteration should follow index order
+		however items were inserted"""
+		s = SparseList.fromIndicesAndValues([5, 1, 3], ["e", "a", "c"])
+		self.assertEqual(s.indices(), [1, 3, 5])
+		s[2] = "b"
+		s[10] = "j"
+		s[0] = "z"
+		self.assertEqual(s.indices(), [0, 1, 2, 3, 5, 10])
+		self.assertEqual(list(s), ["z", "a", "b", "c", "e", "j"])
+		del s[0]
+		self.assertEqual(s.enum()[0], (1, "a"))
+		self.assertRaises(IndexError, s.__getitem__, 0)
+
+		s.update({4 : "d", 2 : "B", -1 : "y"})
+		self.assertEqual(s.indices(), [-1, 1, 2, 3, 4, 5, 10])
+		self.assertEqual(s[2], "B")
+
+	def test_rangeQueries(self):
+		s = SparseList.fromTies([(10, "a"), (20, "b"), (30, "c")])
+		self.assertEqual(s.floor(25), (20, "b"))
+		self.assertEqual(s.floor(20), (20, "b"))
+		self.assertIsNone(s.floor(5))
+		self.assertEqual(s.ceil(25), (30, "c"))
+		self.assertEqual(s.ceil(10), (10, "a"))
+		self.assertIsNone(s.ceil(31))
+
+		self.assertEqual(s.slice(10, 30).enum(), [(10, "a"), (20, "b")])
+		self.assertEqual(s[15:].enum(), [(20, "b"), (30, "c")])
+		self.assertEqual(len(s.slice(11, 19)), 0)
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import unittest
+import random
+
+from wplib.maths.spatial import PointGrid
+
+
+class TestPointGrid(unittest.TestCase):
+
+	def test_nearestMatchesBruteForce(self):
+		rng = random.Random(3)
+		grid = PointGrid(50)
+		points = {i : (rng.uniform(-1000, 1000), rng.uniform(-1000, 1000))
+		          for i in range(2000)}
+		for k, v in points.items():
+			grid.insert(k, v)
+		# move some, remove some
+		for k in range(0, 2000, 7):
+			points[k] = (rng.uniform(-1000, 1000), rng.uniform(-1000, 1000))
+			grid.insert(k, points[k])
+		for k in range(0, 2000, 11):
+			points.pop(k)
+			grid.remove(k)
+		self.assertEqual(len(grid), len(points))
+
+		for i in range(200):
+			query = (rng.uniform(-1000, 1000), rng.uniform(-1000, 1000))
+			dists = {k : ((v[0] - query[0]) ** 2 + (v[1] - query[1]) ** 2) ** 0.5
+			         for k, v in points.items() if k % 2}
+			inRange = {k : d for k, d in dists.items() if d <= 50}
+			result = grid.nearest(query, 50, filterFn=lambda k : k % 2)
+			if not inRange:
+				self.assertIsNone(result)
+				continue
+			expected = min(inRange, key=inRange.get)
+			self.assertEqual(result[0], expected)
+			self.assertAlmostEqual(result[2], inRange[expected])
+
+	def test_radiusLargerThanCell(self):
+		grid = PointGrid(10)
+		grid.insert("a", (0, 0, 0))
+		self.assertIsNone(grid.nearest((25, 0, 0), 20))
+		self.assertEqual(grid.nearest((25, 0, 0), 30)[0], "a")
+
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import unittest
+
+from wplib.codegen.strtemplate import (
+	CodeWriter, ClassTemplate, FunctionTemplate, FunctionCallTemplate, IfBlock,
+	Assign, Comment, Literal, TextBlock, renderTemplates)
+
+
+class TestCodeWriter(unittest.TestCase):
+
+	def test_indentSkipsBlankLines(self):
+		writer = CodeWriter()
+		writer.write("a\n")
+		with writer.indented():
+			writer.write("b\n\n  \nc")
+			writer.write(" = d\n")
+		writer.write("e")
+		self.assertEqual(writer.getvalue(), "a\n\tb\n\n  \n\tc = d\ne")
+
+
+class TestTemplates(unittest.TestCase):
+
+	def test_nestedClass(self):
+		method = FunctionTemplate(
+			"fn", ["self", ("b", int)], {"c" : 3},
+			fnBody=TextBlock("x = 1\n\nreturn x"),
+			fnDecorator="classmethod", returnType="int")
+		inner = ClassTemplate(
+			"Inner", ("Base", ),
+			classLines=[Assign(("a", "int"), FunctionCallTemplate(
+				"f", ((Literal("s"), ), {})))],
+			classMethods=[method])
+		outer = ClassTemplate("Outer", (), classLines=[Comment("hi"), inner])
+		self.assertEqual(str(outer), "\n".join([
+			"class Outer:",
+			"\t# hi",
+			"\tclass Inner(Base):",
+			"\t\ta : int = f(\"s\")",
+			"\t\t@classmethod",
+			"\t\tdef fn(self ,",
+			"\t\t\tb:int ,",
+			"\t\t\tc=3)->int:",
+			"\t\t\tx = 1",
+			"",
+			"\t\t\treturn x",
+			"\t\tpass",
+			"\tpass",
+		]))
+
+	def test_emptySectionsSkipped(self):
+		cls = ClassTemplate("C", (), classLines=[Comment()])
+		self.assertEqual(str(cls), "class C:\n\tpass")
+
+	def test_ifBlock(self):
+		block = IfBlock([["T.TYPE_CHECKING", ["import a", ClassTemplate("C", ())]]])
+		self.assertEqual(str(block), "if T.TYPE_CHECKING:\n\timport a\n\tclass C:\n\t\tpass")
+
+	def test_renderTemplates(self):
+		self.assertEqual(renderTemplates([Assign("a", "1"), Assign("b", "2")]),
+		                 "a = 1\nb = 2")
+
+
+if __name__ == '__main__':
+	unittest.main()
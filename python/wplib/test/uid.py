@@ -0,0 +1,55 @@
+from __future__ import annotations
+import typing as T
+
+import itertools, random, unittest, uuid
+
+from wplib import uid
+from wplib.object.element import UidElement
+
+
+class TestUid(unittest.TestCase):
+
+	def test_fastUids(self):
+		uids = [uid.getFastUid() for i in range(10000)]
+		self.assertEqual(len(set(uids)), len(uids))
+		for i in uids[:10]:
+			# same shape as uuid4 strings in saved data
+			self.assertEqual(str(uuid.UUID(i)), i)
+		self.assertEqual(len({i[:4] for i in uids[:100]}), 100)
+
+	def test_counterRollover(self):
+		"""prefix is redrawn once the counter runs out"""
+		prefix = uid._fastUidState[0]
+		uid._fastUidState = (prefix, itertools.count(uid._COUNTER_MAX))
+		self.assertEqual(uid.getFastUid()[:8], "00000000")
+		self.assertNotEqual(uid._fastUidState[0], prefix)
+
+	def test_prefixMatchesCounter(self):
+		"""a uid drawn from a replaced counter keeps that counter's prefix,
+		even if another thread reseeds mid-call"""
+		oldState = uid._fastUidState
+		class _ReseedingCounter:
+			def __next__(self):
+				uid._reseedFastUids()
+				return 0
+		uid._fastUidState = (oldState[0], _ReseedingCounter())
+		result = uid.getFastUid()
+		self.assertTrue(result.endswith(oldState[0]))
+		self.assertNotEqual(uid._fastUidState[0], oldState[0])
+
+	def test_seededUid(self):
+		state = random.getstate()
+		self.assertEqual(uid.getUid4(seed="a"), uid.getUid4(seed="a"))
+		self.assertNotEqual(uid.getUid4(seed="a"), uid.getUid4(seed="b"))
+		self.assertEqual(random.getstate(), state)
+
+	def test_element(self):
+		a = UidElement()
+		b = UidElement()
+		self.assertNotEqual(a.uid, b.uid)
+		self.assertIs(UidElement.getByIndex(b.uid), b)
+		self.assertEqual(UidElement.getNewElementId(seed=3), uid.getUid4(seed=3))
+
+
+if __name__ == '__main__':
+	unittest.main()
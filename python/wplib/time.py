@@ -1,6 +1,6 @@
 from __future__ import annotations
 import types, typing as T
-import pprint
+import pprint, threading, functools
 from wplib import log
 
 
@@ -23,13 +23,258 @@ class TimeBlock:
 		     eg to start/stop timer
 	"""
 
-	def __init__(self):
+	def __init__(self, name:str=None):
+		"""if name is given, block is also recorded as a
+		profile scope while profiling is enabled"""
 		self.start = None
+		self.name = name
+		self._frame = None
 	def __enter__(self):
+		if self.name is not None and _profilingEnabled:
+			self._frame = _pushScope(self.name)
 		self.start = perf_counter()
 		return self
 
 	def __exit__(self, type, value, traceback):
 		self.time = perf_counter() - self.start
+		if self._frame is not None:
+			_popScope(self._frame)
+			self._frame = None
 		# self.readout = f'Time: {self.time:.3f} seconds'
-		# print(self.readout)
\ No newline at end of file
+		# print(self.readout)
+
+"""hierarchical profiling -
+
+named scopes nest into a tree per thread, each node gathering call
+count, total, self and max time. scopes are left in permanently -
+while profiling is disabled, they only check a global flag and never
+call perf_counter.
+
+@profiled("wplib.serialise")
+def serialise(obj): ...
+
+with profileScope("resolve"):
+	...
+
+enableProfiling()
+...
+print(profileTree().report())
+Path("out.folded").write_text(collapsedStacks())  # for flamegraph.pl, speedscope etc
+"""
+
+_profilingEnabled = False
+# bumped on each enable, so scopes left open across a disable are dropped
+_profileGeneration = 0
+_threadLocal = threading.local()
+_threadProfiles : dict[int, _ThreadProfile] = {}
+_threadProfilesLock = threading.Lock()
+
+def enableProfiling(state=True):
+	"""scopes only record while profiling is enabled -
+	anything currently open when it's switched on isn't counted"""
+	global _profilingEnabled, _profileGeneration
+	if state and not _profilingEnabled:
+		_profileGeneration += 1
+	_profilingEnabled = bool(state)
+
+def profilingEnabled()->bool:
+	return _profilingEnabled
+
+
+class ProfileNode:
+	"""aggregated timings for one named scope at one place in the tree"""
+	__slots__ = ("name", "parent", "children", "count", "total", "childTime", "max")
+
+	def __init__(self, name:str, parent:ProfileNode=None):
+		self.name = name
+		self.parent = parent
+		self.children : dict[str, ProfileNode] = {}
+		self.count = 0
+		self.total = 0.0
+		self.childTime = 0.0
+		self.max = 0.0
+
+	def __repr__(self):
+		return f"<{type(self).__name__}({self.name}, count={self.count}, total={self.total:.6f})>"
+
+	@property
+	def selfTime(self)->float:
+		"""time spent in this scope, outside of any child scopes"""
+		return self.total - self.childTime
+
+	def child(self, name:str)->ProfileNode:
+		try:
+			return self.children[name]
+		except KeyError:
+			node = self.children[name] = ProfileNode(name, self)
+			return node
+
+	def iterNodes(self, _path:tuple=())->T.Iterator[tuple[tuple[str, ...], ProfileNode]]:
+		"""yield (path of names, node) for every node below this one"""
+		for node in self.children.values():
+			path = _path + (node.name, )
+			yield path, node
+			yield from node.iterNodes(path)
+
+	def collapsedStacks(self, prefix:tuple[str, ...]=())->list[str]:
+		"""lines of "a;b;c <self microseconds>" - the folded stack
+		format read by flamegraph.pl, speedscope, inferno etc"""
+		lines = []
+		for path, node in self.iterNodes():
+			micros = round(node.selfTime * 1e6)
+			if micros > 0:
+				lines.append(f"{';'.join(prefix + path)} {micros}")
+		return lines
+
+	def report(self, minTime:float=0.0)->str:
+		"""readable indented table of everything below this node"""
+		lines = [f"{'scope':<48} {'count':>8} {'total':>10} {'self':>10} {'max':>10}"]
+		for path, node in self.iterNodes():
+			if node.total < minTime:
+				continue
+			name = "  " * (len(path) - 1) + node.name
+			lines.append(f"{name:<48} {node.count:>8} {node.total:>10.4f} "
+			             f"{node.selfTime:>10.4f} {node.max:>10.4f}")
+		return "\n".join(lines)
+
+
+class _ThreadProfile:
+	__slots__ = ("root", "stack", "generation")
+
+	def __init__(self, name:str):
+		self.root = ProfileNode(name)
+		# [ [node, start time] ] for each open scope
+		self.stack : list[list] = []
+		self.generation = _profileGeneration
+
+def _threadProfile()->_ThreadProfile:
+	try:
+		return _threadLocal.profile
+	except AttributeError:
+		thread = threading.current_thread()
+		profile = _threadLocal.profile = _ThreadProfile(thread.name)
+		with _threadProfilesLock:
+			_threadProfiles[thread.ident] = profile
+		return profile
+
+def _pushScope(name:str)->list:
+	profile = _threadProfile()
+	if profile.generation != _profileGeneration:
+		profile.stack.clear()
+		profile.generation = _profileGeneration
+	parent = profile.stack[-1][0] if profile.stack else profile.root
+	frame = [parent.child(name), 0.0]
+	profile.stack.append(frame)
+	frame[1] = perf_counter()
+	return frame
+
+def _popScope(frame:list):
+	elapsed = perf_counter() - frame[1]
+	stack = _threadProfile().stack
+	if not stack or stack[-1] is not frame:
+		# scope outlived a reset, or an inner one never closed
+		if frame not in stack:
+			return
+		while stack[-1] is not frame:
+			stack.pop()
+	stack.pop()
+	node : ProfileNode = frame[0]
+	node.count += 1
+	node.total += elapsed
+	if elapsed > node.max:
+		node.max = elapsed
+	node.parent.childTime += elapsed
+
+
+class _ProfileScope:
+	__slots__ = ("name", "frame")
+
+	def __init__(self, name:str):
+		self.name = name
+		self.frame = None
+
+	def __enter__(self):
+		self.frame = _pushScope(self.name)
+		return self
+
+	def __exit__(self, excType, excVal, excTb):
+		_popScope(self.frame)
+
+class _NullScope:
+	__slots__ = ()
+	def __enter__(self):
+		return self
+	def __exit__(self, excType, excVal, excTb):
+		pass
+
+_nullScope = _NullScope()
+
+def profileScope(name:str)->(_ProfileScope, _NullScope):
+	"""context manager timing its block under given name,
+	nested under any scope open around it on this thread"""
+	if not _profilingEnabled:
+		return _nullScope
+	return _ProfileScope(name)
+
+def profiled(name:(str, T.Callable)=None):
+	"""decorator timing each call to function as a scope -
+	use bare, or pass a name to use instead of function's qualname"""
+	def _decorator(fn:T.Callable):
+		scopeName = name if isinstance(name, str) else f"{fn.__module__}.{fn.__qualname__}"
+		@functools.wraps(fn)
+		def _profiledFn(*args, **kwargs):
+			if not _profilingEnabled:
+				return fn(*args, **kwargs)
+			frame = _pushScope(scopeName)
+			try:
+				return fn(*args, **kwargs)
+			finally:
+				_popScope(frame)
+		return _profiledFn
+	if callable(name):
+		return _decorator(name)
+	return _decorator
+
+def profileTree()->ProfileNode:
+	"""root profile node for current thread"""
+	return _threadProfile().root
+
+def profileTrees()->dict[str, ProfileNode]:
+	"""{ thread name : root profile node } for every thread that's profiled"""
+	result = {}
+	with _threadProfilesLock:
+		for ident, profile in _threadProfiles.items():
+			name = profile.root.name
+			result[f"{name}-{ident}" if name in result else name] = profile.root
+	return result
+
+def resetProfile():
+	"""clear all timings on all threads - scopes open
+	right now are dropped when they close"""
+	global _profileGeneration
+	_profileGeneration += 1
+	with _threadProfilesLock:
+		for i in _threadProfiles.values():
+			i.root.children.clear()
+			i.root.childTime = 0.0
+
+def collapsedStacks(byThread=False)->str:
+	"""folded stack text for all threads -
+	if byThread, each stack starts with its thread name"""
+	lines = []
+	for threadName, root in profileTrees().items():
+		lines.extend(root.collapsedStacks((threadName, ) if byThread else ()))
+	return "\n".join(lines) + "\n" if lines else ""
+
+@contextmanager
+def profiling(reset=True):
+	"""enable profiling for the duration of block,
+	yielding current thread's root node"""
+	wasEnabled = _profilingEnabled
+	if reset:
+		resetProfile()
+	enableProfiling()
+	try:
+		yield profileTree()
+	finally:
+		enableProfiling(wasEnabled)
@@ -5,7 +5,7 @@ import uuid
 
 """lib for uids and identifiers"""
 
-import json, random
+import json, random, os, itertools, threading
 import typing as T
 
 # from ..lib.path import Path
@@ -30,11 +30,61 @@ import typing as T
 # 	return str(uuid.uuid4())
 
 def getUid4(seed=None, nWords=3):
-	"""return a sequence of random words from list -
-	currently a 1 in 1 trillion chance of collision
+	"""return a uuid4 string - if seed is given, the same seed
+	always gives the same uid, without touching global random state
 	"""
 	if seed is not None:
-		random.seed(seed)
+		return str(uuid.UUID(int=random.Random(seed).getrandbits(128), version=4))
+	return str(uuid.uuid4())
+
+
+"""fast uids -
+uuid4 costs an os.urandom call and formatting per uid. fast uids
+are still 36-char uuid-shaped strings, so they sit alongside uuid4s
+in saved data - the last 28 chars are a random per-process prefix,
+the first 8 a counter scrambled by an odd multiplier (so it stays
+unique, but the start of each uid still varies for display).
+
+the prefix is drawn from os.urandom, never the random module, and
+redrawn in forked children and whenever the counter runs out.
+"""
+
+# set False to go back to uuid4 for every new uid
+useFastUids = True
+
+_COUNTER_MAX = 2 ** 32
+_COUNTER_SCRAMBLE = 0x9E3779B1 # odd, so multiplying is a bijection mod 2 ** 32
+# (prefix, counter) - always swapped together, so a counter
+# value is only ever formatted with the prefix it was drawn for
+_fastUidState : tuple[str, T.Iterator[int]] = ("", iter(()))
+_fastUidLock = threading.Lock()
+
+def _reseedFastUids():
+	global _fastUidState
+	h = os.urandom(12).hex()
+	_fastUidState = (f"-{h[:4]}-{h[4:8]}-{h[8:12]}-{h[12:]}", itertools.count())
+
+_reseedFastUids()
+if hasattr(os, "register_at_fork"):
+	os.register_at_fork(after_in_child=_reseedFastUids)
+
+def getFastUid()->str:
+	"""return a new uuid-shaped uid, unique in this process
+	and random across processes"""
+	state = _fastUidState
+	n = next(state[1])
+	if n >= _COUNTER_MAX:
+		with _fastUidLock:
+			# another thread may have already reseeded
+			if _fastUidState is state:
+				_reseedFastUids()
+		return getFastUid()
+	return f"{(n * _COUNTER_SCRAMBLE) & 0xFFFFFFFF:08x}{state[0]}"
+
+def getNewUid()->str:
+	"""uid for a new element, fast or uuid4 depending on useFastUids"""
+	if useFastUids:
+		return getFastUid()
 	return str(uuid.uuid4())
 
 
@@ -2,22 +2,23 @@
 from __future__ import annotations
 import typing as T
 
-import json, sys, os, shutil, time
+import json, sys, os, shutil, time, hashlib
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from typing import TypedDict
 from collections import defaultdict
 from dataclasses import dataclass
 
 import orjson
 
-from wplib import wpstring
+from wplib import wpstring as string
 
 from wptree import Tree
 
 #from wpm import WN, om, cmds
 #from wpm.core import getMFn
 
-from wplib.codegen.strtemplate import ClassTemplate, FunctionCallTemplate, FunctionTemplate, TextBlock, argT, argsKwargsT, Literal, Assign, Import, IfBlock, indent, Comment
+from wplib.codegen.strtemplate import ClassTemplate, FunctionCallTemplate, FunctionTemplate, TextBlock, argT, argsKwargsT, Literal, Assign, Import, IfBlock, indent, Comment, renderTemplates
 #from wptool.codegen import CodeGenProject
 
 """
@@ -126,6 +127,11 @@ jsonPath = Path(__file__).parent / "nodeData.json"
 templatePath = Path(__file__).parent/ "template.py"
 templateStr = templatePath.read_text()
 
+# bump this whenever generation logic changes output for the same
+# node data - template changes are picked up automatically
+GENERATOR_VERSION = 1
+MANIFEST_NAME = "_genManifest.json"
+
 def refPathForNodeType(project:CodeGenProject, nodeType:str):
 	return project.refPath / (nodeType + ".py")
 
@@ -269,7 +275,7 @@ def genNodeFileStr(data:NodeData,
 	)
 
 
-	plugDefStrings = "\n".join([str(i) for i in plugTemplates])
+	plugDefStrings = renderTemplates(plugTemplates)
 
 	# write out final file
 	fileName = nodeType + ".py"
@@ -282,11 +288,69 @@ def genNodeFileStr(data:NodeData,
 	return fileContent
 
 
+def generatorHash()->str:
+	"""hash of everything outside node data that affects generated files"""
+	h = hashlib.sha1()
+	h.update(str(GENERATOR_VERSION).encode())
+	h.update(templateStr.encode())
+	return h.hexdigest()
+
+def nodeDataHash(rawData:dict, inheritedAttrNames:T.Iterable[str],
+                 genHash:str)->str:
+	"""hash of a node's own data, and the attribute names it inherits
+	from its bases - those decide which plugs it redeclares"""
+	h = hashlib.sha1(genHash.encode())
+	h.update(orjson.dumps(rawData, option=orjson.OPT_SORT_KEYS))
+	h.update("\n".join(sorted(inheritedAttrNames)).encode())
+	return h.hexdigest()
+
+def writeIfChanged(path:Path, text:str)->bool:
+	"""write text to path only if it differs from what's there -
+	written to a temp file and swapped in, so nothing ever imports
+	half a file.
+	:return True if file was written"""
+	try:
+		if path.read_text() == text:
+			return False
+	except FileNotFoundError:
+		pass
+	tempPath = path.with_name(path.name + ".tmp")
+	tempPath.write_text(text)
+	os.replace(tempPath, path)
+	return True
+
+def readManifest(genDir:Path)->dict:
+	try:
+		return orjson.loads((genDir / MANIFEST_NAME).read_bytes())
+	except (FileNotFoundError, orjson.JSONDecodeError):
+		return {}
+
+def writeManifest(genDir:Path, manifest:dict):
+	writeIfChanged(genDir / MANIFEST_NAME,
+	               orjson.dumps(manifest, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS).decode())
+
+def _genNodeFileStrFromRaw(rawData:dict, baseAttrSetMap:dict[str, set[str]])->tuple[str, str]:
+	"""process pool entrypoint - return (node type, file string)"""
+	nodeData = recoverNodeData(dict(rawData))
+	return nodeData.typeName, genNodeFileStr(
+		data=nodeData, nodeTypeAttrSetMap=dict(baseAttrSetMap))
+
 def genNodes(#project:CodeGenProject
 		genDir:Path = Path(__file__).parent.parent / "gen",
 		onlyTransform=False,
+		force=False,
+		processes:int=None,
              ):
-	"""generate nodes from json data"""
+	"""generate nodes from json data
+
+	only nodes whose data, inherited attributes or generator version have
+	changed since the last run are regenerated - hashes are kept in a
+	manifest in the gen folder. Files are only rewritten if their content
+	differs, so unchanged modules keep their mtimes.
+
+	:param force: regenerate every target node regardless of manifest
+	:param processes: worker processes for generation, 0 to run inline
+	"""
 
 	startTime = time.time()
 	with open(jsonPath, "r") as f:
@@ -319,30 +383,57 @@ def genNodes(#project:CodeGenProject
 				targetNodes.append(data)
 
 	# map of { node type : all attr names in that node type }
-	# to avoid duplication
+	# to avoid duplication - gathered up front for every node, so
+	# each node can then be generated independently
 	typeAttrSetMap : dict[str, set[str]] = {}
+	for nameMap in nodeData.values():
+		for name, data in nameMap.items():
+			typeAttrSetMap[data["typeName"]] = {i["name"] for i in data["attrDatas"]}
 
-	genStartTime = time.time()
-	for i in targetNodes:
+	genHash = generatorHash()
+	manifest = readManifest(genDir)
+	oldHashes = manifest.get("nodes", {}) if manifest.get("generator") == genHash else {}
+	newHashes = {} if not onlyTransform else dict(manifest.get("nodes", {}))
 
-		#print("generate node", i["typeName"], "bases", i["bases"])
+	toGen = []
+	for i in targetNodes:
+		baseAttrSetMap = {b : typeAttrSetMap.get(b, set()) for b in i["bases"]}
+		inherited = set().union(*baseAttrSetMap.values())
+		nodeHash = nodeDataHash(i, inherited, genHash)
+		newHashes[i["typeName"]] = nodeHash
+		if not force and oldHashes.get(i["typeName"]) == nodeHash \
+				and (genDir / (i["typeName"] + ".py")).exists():
+			continue
+		toGen.append((i, baseAttrSetMap))
 
-		# recover node data from json
-		nodeData = recoverNodeData(i)
-		# generate node file to write
-		nodeFileStr = genNodeFileStr(
-			data=nodeData, nodeTypeAttrSetMap=typeAttrSetMap)
+	genStartTime = time.time()
+	if processes == 0 or len(toGen) < 2:
+		results = [_genNodeFileStrFromRaw(*i) for i in toGen]
+	else:
+		with ProcessPoolExecutor(max_workers=processes) as pool:
+			results = list(pool.map(_genNodeFileStrFromRaw,
+			                        *zip(*toGen),
+			                        chunksize=max(1, len(toGen) // 64)))
 
+	nWritten = 0
+	for typeName, nodeFileStr in results:
 		# write to gen folder
-		genPathForNodeType(nodeData.typeName).write_text(nodeFileStr)
-		pass
-	print("generated {} nodes in {}".format(
-		len(targetNodes), time.time() - genStartTime) )
+		nWritten += writeIfChanged((genDir / (typeName + ".py")), nodeFileStr)
+
+	# remove files for node types that no longer exist
+	if not onlyTransform:
+		for typeName in set(oldHashes) - set(newHashes):
+			(genDir / (typeName + ".py")).unlink(missing_ok=True)
+
+	writeManifest(genDir, {"generator" : genHash, "nodes" : newHashes})
+	print("generated {} of {} nodes, wrote {} files in {}".format(
+		len(toGen), len(targetNodes), nWritten, time.time() - genStartTime) )
 
 def processGenInitFile(initFile:Path,
                        gatherDir:Path,
                        extraImports:list[Import]=(),
                        catalogueBases=(),
+                       templatePath:Path=None,
                        ):
 	"""write out any extra imports in __init__.py files
 	and populate assignments to Catalogue class -
@@ -352,13 +443,16 @@ def processGenInitFile(initFile:Path,
 	type-check-time alternate Catalogue class
 
 	janky args for different behaviour in author vs gen
+
+	if templatePath is given, read the template from there instead
+	of the init file itself
 	"""
-	initFileText = initFile.read_text()
+	initFileText = (templatePath or initFile).read_text()
 
 	# get all imports
 	imports = extraImports or []
 	assignments = []
-	for refFile in gatherDir.iterdir():
+	for refFile in sorted(gatherDir.iterdir()):
 		if refFile.suffix != ".py":
 			continue
 		if refFile.stem == "__init__":
@@ -386,7 +480,7 @@ def processGenInitFile(initFile:Path,
 	initFileText = initFileText.format(
 		TYPE_CHECK_BLOCK=typeCondition)
 
-	initFile.write_text(initFileText)
+	writeIfChanged(initFile, initFileText)
 
 
 genDir = Path(__file__).parent.parent / "gen"
@@ -395,6 +489,8 @@ authorDir = Path(__file__).parent.parent / "author"
 authorInitTemplatePath = Path(__file__).parent / "__authorInit__.py"
 
 def resetGenDir():
+	"""wipe gen folder completely - genNodes() only
+	regenerates changed nodes, use this to start over"""
 
 	# first clear out old stuff
 	shutil.rmtree(genDir, ignore_errors=True)
@@ -410,17 +506,19 @@ if __name__ == '__main__':
 
 	print(genDir, genDir.is_dir())
 
-	resetGenDir()
+	genDir.mkdir(exist_ok=True)
 
 	genNodes()
 
-	processGenInitFile(genDir / "__init__.py", genDir)
+	processGenInitFile(genDir / "__init__.py", genDir,
+	                   templatePath=genInitTemplatePath)
 
 	# import gen catalogue to author init
 	processGenInitFile(
 		authorDir / "__init__.py", authorDir,
 		extraImports=[Import(fromModule="..gen", module="Catalogue", alias="GenCatalogue")],
-		catalogueBases=("GenCatalogue",)
+		catalogueBases=("GenCatalogue",),
+		templatePath=authorInitTemplatePath
 	)
 
 
@@ -3,11 +3,13 @@
 from __future__ import annotations
 import typing as T
 
-import sys, os, json, shutil
+import sys, os, json, shutil, hashlib
 from pathlib import Path
 
 from wplib import log
 
+from .merge import mergeText
+
 class TemplateDir:
 	"""LATER, use tree subclass to allow more complex templates
 	"""
@@ -37,11 +39,13 @@ class CodeGenProject:
 		path need not exist
 
 		"""
-		self.topPath = targetTopDir
+		self.topPath = Path(targetTopDir)
+		# generator functions write here while ref is being regenerated
+		self._refPathOverride : Path = None
 
 	@property
 	def refPath(self)->Path:
-		return self.topPath / "ref"
+		return self._refPathOverride or self.topPath / "ref"
 
 	@property
 	def modifiedPath(self)->Path:
@@ -64,6 +68,33 @@ class CodeGenProject:
 		assert (self.sourceDir / "__modifiedInit__.py").exists(), f"source dir {self.sourceDir} does not contain __modifiedInit__.py"
 
 
+	@property
+	def stateDir(self)->Path:
+		"""manifest of file hashes, and base copies of ref files
+		that modified files were derived from"""
+		return self.topPath / ".codegen"
+
+	@property
+	def manifestPath(self)->Path:
+		return self.stateDir / "manifest.json"
+
+	def baseFilePath(self, name:str)->Path:
+		return self.stateDir / "base" / name
+
+	def readManifest(self)->dict[str, dict[str, str]]:
+		"""{ "ref" : { name : hash }, "gen" : { name : hash } }"""
+		try:
+			manifest = json.loads(self.manifestPath.read_text())
+		except (FileNotFoundError, json.JSONDecodeError):
+			manifest = {}
+		for key in ("ref", "gen", "base"):
+			manifest.setdefault(key, {})
+		return manifest
+
+	def writeManifest(self, manifest:dict):
+		self.stateDir.mkdir(parents=True, exist_ok=True)
+		writeIfChanged(self.manifestPath, json.dumps(manifest, indent=2, sort_keys=True))
+
 	def processTemplate(self, templateFile:Path,
 	                    newName:str,
 	                    newPath:Path,):
@@ -72,66 +103,167 @@ class CodeGenProject:
 		pass
 
 	def mergeModifiedWithNewGen(self,
-	                            oldModifiedPath:Path,
-	                            newGenPath:Path):
-		"""merge modified with new gen,
-		probably delegate to a merger object or something
+	                            baseText:str,
+	                            modifiedText:str,
+	                            newRefText:str)->tuple[str, int]:
+		"""merge modified with new gen - changes made to modified since
+		base are kept, changes made to ref since base are brought in.
+		return (merged text, number of conflicts)
 		"""
-		pass
+		return mergeText(baseText, modifiedText, newRefText,
+		                 oursLabel="modified", theirsLabel="ref")
 
 	def regenerate(self,
+	               genFn:T.Callable[[CodeGenProject], (dict[str, str], None)]=None,
 					checkFirst=True
-	               ):
-		"""regenerate full project
+	               )->dict[str, str]:
+		"""regenerate full project -
+		only files whose content changes are written, nothing
+		is removed and recreated.
+		return { file name : what happened to it in gen }
 		"""
 		log(f"regenerating code for project {self.topPath}")
 		if checkFirst:
 			self.topDirStructureIsValid()
-		# first clear out old stuff
-		shutil.rmtree(self.refPath, ignore_errors=True)
-		self.refPath.mkdir()
-		shutil.rmtree(self.genPath, ignore_errors=True)
-		self.genPath.mkdir()
-
-		if not self.modifiedPath.exists():
-			self.modifiedPath.mkdir()
-		log(f"cleared old ref and gen folders")
+		for i in (self.refPath, self.genPath, self.modifiedPath):
+			i.mkdir(parents=True, exist_ok=True)
 
 		# copy over init files
-		shutil.copy2(self.sourceDir / "__genInit__.py", self.genPath / "__init__.py",
-		            )
-		shutil.copy2(self.sourceDir / "__modifiedInit__.py", self.modifiedPath / "__init__.py")
+		writeIfChanged(self.genPath / "__init__.py",
+		               (self.sourceDir / "__genInit__.py").read_text())
+		if not (self.modifiedPath / "__init__.py").exists():
+			shutil.copy2(self.sourceDir / "__modifiedInit__.py", self.modifiedPath / "__init__.py")
 
-	def populateRefFolder(self, genFn:T.Callable[[CodeGenProject], None]):
+		manifest = self.readManifest()
+		if genFn is not None:
+			self.populateRefFolder(genFn, manifest)
+		result = self.mergeGenModified(manifest)
+		self.writeManifest(manifest)
+		return result
+
+	def _generatedFiles(self, genFn:T.Callable[[CodeGenProject], (dict[str, str], None)]
+	                    )->dict[str, str]:
+		"""run genFn, return { file name : text } -
+		genFn may return that dict directly, or write
+		files into refPath as before"""
+		stagingPath = self.stateDir / "staging"
+		shutil.rmtree(stagingPath, ignore_errors=True)
+		stagingPath.mkdir(parents=True)
+		self._refPathOverride = stagingPath
+		try:
+			result = genFn(self)
+		finally:
+			self._refPathOverride = None
+		if result is None:
+			result = {i.name : i.read_text() for i in stagingPath.iterdir() if i.is_file()}
+		shutil.rmtree(stagingPath, ignore_errors=True)
+		return result
+
+	def populateRefFolder(self, genFn:T.Callable[[CodeGenProject], (dict[str, str], None)],
+	                      manifest:dict=None):
 		"""populate ref folder with generated files -
-		no real need for coupling here
+		only files whose hash changed are written, files no
+		longer generated are removed
 		"""
-		genFn(self)
+		saveManifest = manifest is None
+		manifest = manifest if manifest is not None else self.readManifest()
+		newFiles = self._generatedFiles(genFn)
+		refHashes = manifest["ref"]
+		for name, text in newFiles.items():
+			path = self.refPath / name
+			newHash = textHash(text)
+			if refHashes.get(name) == newHash and path.exists():
+				continue
+			# modified files are merged against the ref they were taken from -
+			# keep it before it's overwritten
+			if ((self.modifiedPath / name).exists() and name not in manifest["base"]
+					and path.exists()):
+				self._saveBase(name, path.read_text(), manifest)
+			writeIfChanged(path, text)
+			refHashes[name] = newHash
+		for name in set(refHashes) - set(newFiles):
+			(self.refPath / name).unlink(missing_ok=True)
+			refHashes.pop(name)
+		if saveManifest:
+			self.writeManifest(manifest)
+
+	def _saveBase(self, name:str, text:str, manifest:dict):
+		path = self.baseFilePath(name)
+		path.parent.mkdir(parents=True, exist_ok=True)
+		writeIfChanged(path, text)
+		manifest["base"][name] = textHash(text)
 
-	def mergeGenModified(self):
-		"""take files from ref to copy to gen, or merge with modified
-		for now just copy everything
+	def rebaseModified(self, name:str, manifest:dict=None):
+		"""mark modified file as up to date with current ref -
+		call after bringing ref changes into modified by hand"""
+		saveManifest = manifest is None
+		manifest = manifest if manifest is not None else self.readManifest()
+		self._saveBase(name, (self.refPath / name).read_text(), manifest)
+		if saveManifest:
+			self.writeManifest(manifest)
+
+	def mergeGenModified(self, manifest:dict=None)->dict[str, str]:
+		"""take files from ref to copy to gen, or merge with modified -
+		return { file name : "unchanged", "copied", "merged", "conflict", "removed" }
 		"""
-		pass
-		#
-		# # first populate ref folder - all generated files
-		# for name in fileNames:
-		# 	newPath = self.refPath / name
-		# 	# copy file
-		# 	shutil.copy(templateFile, newPath)
-		# 	# process file, generate code
-		# 	self.processTemplate(templateFile, name, newPath)
-		#
-		# # compare ref to modified, copy to gen if not found
-		# for refFile in self.refPath.iterdir():
-		# 	modifiedFile = self.modifiedPath / refFile.name
-		# 	if not modifiedFile.exists():
-		# 		shutil.copy(refFile, self.genPath / refFile.name)
-		#
-		# # merge any files in modified with their ref counterparts
-		# for modifiedFile in self.modifiedPath.iterdir():
-		# 	refFile = self.refPath / modifiedFile.name
-		# 	if refFile.exists():
-		# 		self.mergeModifiedWithNewGen(modifiedFile, refFile)
+		saveManifest = manifest is None
+		manifest = manifest if manifest is not None else self.readManifest()
+		genHashes = manifest["gen"]
+		result = {}
+		refNames = set()
+		for refFile in sorted(self.refPath.iterdir()):
+			if not refFile.is_file():
+				continue
+			name = refFile.name
+			refNames.add(name)
+			refText = refFile.read_text()
+			modifiedFile = self.modifiedPath / name
+			if not modifiedFile.exists():
+				text, status = refText, "copied"
+				manifest["base"].pop(name, None)
+				self.baseFilePath(name).unlink(missing_ok=True)
+			else:
+				if name not in manifest["base"]: # modified since this ref
+					self._saveBase(name, refText, manifest)
+				text, nConflicts = self.mergeModifiedWithNewGen(
+					self.baseFilePath(name).read_text(),
+					modifiedFile.read_text(),
+					refText)
+				status = "conflict" if nConflicts else "merged"
+				if nConflicts:
+					log(f"{nConflicts} conflicts merging {modifiedFile} with new ref")
 
+			newHash = textHash(text)
+			genPath = self.genPath / name
+			if genHashes.get(name) == newHash and genPath.exists():
+				result[name] = "unchanged"
+				continue
+			writeIfChanged(genPath, text)
+			genHashes[name] = newHash
+			result[name] = status
 
+		for name in set(genHashes) - refNames:
+			(self.genPath / name).unlink(missing_ok=True)
+			genHashes.pop(name)
+			result[name] = "removed"
+		if saveManifest:
+			self.writeManifest(manifest)
+		return result
+
+
+def textHash(text:str)->str:
+	return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def writeIfChanged(path:Path, text:str)->bool:
+	"""write text to path only if it differs from what's there,
+	through a temp file so nothing reads half a file
+	:return True if file was written"""
+	try:
+		if path.read_text() == text:
+			return False
+	except FileNotFoundError:
+		pass
+	tempPath = path.with_name(path.name + ".tmp")
+	tempPath.write_text(text)
+	os.replace(tempPath, path)
+	return True
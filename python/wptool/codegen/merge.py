@@ -0,0 +1,80 @@
+from __future__ import annotations
+import typing as T
+
+from difflib import SequenceMatcher
+
+"""line-based three-way merge, in the style of diff3 -
+
+lines matched to the base in both other versions are stable,
+and split the files into chunks. in each chunk, if only one side
+changed from base, take that side - if both changed differently,
+write both between conflict markers.
+"""
+
+CONFLICT_START = "<<<<<<<"
+CONFLICT_SEP = "======="
+CONFLICT_END = ">>>>>>>"
+
+def _baseMatches(base:list[str], other:list[str])->dict[int, int]:
+	"""{ base line index : other line index } for matched lines"""
+	result = {}
+	for a, b, size in SequenceMatcher(None, base, other, autojunk=False).get_matching_blocks():
+		for n in range(size):
+			result[a + n] = b + n
+	return result
+
+def _withNewline(lines:list[str])->list[str]:
+	if lines and not lines[-1].endswith("\n"):
+		return lines[:-1] + [lines[-1] + "\n"]
+	return lines
+
+def mergeLines(base:list[str], ours:list[str], theirs:list[str],
+               oursLabel="ours", theirsLabel="theirs")->tuple[list[str], int]:
+	"""merge line lists, each line keeping its line ending -
+	return (merged lines, number of conflicts)"""
+	oursMap = _baseMatches(base, ours)
+	theirsMap = _baseMatches(base, theirs)
+	result = []
+	nConflicts = 0
+	i = j = k = 0
+	while True:
+		# find next base line matched in both, past current positions
+		b = i
+		while b < len(base) and not (
+				b in oursMap and b in theirsMap
+				and oursMap[b] >= j and theirsMap[b] >= k):
+			b += 1
+		if b < len(base):
+			oEnd, tEnd = oursMap[b], theirsMap[b]
+		else:
+			oEnd, tEnd = len(ours), len(theirs)
+
+		baseChunk, oursChunk, theirsChunk = base[i:b], ours[j:oEnd], theirs[k:tEnd]
+		if oursChunk == baseChunk or oursChunk == theirsChunk:
+			result.extend(theirsChunk)
+		elif theirsChunk == baseChunk:
+			result.extend(oursChunk)
+		else:
+			nConflicts += 1
+			result.append(f"{CONFLICT_START} {oursLabel}\n")
+			result.extend(_withNewline(oursChunk))
+			result.append(f"{CONFLICT_SEP}\n")
+			result.extend(_withNewline(theirsChunk))
+			result.append(f"{CONFLICT_END} {theirsLabel}\n")
+
+		if b >= len(base):
+			break
+		result.append(ours[oEnd])
+		i, j, k = b + 1, oEnd + 1, tEnd + 1
+	return result, nConflicts
+
+def mergeText(base:str, ours:str, theirs:str,
+              oursLabel="ours", theirsLabel="theirs")->tuple[str, int]:
+	"""merge strings line by line -
+	return (merged text, number of conflicts)"""
+	lines, nConflicts = mergeLines(
+		base.splitlines(keepends=True),
+		ours.splitlines(keepends=True),
+		theirs.splitlines(keepends=True),
+		oursLabel=oursLabel, theirsLabel=theirsLabel)
+	return "".join(lines), nConflicts
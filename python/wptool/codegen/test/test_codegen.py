@@ -0,0 +1,107 @@
+from __future__ import annotations
+import typing as T
+
+import os, tempfile, shutil, unittest
+from pathlib import Path
+
+from wptool.codegen import CodeGenProject
+from wptool.codegen.merge import mergeText
+
+
+class TestMerge(unittest.TestCase):
+
+	def test_mergeClean(self):
+		base = "a\nb\nc\nd\n"
+		ours = "a\nB\nc\nd\n"
+		theirs = "a\nb\nc\nD\ne\n"
+		text, nConflicts = mergeText(base, ours, theirs)
+		self.assertEqual(nConflicts, 0)
+		self.assertEqual(text, "a\nB\nc\nD\ne\n")
+
+	def test_mergeSameChange(self):
+		text, nConflicts = mergeText("a\nb\n", "a\nx\n", "a\nx\n")
+		self.assertEqual(nConflicts, 0)
+		self.assertEqual(text, "a\nx\n")
+
+	def test_mergeConflict(self):
+		text, nConflicts = mergeText("a\nb\nc\n", "a\nours\nc\n", "a\ntheirs\nc\n",
+		                             oursLabel="modified", theirsLabel="ref")
+		self.assertEqual(nConflicts, 1)
+		self.assertEqual(text,
+			"a\n<<<<<<< modified\nours\n=======\ntheirs\n>>>>>>> ref\nc\n")
+
+
+class TestCodeGenProject(unittest.TestCase):
+
+	def setUp(self):
+		self.tempDir = Path(tempfile.mkdtemp())
+		self.project = CodeGenProject(self.tempDir)
+		self.project.sourceDir.mkdir(parents=True)
+		(self.project.sourceDir / "__genInit__.py").write_text("# gen\n")
+		(self.project.sourceDir / "__modifiedInit__.py").write_text("# modified\n")
+		self.files = {"a.py" : "x = 1\ny = 2\nz = 3\n",
+		              "b.py" : "b = 1\n"}
+
+	def tearDown(self):
+		shutil.rmtree(self.tempDir, ignore_errors=True)
+
+	def genFn(self, project:CodeGenProject):
+		return dict(self.files)
+
+	def test_writingGenFn(self):
+		"""generators can still write into refPath themselves"""
+		def genFn(project:CodeGenProject):
+			(project.refPath / "c.py").write_text("c = 1\n")
+		self.project.regenerate(genFn)
+		self.assertEqual((self.project.refPath / "c.py").read_text(), "c = 1\n")
+		self.assertEqual((self.project.genPath / "c.py").read_text(), "c = 1\n")
+
+	def test_unchangedNotWritten(self):
+		result = self.project.regenerate(self.genFn)
+		self.assertEqual(result, {"a.py" : "copied", "b.py" : "copied"})
+		paths = [self.project.refPath / "a.py", self.project.genPath / "a.py",
+		         self.project.genPath / "__init__.py"]
+		for path in paths:
+			os.utime(path, ns=(0, 0))
+
+		self.files["b.py"] = "b = 2\n"
+		result = self.project.regenerate(self.genFn)
+		self.assertEqual(result, {"a.py" : "unchanged", "b.py" : "copied"})
+		for path in paths:
+			self.assertEqual(path.stat().st_mtime_ns, 0)
+		self.assertEqual((self.project.genPath / "b.py").read_text(), "b = 2\n")
+
+	def test_removedFiles(self):
+		self.project.regenerate(self.genFn)
+		self.files.pop("b.py")
+		result = self.project.regenerate(self.genFn)
+		self.assertEqual(result["b.py"], "removed")
+		self.assertFalse((self.project.refPath / "b.py").exists())
+		self.assertFalse((self.project.genPath / "b.py").exists())
+
+	def test_modifiedMerged(self):
+		# edits on neighbouring lines conflict, as with diff3
+		self.project.regenerate(self.genFn)
+		(self.project.modifiedPath / "a.py").write_text("x = 10\ny = 2\nz = 3\n")
+		self.files["a.py"] = "x = 1\ny = 2\nz = 30\n"
+		result = self.project.regenerate(self.genFn)
+		self.assertEqual(result["a.py"], "merged")
+		self.assertEqual((self.project.genPath / "a.py").read_text(),
+		                 "x = 10\ny = 2\nz = 30\n")
+
+		# same change again leaves gen alone
+		result = self.project.regenerate(self.genFn)
+		self.assertEqual(result["a.py"], "unchanged")
+
+	def test_modifiedConflict(self):
+		self.project.regenerate(self.genFn)
+		(self.project.modifiedPath / "a.py").write_text("x = 1\ny = 20\nz = 3\n")
+		self.files["a.py"] = "x = 1\ny = 5\nz = 3\n"
+		result = self.project.regenerate(self.genFn)
+		self.assertEqual(result["a.py"], "conflict")
+		text = (self.project.genPath / "a.py").read_text()
+		self.assertIn("<<<<<<< modified\ny = 20\n=======\ny = 5\n>>>>>>> ref\n", text)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -1,5 +1,5 @@
 
-import inspect, sys, re, functools, itertools, pprint, ast, textwrap
+import inspect, sys, re, functools, itertools, pprint, ast, textwrap, types
 import typing as T
 
 from weakref import WeakKeyDictionary
@@ -47,17 +47,31 @@ LoopIteration = namedtuple("LoopIteration", ("loopNode", "valueTuple"))
 LoopCallTrace = namedtuple("LoopCallTrace", ("branch", "nCalls"))
 allCalls = {} # type: T.Dict[tuple, LoopCallTrace]
 
-# maps of functions to their decompiled ast trees
-fnAstMap = {} # type: T.Dict[function : ast.AST]
+# maps of code objects to their decompiled ast trees -
+# keyed on code, not functions, since that's all a frame gives us
+codeAstMap = {} # type: T.Dict[types.CodeType, ast.AST]
 
-# maps of individual calls to number of
-# loops directly above each, locally
+# maps of code objects to { absolute line : loops enclosing that line },
+# outermost loop first - built once per code object.
 # this does not track usage of loops, only definitions
-callLocalLoopMap = {} #type: T.Dict[T.Tuple[str, int], T.Tuple]
+codeLoopMap = {} # type: T.Dict[types.CodeType, T.Dict[int, T.Tuple[LoopDef, ...]]]
 
+# loop ast node, with the names its target binds
+LoopDef = namedtuple("LoopDef", ("node", "targetNames"))
 
+# number of calls seen at each (code, line) log site, for sampling
 callStackCountMap = {} #type: T.Dict[T.Tuple, int]
 
+# only record every nth call at each log site -
+# first call is always recorded
+sampleEvery = 1
+
+def setSampling(everyN:int=1):
+	"""record only every nth call to treeLog from each
+	call site - 1 records everything"""
+	global sampleEvery
+	sampleEvery = max(1, int(everyN))
+
 
 def increasingChains(baseSeq):
 	"""For seq ABCD, returns
@@ -73,166 +87,125 @@ class RemoveDefinitionTransformer(ast.NodeTransformer):
 		super(RemoveDefinitionTransformer, self).__init__()
 		self.defCounter = 0
 	def visit_FunctionDef(self, node):
-		print("visit function def", node, node.name, self.defCounter)
 		if self.defCounter:
-			print("remove definition node")
 			return None
 
 		self.defCounter += 1
 		return self.generic_visit(node)
+	visit_AsyncFunctionDef = visit_FunctionDef
+
+
+def astForCode(code:types.CodeType)->(ast.AST, None):
+	"""return ast of code object's source, with any internal
+	definitions removed - None if source can't be found"""
+	try:
+		return codeAstMap[code]
+	except KeyError:
+		pass
+	try:
+		rawNode = ast.parse(textwrap.dedent(inspect.getsource(code)))
+		RemoveDefinitionTransformer().visit(rawNode)
+	except (OSError, TypeError, SyntaxError, IndentationError):
+		# builtins, exec'd code, lambdas and comprehensions mid-expression
+		rawNode = None
+	codeAstMap[code] = rawNode
+	return rawNode
+
+
+def loopLineMap(code:types.CodeType)->T.Dict[int, T.Tuple[LoopDef, ...]]:
+	"""return { absolute line : loops enclosing that line }
+	for code object, outermost first"""
+	try:
+		return codeLoopMap[code]
+	except KeyError:
+		pass
+	result = {}
+	fnAst = astForCode(code)
+	if fnAst is not None:
+		# source from getsource starts at co_firstlineno
+		lineOffset = code.co_firstlineno - 1
+		toVisit = [(i, ()) for i in ast.iter_child_nodes(fnAst)]
+		while toVisit:
+			node, loops = toVisit.pop()
+			if isinstance(node, (ast.For, ast.AsyncFor, ast.While)):
+				loops = loops + (LoopDef(node, loopTargetNames(node)), )
+				for line in range(node.lineno + lineOffset,
+				                  node.end_lineno + lineOffset + 1):
+					result[line] = loops
+			toVisit.extend((i, loops) for i in ast.iter_child_nodes(node))
+	codeLoopMap[code] = result
+	return result
 
 
 def treeLog(msg):
-	print("")
-	stack = inspect.stack()
-	callerFrames = stack[1:-1]
-	reverse_stack = tuple(reversed(stack))
-
-	# test subchains recursively from top-level call -
-	# eg for A ( B ( C () ) ), test
-	# A, then AB, then ABC, etc
-	# this isn't necessary as we have a semi-reliable hash for loops
+	"""log msg under a branch for each function and loop
+	iteration in the current call stack"""
+	logFrame = sys._getframe(1)
+	if sampleEvery > 1:
+		siteKey = (logFrame.f_code, logFrame.f_lineno)
+		nCalls = callStackCountMap.get(siteKey, 0)
+		callStackCountMap[siteKey] = nCalls + 1
+		if nCalls % sampleEvery:
+			return
+
+	# walk up to, but not including, the outermost frame
+	frames = []
+	frame = logFrame
+	while frame.f_back is not None:
+		frames.append(frame)
+		frame = frame.f_back
 
 	pathway = []
-	for i, frameData in enumerate(reversed(callerFrames)
-			):
-
-		# look up function object
-		# first check calling frame's parent's locals
-		# for internally-defined functions
-		frame = frameData.frame
+	for frame in reversed(frames):
 		code = frame.f_code
-		fn_lookup = frame.f_back.f_locals.get(
-			code.co_name,
-			# then check globals
-			frame.f_globals.get(
-				code.co_name)
-		)
-		call = FnCall(fn_lookup, frameData.lineno, frameData.filename)
-		pathway.append(call)
-
-
-		# get any loops in function
-
-		# look up function object
-		# first check calling frame's parent's locals
-		# for internally-defined functions
-		fn_lookup = frame.f_back.f_locals.get(
-				code.co_name,
-			# then check globals
-				frame.f_globals.get(
-					code.co_name
-				)
-			)
-
-		print("fn lookup", fn_lookup)
-
-		astNode = fnAstMap.get(fn_lookup)
-		if astNode is None:
-			transformer = RemoveDefinitionTransformer()
-			rawNode = ast.parse(textwrap.dedent(
-				inspect.getsource(fn_lookup)))
-			transformer.visit(rawNode)
-			astNode = rawNode
-			fnAstMap[fn_lookup] = astNode
-		#print("astnode", astNode)
-
-		"""if log function is directly called in stack, get
-		loops above it - if another function is called next in stack,
-		get loops above that instead"""
-
-		fnLookupName = reverse_stack[ i + 2].frame.f_code.co_name
+		pathway.append(FnCall(code, frame.f_lineno, code.co_filename))
 
-		loops = loopsInFunctionAst(astNode, frame,
-		                           lookupFnName=fnLookupName)
-		print("------")
-		print("found loops", loops)
-
-
-		for loopNode in loops:
-			loopValues = loopValueMap(
-				loopNode, frame.f_locals, frame.f_globals)
-			loopValueHash = dictToHashTuple(loopValues)
-			pathway.append(LoopIteration(loopNode=loopNode,
-			                             valueTuple=loopValueHash))
-	print("path")
-	print(pathway)
+		"""if log function is directly called in frame, get
+		loops above it - if another function is called next in stack,
+		get loops above that instead - either way that's the
+		frame's current line"""
+		loops = loopLineMap(code).get(frame.f_lineno, ())
+		if not loops:
+			continue
+		frameLocals = frame.f_locals
+		for loop in loops:
+			loopValues = loopValueMap(loop, frameLocals)
+			pathway.append(LoopIteration(loopNode=loop.node,
+			                             valueTuple=dictToHashTuple(loopValues)))
 
 	# process pathway for tree to outer function
-	treePath = []
-	niceNames = []
-	for segment in pathway:
-		treePath.append(str(segment))
-		niceNames.append(niceNamePathSegment(segment))
+	niceNames = [niceNamePathSegment(segment) for segment in pathway]
 
 	# add to tree
-	fnBranch = logTree(niceNames)
+	fnBranch = logTree(*niceNames, create=True)
 
-	logFrame = stack[1]
-	lineName = "ln " + str(logFrame.frame.f_lineno)
-	logBranch = fnBranch(lineName)
+	lineName = "ln " + str(logFrame.f_lineno)
+	logBranch = fnBranch(lineName, create=True)
 	logBranch.value = msg
 
 def niceNamePathSegment(segment):
 	if isinstance(segment, FnCall):
-		return segment.fn.__name__
+		return segment.fn.co_name
 	elif isinstance(segment, LoopIteration):
 		valueDisplay = "loop: " + ";".join(
 			i[0] + "=" + i[1] for i in segment.valueTuple)
 		return valueDisplay
 
 
-def loopsInFunctionAst(fnAst, frameObj, lookupFnName=treeLog.__name__):
-	"""fnAst is a dynamic Module ast node """
-	# get local line number of log call within block
-	print("---")
-	code = frameObj.f_code
-	print("frame", frameObj)
-	localLineno = frameObj.f_lineno - code.co_firstlineno
-
-	# remove any internal definitions
-	#pprint.pprint(ast.dump(fnAst))
-
-	# add parent attribute to ast nodes
-	for i in ast.walk(fnAst):
-		for child in ast.iter_child_nodes(i):
-			child.parent = i
-	fnAst.parent = None
-
-	# filter nodes that are function calls
-	#print("lookup fn name", lookupFnName)
-	fnNodes = []
-	for i in ast.walk(fnAst):
-		if isinstance(i, ast.Call) and i.func.id == lookupFnName:
-			fnNodes.append(i)
-
-	#print("localLine", localLineno)
-	for i in fnNodes:
-		maxLine = maxFnCallLine(i) - 1
-		#print("fnNode", i, i.func.id, maxLine)
-	fnPoints = [(i, maxFnCallLine(i) - 1) for i in fnNodes]
-	#print("fnPoints", fnPoints)
-	fnNode = next(filter(lambda x: x[1] == localLineno, fnPoints))[0]
-
-	parents = astParents(fnNode)
-	loops = [i for i in parents if
-	         isinstance(i, (ast.For, ast.While))]
-	# backwards - reverse here
-	loops = list(reversed(loops))
-	return loops
-
-
-def loopValueMap(loopAstNode, frameLocals, frameGlobals):
-	"""iterate over nodes contained in loop target to find
-	the loop's local variables - look them up in frameLocals
+def loopTargetNames(loopAstNode)->T.Tuple[str, ...]:
+	"""names bound by a for loop's target - while loops have none"""
+	target = getattr(loopAstNode, "target", None)
+	if target is None:
+		return ()
+	return tuple(sorted({node.id for node in ast.walk(target)
+	                     if isinstance(node, ast.Name)}))
+
+
+def loopValueMap(loop:LoopDef, frameLocals):
+	"""look up the loop's local variables in frameLocals
 	as a way of identifying this specific iteration"""
-	localNames = set()
-	for node in [loopAstNode.target] + list(ast.iter_child_nodes(loopAstNode.target)):
-		if isinstance(node, ast.Name):
-			localNames.add(node.id)
-	localValues = {name : frameLocals[name] for name in localNames}
-	#print("local values", localValues)
-	return localValues
+	return {name : frameLocals[name] for name in loop.targetNames
+	        if name in frameLocals}
 
 
 def dictToHashTuple(baseDict):
@@ -249,16 +222,6 @@ def astParents(childNode, includeChild=True):
 		node = node.parent
 	return parents
 
-def maxFnCallLine(fnCallNode:ast.Call):
-	"""return max line of any arguments in function call -
-	this line is passed to the frame of the function"""
-	lineNumbers = [(i, i.lineno) for i in ast.walk(fnCallNode)
-		if getattr(i, "lineno", None)]
-	#print(lineNumbers)
-	maxLine = max(i[1] for i in lineNumbers)
-	#print("maxLine", maxLine)
-	return maxLine
-
 
 
 """
@@ -0,0 +1,53 @@
+from __future__ import annotations
+import typing as T
+
+import unittest
+
+from wptree import Tree
+from wptool.treelog import logfn
+from wptool.treelog.logfn import treeLog
+
+
+def _loggingFn():
+	for n in range(2):
+		for i in "ab":
+			treeLog(
+				i + str(n)
+			)
+
+def _loggedLoop(count):
+	for i in range(count):
+		treeLog(i)
+
+
+class TestTreeLog(unittest.TestCase):
+
+	def setUp(self):
+		logfn.logTree = Tree("logRoot")
+		logfn.callStackCountMap.clear()
+
+	def tearDown(self):
+		logfn.setSampling(1)
+
+	def _fnBranch(self, fnName):
+		return next(i for i in logfn.logTree.allBranches() if i.name == fnName)
+
+	def test_loops(self):
+		_loggingFn()
+		fnBranch = self._fnBranch("_loggingFn")
+		self.assertEqual([i.name for i in fnBranch.branches],
+		                 ["loop: n=0", "loop: n=1"])
+		iBranch = fnBranch("loop: n=1", "loop: i=b")
+		self.assertEqual(iBranch.branches[0].value, "b1")
+		self.assertIn(_loggingFn.__code__, logfn.codeLoopMap)
+
+	def test_sampling(self):
+		logfn.setSampling(5)
+		_loggedLoop(12)
+		fnBranch = self._fnBranch("_loggedLoop")
+		self.assertEqual([i.name for i in fnBranch.branches],
+		                 ["loop: i=0", "loop: i=5", "loop: i=10"])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -17,10 +17,13 @@ looking back on it now, I think I lost my mind for a second here
 from __future__ import annotations
 
 from dataclasses import dataclass
+from bisect import bisect_left
+import hashlib, pickle
 
 import typing as T
 
 from wplib.object.namespace import TypeNamespace
+from wplib.sentinel import Sentinel
 from wplib.delta import DeltaAtom, DeltaAid
 from wptree.reference import TreeReference
 #from wplib.object.event import TreeEvent
@@ -94,11 +97,12 @@ class TreeNameDelta(TreeDeltaAtom):
 		"""to reverse name delta, replace last address token
 		with delta result"""
 		#print("undo delta")
-		tempRef = self.branchRef.__copy__()
+		tempRef = self.branchRef
 		# replace ref address last token with new name
-		if tempRef.address:
+		if isinstance(tempRef, TreeReference) and tempRef.address:
+			tempRef = tempRef.__copy__()
 			tempRef.address = tempRef.address[:-1] + [self.newValue]
-		lookupBranch = self.resolveRef(self.branchRef, target)
+		lookupBranch = self.resolveRef(tempRef, target)
 		lookupBranch.setName(self.oldValue)
 
 
@@ -128,6 +132,7 @@ class _TreeCreationDeletionDeltaBase(TreeDeltaAtom):
 	serialData: dict
 	treeType: type = None
 	preserveUid: bool = True
+	index: int = None # index under parent, or append if None
 
 	def createTreeFromData(self, target: TreeInterface) -> TreeInterface:
 		"""create a new tree, of either a type serialised in
@@ -135,7 +140,7 @@ class _TreeCreationDeletionDeltaBase(TreeDeltaAtom):
 		treeType: TreeInterface = self.treeType if self.treeType else target.defaultBranchCls()
 		newTree = treeType.deserialiseSingle(self.serialData, preserveUid=self.preserveUid)  #
 		if self.parentRef is not None:
-			self.resolveRef(self.parentRef, target).addBranch(newTree,  # index=self.index
+			self.resolveRef(self.parentRef, target).addBranch(newTree, index=self.index
 			                                                  )
 		return newTree
 
@@ -204,13 +209,53 @@ class TreePropertyDelta(TreeDeltaAtom):
 
 	def do(self, targetRoot:TreeInterface, refMode=TreeReference.Mode.Uid):
 		# self.resolveRef(self.branchRef, targetRoot).setAuxProperty(self.key, self.newValue)
-		self.resolveRef(self.branchRef, targetRoot)._properties = self.newValue
+		self.resolveRef(self.branchRef, targetRoot)._setRawAuxProperties(self.newValue)
 
 	def undo(self, targetRoot:TreeInterface, refMode=TreeReference.Mode.Uid):
 		#self.resolveRef(self.branchRef, targetRoot).setAuxProperty(self.key, self.oldValue)
-		self.resolveRef(self.branchRef, targetRoot)._properties = self.oldValue
+		self.resolveRef(self.branchRef, targetRoot)._setRawAuxProperties(self.oldValue)
+
+@dataclass
+class TreePropertyKeysDelta(TreePropertyDelta):
+	"""only the property keys that changed - old and new values
+	hold just those keys, with Sentinel.FailToFind marking a key
+	that didn't exist on that side"""
 
-treeDeltaClasses = (TreeNameDelta, TreeValueDelta, TreePropertyDelta, TreeMoveDelta, TreeCreationDelta, TreeDeletionDelta)
+	@classmethod
+	def fromPropertyDelta(cls, delta:TreePropertyDelta)->TreePropertyKeysDelta:
+		old, new = delta.oldValue or {}, delta.newValue or {}
+		oldKeys, newKeys = {}, {}
+		for k in old.keys() | new.keys():
+			oldVal = old.get(k, Sentinel.FailToFind)
+			newVal = new.get(k, Sentinel.FailToFind)
+			if oldVal is newVal:
+				continue
+			try:
+				if oldVal == newVal:
+					continue
+			except Exception: # arrays etc
+				pass
+			oldKeys[k] = oldVal
+			newKeys[k] = newVal
+		return cls(delta.branchRef, oldKeys, newKeys)
+
+	@staticmethod
+	def _applyKeys(branch:TreeInterface, keys:dict):
+		properties = dict(branch._getRawAuxProperties())
+		for k, v in keys.items():
+			if v is Sentinel.FailToFind:
+				properties.pop(k, None)
+			else:
+				properties[k] = v
+		branch._setRawAuxProperties(properties)
+
+	def do(self, targetRoot:TreeInterface, refMode=TreeReference.Mode.Uid):
+		self._applyKeys(self.resolveRef(self.branchRef, targetRoot), self.newValue)
+
+	def undo(self, targetRoot:TreeInterface, refMode=TreeReference.Mode.Uid):
+		self._applyKeys(self.resolveRef(self.branchRef, targetRoot), self.oldValue)
+
+treeDeltaClasses = (TreeNameDelta, TreeValueDelta, TreePropertyDelta, TreePropertyKeysDelta, TreeMoveDelta, TreeCreationDelta, TreeDeletionDelta)
 
 # collecting TypeNamespace - prefer importing this over every separate delta type
 class TreeDeltas(TypeNamespace):
@@ -218,6 +263,7 @@ class TreeDeltas(TypeNamespace):
 	Value = TreeValueDelta
 	Name = TreeNameDelta
 	Property = TreePropertyDelta
+	PropertyKeys = TreePropertyKeysDelta
 	Move = TreeMoveDelta
 	Create = TreeCreationDelta
 	Delete = TreeDeletionDelta
@@ -280,9 +326,9 @@ def compareBranches(a:TreeInterface, b:TreeInterface,
 		deltas.append(TreeValueDelta(
 			TreeReference(a, mode=TreeReference.Mode.RelPath), a.value, b.value))
 
-	if a.auxProperties != b.auxProperties:
+	if a._getRawAuxProperties() != b._getRawAuxProperties():
 		deltas.append(TreePropertyDelta(
-			TreeReference(a, mode=TreeReference.Mode.RelPath), a.auxProperties, b.auxProperties))
+			TreeReference(a, mode=TreeReference.Mode.RelPath), a._getRawAuxProperties(), b._getRawAuxProperties()))
 
 	# check for move
 	if a.parent and b.parent:
@@ -298,23 +344,280 @@ def compareBranches(a:TreeInterface, b:TreeInterface,
 
 	return deltas
 
+def _branchDigest(branch:TreeInterface, childDigests:tuple[bytes])->(bytes, None):
+	"""digest of branch uid, name, value, properties and child digests -
+	strong enough that equal digests are taken as equal subtrees.
+	None if anything can't be pickled, or any child digest is None"""
+	if None in childDigests:
+		return None
+	try:
+		data = pickle.dumps((branch.uid, branch.name, branch._getRawValue(),
+		                     dict(branch._getRawAuxProperties())),
+		                    protocol=pickle.HIGHEST_PROTOCOL)
+	except Exception: # lambdas, open files etc
+		return None
+	h = hashlib.blake2b(data, digest_size=16)
+	for i in childDigests:
+		h.update(i)
+	return h.digest()
+
+def _indexBranches(root:TreeInterface)->tuple[list[str], dict[str, list]]:
+	"""single traversal over tree, gathering everything
+	compareTrees() needs for each branch
+
+	returns (uids in depth-first order, { uid : record }),
+	each record being
+	[branch, parent uid, index in parent, address, content digest, end]
+	where "end" is the position in the order list after this branch's
+	last descendant, and content digest covers the whole subtree below
+	(None if any value in it can't be pickled)
+	"""
+	rootAddress = tuple(root.relAddress())
+	order : list[str] = []
+	records : dict[str, list] = {}
+	toVisit = [(root, None, -1, rootAddress)]
+	while toVisit:
+		branch, parentUid, index, address = toVisit.pop()
+		records[branch.uid] = [branch, parentUid, index, address, None, None]
+		order.append(branch.uid)
+		childBranches = branch._getRawBranches()
+		for i in range(len(childBranches) - 1, -1, -1):
+			child = childBranches[i]
+			toVisit.append((child, branch.uid, i, address + (child.name, )))
+
+	# reversed depth-first order visits every child before its parent
+	for pos in range(len(order) - 1, -1, -1):
+		record = records[order[pos]]
+		branch = record[0]
+		childRecords = [records[i.uid] for i in branch._getRawBranches()]
+		record[5] = childRecords[-1][5] if childRecords else pos + 1
+		record[4] = _branchDigest(branch, tuple(i[4] for i in childRecords))
+	return order, records
+
+def _longestIncreasingSubsequence(seq:T.Sequence[int])->set[int]:
+	"""return positions in seq of one longest strictly increasing
+	subsequence - O(n log n)"""
+	tailValues = [] # smallest tail value of increasing run of each length
+	tailPositions = []
+	prevPositions = [-1] * len(seq)
+	for pos, value in enumerate(seq):
+		length = bisect_left(tailValues, value)
+		if length == len(tailValues):
+			tailValues.append(value)
+			tailPositions.append(pos)
+		else:
+			tailValues[length] = value
+			tailPositions[length] = pos
+		prevPositions[pos] = tailPositions[length - 1] if length else -1
+	result = set()
+	pos = tailPositions[-1] if tailPositions else -1
+	while pos != -1:
+		result.add(pos)
+		pos = prevPositions[pos]
+	return result
+
+class _ReplayState:
+	"""structure of the tree being patched, as it is at each point
+	while deltas are replayed - starts out as tree a.
+	Refs and indices of each delta are taken from here, not from
+	either input tree, so they're correct when that delta runs"""
+
+	def __init__(self, rootUid:str, records:dict[str, list]):
+		self.rootUid = rootUid
+		self.rootAddress = records[rootUid][3]
+		self.parents : dict[str, str] = {}
+		self.names : dict[str, str] = {}
+		self.children : dict[str, list[str]] = {}
+		# { parent uid : { child name : child uid } }
+		self.named : dict[str, dict[str, str]] = {}
+		for uid, record in records.items():
+			self.parents[uid] = record[1]
+			self.names[uid] = record[0].name
+			self.children[uid] = [i.uid for i in record[0]._getRawBranches()]
+			self.named[uid] = {i.name : i.uid for i in record[0]._getRawBranches()}
+
+	def address(self, uid:str)->list[str]:
+		tokens = []
+		while uid != self.rootUid:
+			tokens.append(self.names[uid])
+			uid = self.parents[uid]
+		return [*self.rootAddress, *reversed(tokens)]
+
+	def ref(self, uid:(str, None))->(TreeReference, None):
+		if uid is None:
+			return None
+		return TreeReference.fromAddress(uid, self.address(uid),
+		                                 mode=TreeReference.Mode.RelPath)
+
+	def index(self, uid:str)->int:
+		return self.children[self.parents[uid]].index(uid)
+
+	def holder(self, parentUid:str, name:str)->(str, None):
+		"""uid of the child of parent with name, if any"""
+		return self.named[parentUid].get(name)
+
+	def insert(self, uid:str, name:str, parentUid:str, index:int):
+		self.parents[uid] = parentUid
+		self.names[uid] = name
+		self.children.setdefault(uid, [])
+		self.named.setdefault(uid, {})
+		self.children[parentUid].insert(index, uid)
+		self.named[parentUid][name] = uid
+
+	def rename(self, uid:str, name:str):
+		parentUid = self.parents[uid]
+		if parentUid is not None:
+			named = self.named[parentUid]
+			if named.get(self.names[uid]) == uid:
+				del named[self.names[uid]]
+			named[name] = uid
+		self.names[uid] = name
+
+	def remove(self, uid:str):
+		parentUid = self.parents[uid]
+		self.children[parentUid].remove(uid)
+		if self.named[parentUid].get(self.names[uid]) == uid:
+			del self.named[parentUid][self.names[uid]]
+
+	def forget(self, uid:str):
+		self.remove(uid)
+		del self.parents[uid], self.names[uid], self.children[uid], self.named[uid]
+
+def _deletionDelta(uid:str, aRecords:dict[str, list], state:_ReplayState
+                   )->TreeDeletionDelta:
+	aBranch = aRecords[uid][0]
+	delta = TreeDeletionDelta(
+		state.ref(uid), state.ref(state.parents[uid]),
+		aBranch.serialiseSingle(), type(aBranch),
+		index=state.index(uid)
+	)
+	state.forget(uid)
+	return delta
+
 def compareTrees(a:TreeInterface, b:TreeInterface):
 	"""top-level, handles gathering and combining deltas,
-	returning a final list of deltaAtoms"""
-	#print("compare trees")
-	#print([i.name for i in a.allBranches()])
-	#print([i.name for i in b.allBranches()])
-	leafDeltas = []
-	compareTargetTies = getCompareTargetTiesByUid(a, b)
-	for src, dest in compareTargetTies:
-		if isinstance(src, DeltaAtom):
-			leafDeltas.append(src)
+	returning a final list of deltaAtoms
+
+	each tree is walked once, branches matched by uid.
+	Subtrees with matching content digests are skipped whole.
+	Moves within the same parent are found by keeping the longest run
+	of branches already in order, and moving the rest - so inserting
+	one branch doesn't move all its later siblings.
+
+	deltas come out in the order they must be replayed, each one
+	referring to the tree as it will be at that point:
+	- deleted branches with nothing surviving below them go first,
+		bottom up, so their names are free for new branches
+	- then top down through b, each branch renamed / changed before
+		its children are created or moved into place
+	- last, deleted branches that held survivors, once those
+		have moved out
+
+	refs resolve by name, so no two siblings can share a name at any
+	point - a branch still holding a name that's needed is first renamed
+	to a temporary name, and gets its real one when it's reached
+	"""
+	aOrder, aRecords = _indexBranches(a)
+	bOrder, bRecords = _indexBranches(b)
+	state = _ReplayState(a.uid, aRecords)
+	deltas = []
+
+	def freeName(parentUid:str, name:str, forUid:str):
+		holderUid = state.holder(parentUid, name)
+		if holderUid is None or holderUid == forUid:
+			return
+		tempName = "~" + holderUid
+		deltas.append(TreeNameDelta(
+			state.ref(holderUid), state.names[holderUid], tempName))
+		state.rename(holderUid, tempName)
+
+	# deleted branches, bottom up
+	deferred = []
+	for uid in reversed(aOrder):
+		if uid in bRecords:
+			continue
+		if state.children[uid]: # something below survives, delete it later
+			deferred.append(uid)
 			continue
-		elif isinstance(dest, DeltaAtom):
-			leafDeltas.append(dest)
+		deltas.append(_deletionDelta(uid, aRecords, state))
+
+	pos = 0
+	while pos < len(bOrder):
+		uid = bOrder[pos]
+		bRecord = bRecords[uid]
+		bBranch = bRecord[0]
+		aRecord = aRecords.get(uid)
+		pos += 1
+
+		if (aRecord is not None and aRecord[4] is not None
+				and aRecord[4] == bRecord[4] and state.names[uid] == bBranch.name):
+			# nothing below has changed
+			pos = bRecord[5]
 			continue
-		leafDeltas.extend(compareBranches(src, dest))
-	return leafDeltas
+
+		# new branches too, may have been moved aside for a sibling
+		if state.names[uid] != bBranch.name:
+			if state.parents[uid] is not None:
+				freeName(state.parents[uid], bBranch.name, uid)
+			deltas.append(TreeNameDelta(
+				state.ref(uid), state.names[uid], bBranch.name))
+			state.rename(uid, bBranch.name)
+
+		if aRecord is not None:
+			aBranch = aRecord[0]
+			#todo: find a way to recursively compare value objects with deepdiff
+			if aBranch._getRawValue() != bBranch._getRawValue():
+				deltas.append(TreeValueDelta(
+					state.ref(uid), aBranch.value, bBranch.value))
+			if aBranch._getRawAuxProperties() != bBranch._getRawAuxProperties():
+				deltas.append(TreePropertyDelta(
+					state.ref(uid), aBranch._getRawAuxProperties(), bBranch._getRawAuxProperties()))
+
+		# create or move children into place - keep the longest run
+		# of children already here and in order, place the rest after
+		# whichever child comes before them in b
+		bChildren = [i.uid for i in bBranch._getRawBranches()]
+		current = {childUid : i for i, childUid in enumerate(state.children[uid])}
+		stayed = [i for i in bChildren if i in current]
+		inOrder = _longestIncreasingSubsequence([current[i] for i in stayed])
+		kept = {i for n, i in enumerate(stayed) if n in inOrder}
+		prevUid = None
+		for childUid in bChildren:
+			if childUid in kept:
+				prevUid = childUid
+				continue
+			child = bRecords[childUid][0]
+			if childUid in state.parents: # already in tree
+				freeName(uid, state.names[childUid], childUid)
+				branchRef = state.ref(childUid)
+				oldParentUid = state.parents[childUid]
+				oldParentRef = state.ref(oldParentUid)
+				oldIndex = state.index(childUid)
+				state.remove(childUid)
+				index = 0 if prevUid is None else state.index(prevUid) + 1
+				state.insert(childUid, state.names[childUid], uid, index)
+				deltas.append(TreeMoveDelta(
+					branchRef=branchRef,
+					oldParentRef=oldParentRef,
+					parentRef=state.ref(uid),
+					oldIndex=oldIndex,
+					newIndex=index
+				))
+			else:
+				freeName(uid, child.name, childUid)
+				index = 0 if prevUid is None else state.index(prevUid) + 1
+				state.insert(childUid, child.name, uid, index)
+				deltas.append(TreeCreationDelta(
+					state.ref(childUid), state.ref(uid),
+					child.serialiseSingle(), type(child),
+					index=index
+				))
+			prevUid = childUid
+
+	for uid in deferred:
+		deltas.append(_deletionDelta(uid, aRecords, state))
+
+	return deltas
 
 
 def branchToSyncForDelta(delta:TreeDeltaAtom, relativeRoot:Tree)->Tree:
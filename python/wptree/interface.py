@@ -337,6 +337,11 @@ class TreeInterface(Pathable,
 		"""
 		raise NotImplementedError
 
+	def _getWritableBranches(self)->T.List[TreeType]:
+		"""OVERRIDE for backends that share storage until
+		first write - return live list of branches to modify"""
+		return self._getRawBranches()
+
 	def getBranches(self)->list[TreeType]:
 		"""return a list of immediate branches of this tree"""
 		return list(self._getRawBranches())
@@ -358,23 +363,27 @@ class TreeInterface(Pathable,
 	def _getRawAuxProperties(self)->dict:
 		"""OVERRIDE for backend"""
 		raise NotImplementedError
+	def _getWritableAuxProperties(self)->dict:
+		"""OVERRIDE for backends that share storage until
+		first write - return live dict to modify"""
+		return self._getRawAuxProperties()
 	@property
 	def auxProperties(self) -> dict:
 		"""return live dict, allowing direct setting of keys"""
-		return self._getRawAuxProperties()
+		return self._getWritableAuxProperties()
 
 	def getAuxProperty(self, key: (str, AuxKeys), default=None):
 		# if isinstance(key, self.AuxKeys):
 		# 	key = str(key)
 		key = str(key)
-		return self.auxProperties.get(key, default)
+		return self._getRawAuxProperties().get(key, default)
 
 	def setAuxProperty(self, key: str, value):
-		self.auxProperties[key] = value
+		self._getWritableAuxProperties()[key] = value
 
 	def removeAuxProperty(self, key):
-		if key in self.auxProperties:
-			self.auxProperties.pop(key)
+		if key in self._getRawAuxProperties():
+			self._getWritableAuxProperties().pop(key)
 	#endregion
 
 
@@ -673,7 +682,7 @@ class TreeInterface(Pathable,
 	"""
 	def breakPoints(self):
 		"""return a list of breakpoints for this tree"""
-		return self.auxProperties.get("breakpoint", {})
+		return self._getRawAuxProperties().get("breakpoint", {})
 	def getBreakPointBranch(self, key="main"):
 		"""return breakpoint for given key"""
 		test = self
@@ -700,8 +709,8 @@ class TreeInterface(Pathable,
 	def _setRawBranchIndex(self, branch:TreeType, index:int):
 		"""reorder this tree's direct branch to index"""
 		index = resolveSeqIndex(index, len(self.branches))
-		self._getRawBranches().remove(branch)
-		self._getRawBranches().insert(index, branch)
+		self._getWritableBranches().remove(branch)
+		self._getWritableBranches().insert(index, branch)
 
 	def setIndex(self, index, branch=None):
 		""" reorders tree branch to given index"""
@@ -714,7 +723,7 @@ class TreeInterface(Pathable,
 
 	def _removeBranch(self, branch:TreeType):
 		"""remove branch from this tree"""
-		self._getRawBranches().remove(branch)
+		self._getWritableBranches().remove(branch)
 		branch._setParent(None)
 		return branch
 
@@ -739,7 +748,7 @@ class TreeInterface(Pathable,
 
 	def _addBranch(self, newBranch:TreeInterface, index:int)->TreeType:
 		"""OVERRIDE for backend"""
-		self._getRawBranches().append(newBranch)
+		self._getWritableBranches().append(newBranch)
 		newBranch._setParent(self)
 		if index is not None:
 			self._setRawBranchIndex(newBranch, index)
@@ -853,8 +862,8 @@ class TreeInterface(Pathable,
 		         }
 		#if self.value != self.default:
 		data[serialKeys.value] = self._getRawValue()
-		if self.auxProperties != self.defaultAuxProperties():
-			data[serialKeys.properties] = self.auxProperties
+		if self._getRawAuxProperties() != self.defaultAuxProperties():
+			data[serialKeys.properties] = self._getRawAuxProperties()
 
 		# check if type differs from parent - if so define it
 		if self.parent and self.parent.__class__ != self.__class__:
@@ -930,7 +939,7 @@ class TreeInterface(Pathable,
 			uid=baseData.get(treeCls.serialKeys().uid) if preserveUid else None
 		)
 
-		tree._properties = baseData.get(treeCls.serialKeys().properties, treeCls.defaultAuxProperties())
+		tree._setRawAuxProperties(baseData.get(treeCls.serialKeys().properties, treeCls.defaultAuxProperties()))
 
 		return tree
 
@@ -0,0 +1,213 @@
+from __future__ import annotations
+import typing as T
+import sys
+from collections import deque
+
+from wptree.interface import TreeInterface
+from wptree.reference import TreeReference
+from wptree.delta import TreeDeltas, TreeDeltaAtom
+
+"""undo journal for tree deltas.
+
+each call to record() adds one undo step (a batch of deltas) -
+undo(n) / redo(n) apply whole batches.
+
+to keep long editing sessions small:
+- consecutive single value, name or property deltas on the same branch
+	merge into one step, keeping the first old and last new value -
+	dragging a slider gives one undo, not hundreds.
+	call breakCoalescing() to force the next record into a new step
+- property deltas only store the keys that changed
+- equal immutable values are stored once, shared between all entries
+- past maxBytes (estimated), the oldest steps are dropped
+"""
+
+def _branchKey(delta:TreeDeltaAtom):
+	"""something stable to tell which branch a delta affects"""
+	ref = delta.branchRef
+	return ref.uid if isinstance(ref, (TreeReference, TreeInterface)) else id(ref)
+
+def estimateSize(obj, _seen:set=None)->int:
+	"""rough recursive size in bytes, counting shared objects once"""
+	seen = _seen if _seen is not None else set()
+	toCheck = [obj]
+	total = 0
+	while toCheck:
+		obj = toCheck.pop()
+		if id(obj) in seen:
+			continue
+		seen.add(id(obj))
+		try:
+			total += sys.getsizeof(obj)
+		except TypeError:
+			continue
+		if isinstance(obj, dict):
+			toCheck.extend(obj.keys())
+			toCheck.extend(obj.values())
+		elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+			toCheck.extend(obj)
+		elif hasattr(obj, "__dict__") and not isinstance(obj, (type, TreeInterface)):
+			toCheck.append(obj.__dict__)
+	return total
+
+
+class TreeDeltaJournal:
+	"""undo / redo history of tree deltas against a root tree"""
+
+	# types merged into a single step when repeated on one branch
+	coalesceTypes = (TreeDeltas.Value, TreeDeltas.Name, TreeDeltas.Property)
+
+	def __init__(self, root:TreeInterface,
+	             maxBytes:int=64 * 1024 * 1024,
+	             maxSteps:int=None):
+		self.root = root
+		self.maxBytes = maxBytes
+		self.maxSteps = maxSteps
+		# [ (deltas, estimated size) ] - everything before cursor is undoable
+		self._steps : deque[tuple[list[TreeDeltaAtom], int]] = deque()
+		self._cursor = 0
+		self._nBytes = 0
+		# { (type, value) : value } shared copies of immutable values
+		self._interned : dict[tuple, T.Any] = {}
+		self._canCoalesce = False
+
+	def __len__(self):
+		return len(self._steps)
+
+	def nBytes(self)->int:
+		"""estimated size of everything held in journal"""
+		return self._nBytes
+
+	def canUndo(self)->int:
+		"""number of steps that can be undone"""
+		return self._cursor
+
+	def canRedo(self)->int:
+		"""number of steps that can be redone"""
+		return len(self._steps) - self._cursor
+
+	def clear(self):
+		self._steps.clear()
+		self._cursor = 0
+		self._nBytes = 0
+		self._interned.clear()
+		self._canCoalesce = False
+
+	def breakCoalescing(self):
+		"""next recorded deltas always start a new step"""
+		self._canCoalesce = False
+
+	#region compacting
+	def _intern(self, value):
+		"""return a shared copy of value if it's immutable"""
+		if not isinstance(value, (str, bytes, int, float, tuple, frozenset)):
+			return value
+		try:
+			return self._interned.setdefault((type(value), value), value)
+		except TypeError: # tuple holding something unhashable
+			return value
+
+	def _compact(self, delta:TreeDeltaAtom)->TreeDeltaAtom:
+		if isinstance(delta, TreeDeltas.Property) and not isinstance(
+				delta, TreeDeltas.PropertyKeys):
+			delta = TreeDeltas.PropertyKeys.fromPropertyDelta(delta)
+			delta.oldValue = {self._intern(k) : self._intern(v) for k, v in delta.oldValue.items()}
+			delta.newValue = {self._intern(k) : self._intern(v) for k, v in delta.newValue.items()}
+		elif isinstance(delta, (TreeDeltas.Value, TreeDeltas.Name)):
+			delta.oldValue = self._intern(delta.oldValue)
+			delta.newValue = self._intern(delta.newValue)
+		elif isinstance(delta, (TreeDeltas.Create, TreeDeltas.Delete)):
+			delta.serialData = {self._intern(k) : self._intern(v)
+			                    for k, v in delta.serialData.items()}
+		if isinstance(delta.branchRef, TreeReference):
+			delta.branchRef.address = [self._intern(i) for i in delta.branchRef.address]
+		return delta
+
+	def _coalesce(self, prev:TreeDeltaAtom, delta:TreeDeltaAtom)->bool:
+		"""merge delta into prev if they change the same thing
+		on the same branch - return True if merged"""
+		if type(prev) is not type(delta) or not isinstance(delta, self.coalesceTypes):
+			return False
+		if _branchKey(prev) != _branchKey(delta):
+			return False
+		if isinstance(delta, TreeDeltas.PropertyKeys):
+			for k, v in delta.oldValue.items():
+				prev.oldValue.setdefault(k, v)
+			prev.newValue.update(delta.newValue)
+			return True
+		# name deltas keep first reference, it points to the original name
+		prev.newValue = delta.newValue
+		return True
+	#endregion
+
+	def record(self, deltas:T.Sequence[TreeDeltaAtom], coalesce=True):
+		"""add deltas as one undo step, that have ALREADY been
+		applied to the tree - drops anything that could be redone"""
+		deltas = [self._compact(i) for i in deltas]
+		if not deltas:
+			return
+		while len(self._steps) > self._cursor:
+			self._nBytes -= self._steps.pop()[1]
+
+		if (coalesce and self._canCoalesce and self._steps
+				and len(deltas) == 1 and len(self._steps[-1][0]) == 1
+				and self._coalesce(self._steps[-1][0][0], deltas[0])):
+			prevDeltas, prevSize = self._steps.pop()
+			self._nBytes -= prevSize
+			deltas = prevDeltas
+			self._cursor -= 1
+			if self._isNoOp(deltas[0]): # edited back to where it started
+				self._canCoalesce = False
+				return
+
+		size = estimateSize(deltas, set())
+		self._steps.append((deltas, size))
+		self._nBytes += size
+		self._cursor += 1
+		self._canCoalesce = coalesce and len(deltas) == 1
+		self._enforceBudget()
+
+	def _isNoOp(self, delta:TreeDeltaAtom)->bool:
+		try:
+			return bool(delta.oldValue == delta.newValue)
+		except Exception:
+			return False
+
+	def _enforceBudget(self):
+		"""drop oldest steps until journal fits - always keep
+		the newest step, however big"""
+		nSteps = len(self._steps)
+		while len(self._steps) > 1 and (
+				(self.maxBytes is not None and self._nBytes > self.maxBytes)
+				or (self.maxSteps is not None and len(self._steps) > self.maxSteps)):
+			# redo steps are cleared on record, so these are all undo steps
+			self._nBytes -= self._steps.popleft()[1]
+			self._cursor -= 1
+		if len(self._steps) != nSteps:
+			# don't keep values alive for dropped steps -
+			# new values just won't be shared with older ones
+			self._interned.clear()
+
+	def undo(self, n=1)->int:
+		"""undo last n steps, return number undone"""
+		n = min(n, self._cursor)
+		toUndo = []
+		for i in range(self._cursor - 1, self._cursor - 1 - n, -1):
+			toUndo.extend(reversed(self._steps[i][0]))
+		for delta in toUndo:
+			delta.undo(self.root)
+		self._cursor -= n
+		self._canCoalesce = False
+		return n
+
+	def redo(self, n=1)->int:
+		"""redo next n undone steps, return number redone"""
+		n = min(n, len(self._steps) - self._cursor)
+		toDo = []
+		for i in range(self._cursor, self._cursor + n):
+			toDo.extend(self._steps[i][0])
+		for delta in toDo:
+			delta.do(self.root)
+		self._cursor += n
+		self._canCoalesce = False
+		return n
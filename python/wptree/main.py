@@ -6,7 +6,7 @@ also provides interface for connecting ui widgets
  """
 from __future__ import annotations
 
-import pprint, copy, textwrap, ast
+import pprint, copy, textwrap, ast, types, weakref
 
 import typing as T
 
@@ -14,12 +14,38 @@ from wplib import Sentinel, log
 from wplib.object.element import UidElement
 from wptree.reference import TreeReference
 
+if T.TYPE_CHECKING:
+	from wptree.delta import TreeDeltaAtom
+
 
 
 from wptree.interface import TreeInterface, TreeType
 from wptree.treedescriptor import TreeBranchDescriptor, TreePropertyDescriptor
 
 
+class _EmptyAuxProperties(dict):
+	"""read-only empty dict shared by every tree without
+	aux properties - trees swap in their own dict on first write"""
+	__slots__ = ()
+
+	def _readOnly(self, *args, **kwargs):
+		raise TypeError("shared empty aux properties are read-only - "
+		                "write through tree.auxProperties")
+	__setitem__ = __delitem__ = __ior__ = _readOnly
+	setdefault = update = pop = popitem = clear = _readOnly
+
+	def __copy__(self):
+		return {}
+	def __deepcopy__(self, memo):
+		return {}
+	def __reduce__(self):
+		return (dict, ())
+
+EMPTY_AUX_PROPERTIES = _EmptyAuxProperties()
+# shared by every tree without branches
+EMPTY_BRANCHES = ()
+
+
 class Tree(TreeInterface,
            UidElement,
            ):
@@ -27,7 +53,20 @@ class Tree(TreeInterface,
 	Real implementation of tree system, storing data in branch nodes.
 
 	No complex integration beyond basic signals.
+
+	core fields are slotted, and branch list and aux properties are
+	only allocated once something is written to them - until then
+	every tree shares EMPTY_BRANCHES and EMPTY_AUX_PROPERTIES.
+	__dict__ is still there for anything else set on a tree,
+	but isn't created until it's needed
+
+	each edit stamps only the branch edited - see editVersion().
+	edit listeners get a delta for every edit below them - while none are
+	registered anywhere, edits don't look for them
 	"""
+	__slots__ = ("_elementId", "_obj", "_parent", "_name", "_branchMap", "isRoot",
+	             "_value", "_branches", "_properties", "_editVersion",
+	             "_editVersionCache")
 
 	TreePropertyDescriptor = TreePropertyDescriptor
 	TreeBranchDescriptor = TreeBranchDescriptor
@@ -35,6 +74,12 @@ class Tree(TreeInterface,
 	# separate master dict of uids to branches
 	indexInstanceMap = {} # type: T.Dict[str, Tree]
 
+	# bumped on every edit, and stamped on the branch edited
+	_editCounter = 0
+	# { id(branch) : (weakref to branch, [listener refs]) } -
+	# keyed on identity, copies of a tree share its uid
+	_editListenerMap : dict[int, tuple[weakref.ref, list]] = {}
+
 	@classmethod
 	def defaultAuxProperties(cls)->dict:
 		return {}
@@ -54,6 +99,8 @@ class Tree(TreeInterface,
 		"""
 		#log("tree init start", name, type(name))
 
+		self._editVersion = 0
+		self._editVersionCache = None
 		UidElement.__init__(self, uid)
 		TreeInterface.__init__(self, None, name=name)
 		#self._frameContextEnabled = False
@@ -61,8 +108,9 @@ class Tree(TreeInterface,
 
 		self._value = value
 		#self._parent: TreeInterface = None
-		self._branches: T.List[TreeType] = []  # direct list of child branch objects, main target for overriding
-		self._properties = self.defaultAuxProperties()
+		# direct list of child branch objects, main target for overriding
+		self._branches: T.List[TreeType] = EMPTY_BRANCHES
+		self._properties = self.defaultAuxProperties() or EMPTY_AUX_PROPERTIES
 
 		if lookupCreate is not None:
 			self.lookupCreate = lookupCreate
@@ -92,7 +140,13 @@ class Tree(TreeInterface,
 		return self._value
 
 	def _getRawBranches(self):
-		"""return raw branches, without any wrapping"""
+		"""return raw branches, without any wrapping -
+		don't modify, use _getWritableBranches() for that"""
+		return self._branches
+
+	def _getWritableBranches(self)->T.List[TreeType]:
+		if self._branches is EMPTY_BRANCHES:
+			self._branches = []
 		return self._branches
 
 	def _getRawName(self) ->str:
@@ -101,21 +155,166 @@ class Tree(TreeInterface,
 
 	def _setParent(self, parentBranch:TreeInterface):
 		"""set parent branch"""
+		oldParent = self._parent
 		self._parent = parentBranch
+		if oldParent is not None:
+			oldParent._bumpEditVersion()
+		if parentBranch is not None:
+			parentBranch._bumpEditVersion()
 
 	def _setRawValue(self, value):
 		"""set raw value, without any wrapping"""
+		oldValue = self._value
 		self._value = value
+		self._bumpEditVersion()
+		if Tree._editListenerMap:
+			self._sendEditDelta("Value", self, oldValue, value)
 
 	def _setRawName(self, name:str):
 		"""set raw name, without any wrapping"""
+		oldName = self._name
 		self._name = name
+		self._bumpEditVersion()
+		if Tree._editListenerMap:
+			self._sendEditDelta("Name", self, oldName, name)
+
+	def _setRawBranchIndex(self, branch:TreeType, index:int):
+		oldIndex = self._branches.index(branch) if Tree._editListenerMap else None
+		super()._setRawBranchIndex(branch, index)
+		self._bumpEditVersion()
+		if Tree._editListenerMap:
+			self._sendEditDelta("Move", branch, self, self,
+			                    oldIndex, self._branches.index(branch))
+
+	def _addBranch(self, newBranch:TreeInterface, index:int)->TreeType:
+		"""insert directly at index, so adding a branch
+		isn't also seen as a reorder"""
+		branches = self._getWritableBranches()
+		if index is None:
+			index = len(branches)
+		branches.insert(index, newBranch)
+		newBranch._setParent(self)
+		if Tree._editListenerMap:
+			self._sendEditDelta("Create", newBranch, self, None, index=index)
+		return newBranch
+
+	def _removeBranch(self, branch:TreeType):
+		oldIndex = self._branches.index(branch) if Tree._editListenerMap else None
+		super()._removeBranch(branch)
+		if Tree._editListenerMap:
+			self._sendEditDelta("Delete", branch, self, None, index=oldIndex)
+		return branch
+
+	def _bumpEditVersion(self):
+		Tree._editCounter += 1
+		self._editVersion = Tree._editCounter
+
+	def editVersion(self)->int:
+		"""number that changes whenever the name, value or branches
+		of this tree or anything below it are set -
+		if it hasn't changed, nothing in this tree has been edited.
+		changing a value in place (appending to a list value, etc)
+		isn't seen.
+
+		edits only stamp the branch edited - this checks the whole
+		tree, unless nothing anywhere has been edited since the last call"""
+		cache = self._editVersionCache
+		if cache is not None and cache[0] == Tree._editCounter:
+			return cache[1]
+		version = self._editVersion
+		toCheck = list(self._branches)
+		while toCheck:
+			branch = toCheck.pop()
+			if branch._editVersion > version:
+				version = branch._editVersion
+			toCheck.extend(branch._branches)
+		self._editVersionCache = (Tree._editCounter, version)
+		return version
+
+	def addEditListener(self, fn:T.Callable[[TreeDeltaAtom], None]):
+		"""call fn with a delta after every edit to this tree or anything
+		below it - names, values, aux properties set through the tree,
+		branches added, removed or reordered.
+		deltas hold branches directly rather than references, and
+		creation / deletion deltas have no serial data - they're for
+		following a tree, not rebuilding it.
+		bound methods are held weakly"""
+		if isinstance(fn, types.MethodType):
+			ref = weakref.WeakMethod(fn)
+		else:
+			ref = lambda : fn
+		key = id(self)
+		entry = Tree._editListenerMap.get(key)
+		if entry is None or entry[0]() is not self:
+			entry = (weakref.ref(self, lambda _ : Tree._editListenerMap.pop(key, None)),
+			         [])
+			Tree._editListenerMap[key] = entry
+		entry[1].append(ref)
+
+	def removeEditListener(self, fn:T.Callable[[TreeDeltaAtom], None]):
+		entry = Tree._editListenerMap.get(id(self))
+		if entry is None or entry[0]() is not self:
+			return
+		entry[1][:] = [i for i in entry[1] if i() not in (fn, None)]
+		if not entry[1]:
+			Tree._editListenerMap.pop(id(self), None)
+
+	def _sendEditDelta(self, deltaName:str, *args, **kwargs):
+		"""build delta and pass it to listeners on this branch and above"""
+		from wptree.delta import TreeDeltas
+		delta = None
+		branch = self
+		while branch is not None:
+			entry = Tree._editListenerMap.get(id(branch))
+			if entry is not None and entry[0]() is branch:
+				if delta is None:
+					delta = getattr(TreeDeltas, deltaName)(*args, **kwargs)
+				for ref in tuple(entry[1]):
+					fn = ref()
+					if fn is None:
+						self._dropDeadListeners(branch)
+						continue
+					fn(delta)
+			branch = branch._parent
+
+	@staticmethod
+	def _dropDeadListeners(branch:Tree):
+		entry = Tree._editListenerMap.get(id(branch))
+		if entry is None:
+			return
+		entry[1][:] = [i for i in entry[1] if i() is not None]
+		if not entry[1]:
+			Tree._editListenerMap.pop(id(branch), None)
 
 	def _setRawAuxProperties(self, props:dict):
-		self._properties = props
+		oldProps = self._properties
+		self._properties = props or EMPTY_AUX_PROPERTIES
+		if Tree._editListenerMap:
+			self._sendEditDelta("Property", self, oldProps, self._properties)
+
+	def setAuxProperty(self, key: str, value):
+		if not Tree._editListenerMap:
+			return super().setAuxProperty(key, value)
+		oldValue = self._properties.get(key, Sentinel.FailToFind)
+		super().setAuxProperty(key, value)
+		self._sendEditDelta("PropertyKeys", self, {key : oldValue}, {key : value})
+
+	def removeAuxProperty(self, key):
+		if not Tree._editListenerMap or key not in self._properties:
+			return super().removeAuxProperty(key)
+		oldValue = self._properties[key]
+		super().removeAuxProperty(key)
+		self._sendEditDelta("PropertyKeys", self, {key : oldValue},
+		                    {key : Sentinel.FailToFind})
 
 	def _getRawAuxProperties(self) ->dict:
-		"""return raw aux properties, without any wrapping"""
+		"""return raw aux properties, without any wrapping -
+		don't modify, use _getWritableAuxProperties() for that"""
+		return self._properties
+
+	def _getWritableAuxProperties(self) ->dict:
+		if self._properties is EMPTY_AUX_PROPERTIES:
+			self._properties = {}
 		return self._properties
 
 
@@ -225,7 +424,7 @@ class Tree(TreeInterface,
 		else:
 			self.name = otherTree.name
 		self.value = copy.deepcopy(otherTree.value)
-		self._properties = copy.copy(otherTree.auxProperties)
+		self._setRawAuxProperties(copy.copy(otherTree._getRawAuxProperties()))
 
 		if not recursive:
 			return
@@ -36,6 +36,16 @@ class TreeReference(ObjectReference):
 		relParent = relParent or branch.root
 		self.address = branch.relAddress(fromBranch=relParent)
 
+	@classmethod
+	def fromAddress(cls, uid:str, address:list[str], mode=Mode.Uid)->TreeReference:
+		"""create reference from known uid and address,
+		without looking up anything on a branch"""
+		ref = cls.__new__(cls)
+		ref.mode = mode
+		ref.uid = uid
+		ref.address = address
+		return ref
+
 	def __repr__(self):
 		return f"<TreeRef({self.address}, uid={self.uid[:5]}., mode={self.mode})"
 
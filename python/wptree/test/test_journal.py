@@ -0,0 +1,77 @@
+
+import unittest
+
+from wptree import Tree
+from wptree.delta import TreeDeltas, compareTrees
+from wptree.journal import TreeDeltaJournal
+
+
+class TestTreeDeltaJournal(unittest.TestCase):
+	""" journal should merge repeated edits, and undo / redo
+	whole steps """
+
+	def setUp(self):
+		self.tree = Tree("root")
+		for i in range(4):
+			self.tree("b" + str(i), create=True).value = i
+		self.journal = TreeDeltaJournal(self.tree)
+
+	def edit(self, fn, coalesce=True):
+		"""run fn on tree and record the deltas it caused"""
+		before = self.tree.copy(copyUid=True)
+		fn()
+		self.journal.record(compareTrees(before, self.tree), coalesce=coalesce)
+
+	def test_coalesce(self):
+		branch = self.tree("b1")
+		for i in range(10):
+			self.edit(lambda: branch.setValue(i * 10))
+		self.assertEqual(len(self.journal), 1)
+		delta = self.journal._steps[0][0][0]
+		self.assertEqual((delta.oldValue, delta.newValue), (1, 90))
+
+		self.edit(lambda: self.tree("b2").setValue("x"))
+		self.assertEqual(len(self.journal), 2)
+
+		self.journal.undo(2)
+		self.assertEqual(branch.value, 1)
+		self.assertEqual(self.tree("b2").value, 2)
+		self.journal.redo()
+		self.assertEqual(branch.value, 90)
+		self.assertEqual(self.journal.canRedo(), 1)
+
+		# recording drops redo history
+		self.edit(lambda: self.tree("b3").setValue("y"))
+		self.assertEqual(self.journal.canRedo(), 0)
+		self.assertEqual(self.journal.canUndo(), 2)
+
+	def test_properties(self):
+		branch = self.tree("b0")
+		branch._properties = {"big" : list(range(1000)), "a" : 1}
+		self.edit(lambda: setattr(branch, "_properties",
+		                          {**branch._properties, "a" : 2}))
+		delta = self.journal._steps[0][0][0]
+		self.assertIsInstance(delta, TreeDeltas.PropertyKeys)
+		self.assertEqual(delta.newValue, {"a" : 2})
+		self.journal.undo()
+		self.assertEqual(branch.auxProperties["a"], 1)
+		self.assertEqual(len(branch.auxProperties["big"]), 1000)
+
+	def test_budget(self):
+		journal = TreeDeltaJournal(self.tree, maxSteps=3)
+		self.journal = journal
+		for i in range(6):
+			self.edit(lambda: self.tree("b0").setValue(i), coalesce=False)
+		self.assertEqual(len(journal), 3)
+		self.assertEqual(journal.undo(10), 3)
+		self.assertEqual(self.tree("b0").value, 2)
+
+	def test_structure(self):
+		self.edit(lambda: self.tree("b1").remove())
+		self.edit(lambda: self.tree("new", create=True))
+		self.journal.undo(2)
+		self.assertEqual([i.name for i in self.tree.branches],
+		                 ["b0", "b1", "b2", "b3"])
+		self.journal.redo(2)
+		self.assertEqual([i.name for i in self.tree.branches],
+		                 ["b0", "b2", "b3", "new"])
@@ -0,0 +1,175 @@
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+from wptree import Tree
+from wptree.delta import TreeDeltas
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+try:
+	from PySide2 import QtWidgets
+except ImportError:
+	QtWidgets = None
+
+def _loadLazyModel():
+	"""load lazymodel without running wptree.ui's __init__, which pulls in
+	the full ui plugin stack - any error in the module itself still raises.
+	stand-in ui package only exists while loading"""
+	import importlib.util, pathlib
+	import wptree
+	path = pathlib.Path(wptree.__file__).parent / "ui" / "lazymodel.py"
+	with mock.patch.dict(sys.modules):
+		if "wptree.ui" not in sys.modules:
+			pkg = importlib.util.module_from_spec(importlib.util.spec_from_loader(
+				"wptree.ui", loader=None, is_package=True))
+			pkg.__path__ = [str(path.parent)]
+			sys.modules["wptree.ui"] = pkg
+		spec = importlib.util.spec_from_file_location("wptree.ui.lazymodel", path)
+		module = importlib.util.module_from_spec(spec)
+		sys.modules[spec.name] = module
+		spec.loader.exec_module(module)
+	return module
+
+
+@unittest.skipIf(QtWidgets is None, "Qt ui not available")
+class TestLazyTreeModel(unittest.TestCase):
+	""" lazy model should only show fetched branches,
+	and follow tree deltas without rebuilding """
+
+	@classmethod
+	def setUpClass(cls):
+		cls.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+		global LazyTreeModel
+		LazyTreeModel = _loadLazyModel().LazyTreeModel
+
+	def setUp(self):
+		self.tree = Tree("root")
+		for i in range(600):
+			self.tree("b" + str(i), create=True).value = i
+		for i in range(3):
+			self.tree("b0", "leaf" + str(i), create=True)
+		self.model = LazyTreeModel(self.tree)
+		self.rootIndex = self.model.index(0, 0)
+
+	def test_fetchInBatches(self):
+		self.assertEqual(self.model.rowCount(self.rootIndex), 0)
+		self.assertTrue(self.model.hasChildren(self.rootIndex))
+		self.assertTrue(self.model.canFetchMore(self.rootIndex))
+		self.model.fetchMore(self.rootIndex)
+		self.assertEqual(self.model.rowCount(self.rootIndex),
+		                 LazyTreeModel.fetchBatchSize)
+		while self.model.canFetchMore(self.rootIndex):
+			self.model.fetchMore(self.rootIndex)
+		self.assertEqual(self.model.rowCount(self.rootIndex), 600)
+
+		index = self.model.index(5, 1, self.rootIndex)
+		self.assertEqual(self.model.data(index), "5")
+		self.assertIs(self.model.branchFromIndex(index), self.tree("b5"))
+		self.assertEqual(self.model.parent(index), self.rootIndex)
+
+		# leaf branches not fetched until asked
+		b0Index = self.model.index(0, 0, self.rootIndex)
+		self.assertEqual(self.model.rowCount(b0Index), 0)
+		self.model.fetchMore(b0Index)
+		self.assertEqual(self.model.rowCount(b0Index), 3)
+
+	def test_treeEdits(self):
+		"""edits made on the tree reach the model without
+		anything passing deltas by hand"""
+		self.model.fetchMore(self.rootIndex)
+		b0Index = self.model.index(0, 0, self.rootIndex)
+		self.model.fetchMore(b0Index)
+		changed = []
+		self.model.dataChanged.connect(lambda *args : changed.append(args[0].row()))
+
+		# creation
+		newBranch = Tree("new")
+		self.tree.addBranch(newBranch, index=1)
+		self.assertEqual(self.model.rowCount(self.rootIndex),
+		                 LazyTreeModel.fetchBatchSize + 1)
+		self.assertEqual(self.model.data(self.model.index(1, 0, self.rootIndex)), "new")
+
+		# value and name
+		self.tree("b2").value = "changed"
+		self.assertEqual(changed, [3])
+		self.assertEqual(self.model.data(self.model.index(3, 1, self.rootIndex)), "changed")
+		self.tree("b2").name = "renamed"
+		self.assertEqual(self.model.data(self.model.index(3, 0, self.rootIndex)), "renamed")
+
+		# move leaf from b0 to new branch - new branch hasn't been fetched
+		leaf = self.tree("b0", "leaf0")
+		leaf.remove()
+		newBranch.addBranch(leaf)
+		self.assertEqual(self.model.rowCount(b0Index), 2)
+		newIndex = self.model.indexForBranch(newBranch)
+		self.assertTrue(self.model.canFetchMore(newIndex))
+		self.model.fetchMore(newIndex)
+		self.assertIs(self.model.branchFromIndex(
+			self.model.index(0, 0, newIndex)), leaf)
+
+		# reorder
+		self.tree("b0", "leaf2").setIndex(0)
+		self.assertEqual(self.model.data(self.model.index(0, 0, b0Index)), "leaf2")
+
+		# deletion
+		b0 = self.tree("b0")
+		b0.remove()
+		self.assertEqual(self.model.data(self.model.index(0, 0, self.rootIndex)), "new")
+		self.assertFalse(self.model.indexForBranch(b0).isValid())
+
+		# model stops listening when given another tree
+		self.model.setTree(Tree("other"))
+		self.assertNotIn(id(self.tree), Tree._editListenerMap)
+		self.assertNotIn("wptree.ui.lazymodel", sys.modules)
+
+	def test_deltas(self):
+		"""deltas passed by hand for edits the model already
+		followed change nothing"""
+		self.model.fetchMore(self.rootIndex)
+		newBranch = Tree("new")
+		self.tree.addBranch(newBranch, index=1)
+		self.model.applyDelta(TreeDeltas.Create(
+			newBranch, self.tree, newBranch.serialiseSingle()))
+		self.assertEqual(self.model.rowCount(self.rootIndex),
+		                 LazyTreeModel.fetchBatchSize + 1)
+
+	def test_view(self):
+		view = QtWidgets.QTreeView()
+		view.setModel(self.model)
+		view.expandAll()
+		self.assertGreater(self.model.rowCount(self.rootIndex), 0)
+		view.close()
+
+	def test_moveStaleRef(self):
+		"""move delta whose branch ref no longer resolves
+		should still move the fetched row"""
+		from wptree.reference import TreeReference
+		class StaleRef(TreeReference):
+			def resolve(self, relativeParent=None):
+				raise KeyError("stale ref", self.address)
+
+		self.model.fetchMore(self.rootIndex)
+		b0Index = self.model.index(0, 0, self.rootIndex)
+		self.model.fetchMore(b0Index)
+
+		# only deltas passed by hand
+		self.tree.removeEditListener(self.model.onTreeEdited)
+		leaf = self.tree("b0", "leaf1")
+		target = self.tree("b1")
+		leaf.remove()
+		target.addBranch(leaf)
+		staleRef = StaleRef.fromAddress(leaf.uid, ["b0", "leaf1"])
+		self.model.applyDelta(TreeDeltas.Move(staleRef, self.tree("b0"), target, 1, 0))
+		self.assertEqual(self.model.rowCount(b0Index), 2)
+		targetIndex = self.model.indexForBranch(target)
+		self.model.fetchMore(targetIndex)
+		self.assertIs(self.model.branchFromIndex(
+			self.model.index(0, 0, targetIndex)), leaf)
+
+		# unknown branch is ignored
+		ghostRef = StaleRef.fromAddress("ghost", ["ghost"])
+		self.model.applyDelta(TreeDeltas.Move(ghostRef, self.tree("b0"), target, 0, 0))
+		self.assertEqual(self.model.rowCount(b0Index), 2)
+
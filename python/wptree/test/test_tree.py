@@ -55,7 +55,80 @@ class TestMainTree(unittest.TestCase):
 		self.assertEqual([baseBranch], baseTree.branches)
 
 	#
-	# def test_treeRoot(self):
+	def test_lazyStorage(self):
+		"""leaves share empty storage until something is written"""
+		leaf = self.tree("branchA", "leafA")
+		other = self.tree("branchB")
+		self.assertIs(leaf._getRawBranches(), other._getRawBranches())
+		self.assertIs(leaf._getRawAuxProperties(), other._getRawAuxProperties())
+		self.assertFalse(leaf.__dict__)
+		with self.assertRaises(TypeError):
+			leaf._getRawAuxProperties()["a"] = 1
+
+		self.assertIsNone(leaf.getAuxProperty("a"))
+		self.assertIs(leaf._getRawAuxProperties(), other._getRawAuxProperties())
+		leaf.setAuxProperty("a", 1)
+		self.assertEqual(leaf.getAuxProperty("a"), 1)
+		self.assertEqual(other._getRawAuxProperties(), {})
+
+		leaf("newLeaf", create=True)
+		self.assertEqual([i.name for i in leaf.branches], ["newLeaf"])
+		self.assertEqual(other.branches, [])
+
+	def test_editVersion(self):
+		"""edits bump the version of a branch and every parent above it"""
+		branch = self.tree("branchA")
+		leaf = self.tree("branchA", "leafA")
+		other = self.tree("branchB")
+		versions = lambda : (self.tree.editVersion(), branch.editVersion(),
+		                     leaf.editVersion(), other.editVersion())
+		before = versions()
+		leaf.value = 3
+		after = versions()
+		self.assertEqual([a > b for a, b in zip(after, before)],
+		                 [True, True, True, False])
+
+		before = versions()
+		leaf.name = "leafB"
+		leaf.remove()
+		other.addBranch(leaf)
+		after = versions()
+		self.assertTrue(all(a > b for a, b in zip(after, before)))
+
+		before = versions()
+		self.assertEqual(leaf.value, 3)
+		self.assertEqual(versions(), before)
+
+	def test_editListeners(self):
+		"""listeners get one delta per edit below them,
+		bound methods are held weakly"""
+		from wptree.delta import TreeDeltas
+		branch = self.tree("branchA")
+		seen = []
+		branch.addEditListener(seen.append)
+		branch("leafA").value = 5
+		self.tree("branchB").value = 6 # outside branchA
+		branch.addBranch(Tree("new"), index=0)
+		branch("new").setIndex(1)
+		branch("new").remove()
+		self.assertEqual([type(i) for i in seen],
+		                 [TreeDeltas.Value, TreeDeltas.Create,
+		                  TreeDeltas.Move, TreeDeltas.Delete])
+		self.assertIs(seen[0].branchRef, branch("leafA"))
+		branch.removeEditListener(seen.append)
+		branch.value = 7
+		self.assertEqual(len(seen), 4)
+
+		class Listener:
+			def onEdit(self, delta):
+				raise AssertionError("dead listener called")
+		listener = Listener()
+		branch.addEditListener(listener.onEdit)
+		del listener
+		branch.value = 8
+		self.assertNotIn(id(branch), Tree._editListenerMap)
+
+		# def test_treeRoot(self):
 	# 	""" test that tree objects find their root properly """
 	# 	self.assertIs( self.tree.root, self.tree,
 	# 	                  msg="tree root is not itself")
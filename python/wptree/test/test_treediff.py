@@ -0,0 +1,142 @@
+
+import unittest
+
+from wptree import Tree
+from wptree.delta import TreeDeltas, compareTrees
+
+
+def structure(tree:Tree):
+	"""nested (name, value, children) for comparing trees"""
+	return (tree.name, tree.value, [structure(i) for i in tree.branches])
+
+
+class TestTreeDiff(unittest.TestCase):
+	""" diffing two copies of a tree should give deltas
+	that turn one into the other """
+
+	def setUp(self):
+		self.tree = Tree("root")
+		for i in range(6):
+			self.tree("b" + str(i), create=True).value = i
+			for n in range(3):
+				self.tree("b" + str(i), "leaf" + str(i) + str(n), create=True).value = (i, n)
+		self.newTree = self.tree.copy(copyUid=True)
+
+	def assertDeltasReproduce(self, deltas):
+		target = self.tree.copy(copyUid=False)
+		for i in deltas:
+			i.do(target)
+		self.assertEqual(structure(target), structure(self.newTree))
+
+	def test_noChange(self):
+		self.assertEqual(compareTrees(self.tree, self.newTree), [])
+
+	def test_values(self):
+		self.newTree("b2", "leaf21").value = "new"
+		self.newTree("b4").value = "four"
+		deltas = compareTrees(self.tree, self.newTree)
+		self.assertEqual([type(i) for i in deltas],
+		                 [TreeDeltas.Value, TreeDeltas.Value])
+		self.assertDeltasReproduce(deltas)
+
+	def test_structure(self):
+		self.newTree("b1").remove()
+		self.newTree.addBranch(Tree("new", value="n"), index=0)
+		self.newTree("b3", "leaf30", "new", create=True).value = "created"
+		deltas = compareTrees(self.tree, self.newTree)
+		# inserting one branch shouldn't move any siblings
+		self.assertFalse([i for i in deltas if isinstance(i, TreeDeltas.Move)])
+		self.assertEqual(len([i for i in deltas if isinstance(i, TreeDeltas.Delete)]), 4)
+		self.assertDeltasReproduce(deltas)
+
+	def test_moves(self):
+		b5 = self.newTree("b5")
+		b5.remove()
+		self.newTree.addBranch(b5, index=0)
+		leaf = self.newTree("b0", "leaf02")
+		leaf.remove()
+		self.newTree("b3").addBranch(leaf, index=0)
+		deltas = compareTrees(self.tree, self.newTree)
+		self.assertEqual([type(i) for i in deltas],
+		                 [TreeDeltas.Move, TreeDeltas.Move])
+		self.assertDeltasReproduce(deltas)
+
+	def test_moveOutBeforeInsert(self):
+		"""sibling moving to another parent shouldn't throw off
+		indices of branches created next to it"""
+		leaf = self.newTree("b0", "leaf00")
+		leaf.remove()
+		self.newTree("b1").addBranch(leaf)
+		self.newTree("b0").addBranch(Tree("new", value="n"))
+		self.newTree("b0").addBranch(Tree("first", value="f"), index=0)
+		deltas = compareTrees(self.tree, self.newTree)
+		self.assertDeltasReproduce(deltas)
+
+	def test_deleteParentOfMovedBranch(self):
+		"""branch moving out of a deleted parent should survive"""
+		leaf = self.newTree("b2", "leaf21")
+		leaf.remove()
+		self.newTree("b4").addBranch(leaf, index=1)
+		self.newTree("b2").remove()
+		deltas = compareTrees(self.tree, self.newTree)
+		self.assertDeltasReproduce(deltas)
+		self.assertEqual(len([i for i in deltas if isinstance(i, TreeDeltas.Delete)]), 3)
+
+	def test_renameParent(self):
+		"""refs to branches below a renamed parent use the new name"""
+		self.newTree("b3").name = "renamed"
+		self.newTree("renamed", "leaf30").value = "changed"
+		self.newTree("renamed", "leaf31").name = "leafRenamed"
+		self.newTree("renamed").addBranch(Tree("new"), index=0)
+		leaf = self.newTree("renamed", "leaf32")
+		leaf.remove()
+		self.newTree("b0").addBranch(leaf)
+		deltas = compareTrees(self.tree, self.newTree)
+		self.assertDeltasReproduce(deltas)
+
+	def test_reuseDeletedName(self):
+		"""new branch can take the name of a deleted one"""
+		self.newTree("b1").remove()
+		self.newTree.addBranch(Tree("b1", value="replacement"), index=1)
+		deltas = compareTrees(self.tree, self.newTree)
+		self.assertDeltasReproduce(deltas)
+
+	def test_swapSiblingNames(self):
+		"""renames onto a name a sibling still holds
+		shouldn't send later edits to the wrong branch"""
+		self.newTree("b0").name = "tmp"
+		self.newTree("b1").name = "b0"
+		self.newTree("tmp").name = "b1"
+		self.newTree("b1").value = 10
+		self.newTree("b0").value = 20
+		self.newTree("b0", "leaf10").value = "moved"
+		deltas = compareTrees(self.tree, self.newTree)
+		self.assertDeltasReproduce(deltas)
+
+	def test_rotateSiblingNames(self):
+		"""three names passed round, with a branch moved in
+		under one of the old names"""
+		self.newTree("b0").name = "tmp"
+		self.newTree("b2").name = "b0"
+		self.newTree("b1").name = "b2"
+		self.newTree("tmp").name = "b1"
+		for i, name in enumerate(("b0", "b1", "b2")):
+			self.newTree(name).value = i * 10
+		leaf = self.newTree("b3", "leaf30")
+		leaf.remove()
+		leaf.name = "leaf10"
+		self.newTree("b1", "leaf00").name = "spare"
+		self.newTree("b1").addBranch(leaf)
+		deltas = compareTrees(self.tree, self.newTree)
+		self.assertDeltasReproduce(deltas)
+
+	def test_unpicklableValues(self):
+		"""subtrees whose values can't be pickled have no digest,
+		and are still compared"""
+		fn = lambda : None
+		self.tree("b4").value = fn
+		self.newTree("b4").value = fn
+		self.assertEqual(compareTrees(self.tree, self.newTree), [])
+		self.newTree("b4", "leaf40").value = "changed"
+		deltas = compareTrees(self.tree, self.newTree)
+		self.assertEqual([type(i) for i in deltas], [TreeDeltas.Value])
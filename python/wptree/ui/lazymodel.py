@@ -0,0 +1,331 @@
+from __future__ import annotations
+import typing as T
+import weakref
+
+from PySide2 import QtCore
+
+from wplib import log
+
+from wptree.main import Tree
+from wptree.delta import TreeDeltas
+from wptree.ui.constant import addressRole, relAddressRole, treeObjRole
+
+"""model reading a tree directly, without building an item per branch.
+
+TreeModel builds a QStandardItem for every branch and value up front, and
+rebuilds whole item structures when anything changes - fine for small trees,
+unusable for big ones.
+
+Here branches are only shown once a view asks for them through
+canFetchMore() / fetchMore(), in batches. For each fetched branch we keep
+the list of its branches the view currently knows about - tree deltas
+arrive after the tree has already changed, so this is the only way to know
+which row to remove when a branch is deleted or moved.
+Unfetched parts of the tree cost nothing.
+
+every index's internal pointer is the tree branch itself
+"""
+
+class LazyTreeModel(QtCore.QAbstractItemModel):
+	"""read-only on structure, editable on names and values -
+	structural edits should go through the tree.
+	model listens for edits on its tree, and applies each
+	delta as it arrives"""
+
+	treeSet = QtCore.Signal(Tree)
+
+	# number of branches to show each time a view fetches more
+	fetchBatchSize = 256
+
+	NAME_COLUMN = 0
+	VALUE_COLUMN = 1
+
+	def __init__(self, tree:Tree=None, parent=None):
+		super().__init__(parent)
+		self.treeRef : weakref.ReferenceType[Tree] = None
+		# { parent uid : [branches known to view, in row order] }
+		self._fetched : dict[str, list[Tree]] = {}
+		# { parent uid : { branch uid : row } }, built on demand from _fetched
+		self._rowMaps : dict[str, dict[str, int]] = {}
+		# { branch uid : parent it was fetched under }
+		self._parentOf : dict[str, Tree] = {}
+		# views may call back into fetchMore() from inside beginInsertRows() -
+		# don't fetch anything while rows are already changing
+		self._changing = False
+		if tree is not None:
+			self.setTree(tree)
+
+	@property
+	def tree(self)->(Tree, None):
+		if self.treeRef is None:
+			return None
+		assert self.treeRef() is not None, "tree has been deleted"
+		return self.treeRef()
+
+	def setTree(self, tree:Tree):
+		"""always model from tree root, same as TreeModel"""
+		tree = tree.root
+		oldTree = self.treeRef() if self.treeRef is not None else None
+		if oldTree is not None:
+			oldTree.removeEditListener(self.onTreeEdited)
+		self.beginResetModel()
+		self.treeRef = weakref.ref(tree)
+		self._fetched.clear()
+		self._rowMaps.clear()
+		self._parentOf.clear()
+		self.endResetModel()
+		# held weakly by the tree
+		tree.addEditListener(self.onTreeEdited)
+		self.treeSet.emit(tree)
+
+	#region fetched rows
+	def _fetchedBranches(self, parent:Tree)->list[Tree]:
+		return self._fetched.get(parent.uid, ())
+
+	def _rowMap(self, parent:Tree)->dict[str, int]:
+		rowMap = self._rowMaps.get(parent.uid)
+		if rowMap is None:
+			rowMap = {b.uid : i for i, b in enumerate(self._fetchedBranches(parent))}
+			self._rowMaps[parent.uid] = rowMap
+		return rowMap
+
+	def _rowOf(self, branch:Tree)->int:
+		"""row of branch in view, or -1 if it hasn't been fetched"""
+		if branch is self.tree:
+			return 0
+		parent = self._parentOf.get(branch.uid)
+		if parent is None:
+			return -1
+		return self._rowMap(parent).get(branch.uid, -1)
+
+	def _forgetBelow(self, branch:Tree):
+		"""drop fetched state for branch and everything below it"""
+		toForget = [branch]
+		while toForget:
+			b = toForget.pop()
+			self._rowMaps.pop(b.uid, None)
+			self._parentOf.pop(b.uid, None)
+			toForget.extend(self._fetched.pop(b.uid, ()))
+	#endregion
+
+	#region qt model interface
+	def branchFromIndex(self, index:QtCore.QModelIndex)->(Tree, None):
+		if not index.isValid():
+			return None
+		return index.internalPointer()
+
+	def indexForBranch(self, branch:Tree, column=0)->QtCore.QModelIndex:
+		"""index for branch, or invalid index if it isn't shown"""
+		row = self._rowOf(branch)
+		if row < 0:
+			return QtCore.QModelIndex()
+		return self.createIndex(row, column, branch)
+
+	def index(self, row:int, column:int, parent=QtCore.QModelIndex()
+	          )->QtCore.QModelIndex:
+		if not parent.isValid():
+			if row == 0 and self.tree is not None:
+				return self.createIndex(0, column, self.tree)
+			return QtCore.QModelIndex()
+		branches = self._fetchedBranches(parent.internalPointer())
+		if not 0 <= row < len(branches):
+			return QtCore.QModelIndex()
+		return self.createIndex(row, column, branches[row])
+
+	def parent(self, index:QtCore.QModelIndex=None)->QtCore.QModelIndex:
+		if index is None: # QObject.parent()
+			return super().parent()
+		branch = self.branchFromIndex(index)
+		if branch is None or branch is self.tree:
+			return QtCore.QModelIndex()
+		# parent as the view knows it, tree may already have moved on
+		parent = self._parentOf.get(branch.uid)
+		if parent is None:
+			return QtCore.QModelIndex()
+		return self.indexForBranch(parent)
+
+	def rowCount(self, parent=QtCore.QModelIndex())->int:
+		if not parent.isValid():
+			return 1 if self.tree is not None else 0
+		if parent.column() > 0:
+			return 0
+		return len(self._fetchedBranches(parent.internalPointer()))
+
+	def columnCount(self, parent=QtCore.QModelIndex())->int:
+		return 2
+
+	def hasChildren(self, parent=QtCore.QModelIndex())->bool:
+		if not parent.isValid():
+			return self.tree is not None
+		if parent.column() > 0:
+			return False
+		return bool(parent.internalPointer()._getRawBranches())
+
+	def canFetchMore(self, parent:QtCore.QModelIndex)->bool:
+		branch = self.branchFromIndex(parent)
+		if branch is None or self._changing:
+			return False
+		return len(self._fetchedBranches(branch)) < len(branch._getRawBranches())
+
+	def fetchMore(self, parent:QtCore.QModelIndex):
+		branch = self.branchFromIndex(parent)
+		if branch is None or self._changing:
+			return
+		fetched = self._fetched.setdefault(branch.uid, [])
+		start = len(fetched)
+		toAdd = branch._getRawBranches()[start : start + self.fetchBatchSize]
+		if not toAdd:
+			return
+		self._changing = True
+		try:
+			self.beginInsertRows(parent, start, start + len(toAdd) - 1)
+			fetched.extend(toAdd)
+			self._parentOf.update((b.uid, branch) for b in toAdd)
+			self._rowMaps.pop(branch.uid, None)
+			self.endInsertRows()
+		finally:
+			self._changing = False
+
+	def data(self, index:QtCore.QModelIndex, role=QtCore.Qt.DisplayRole):
+		branch = self.branchFromIndex(index)
+		if branch is None:
+			return None
+		if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+			if index.column() == self.NAME_COLUMN:
+				return branch.name
+			value = branch.value
+			return "" if value is None else str(value)
+		if role == treeObjRole:
+			return branch
+		if role in (addressRole, relAddressRole):
+			return branch.address()
+		if role == QtCore.Qt.ToolTipRole:
+			return branch.getDebugData()
+		return None
+
+	def setData(self, index:QtCore.QModelIndex, value, role=QtCore.Qt.EditRole)->bool:
+		branch = self.branchFromIndex(index)
+		if branch is None or role != QtCore.Qt.EditRole:
+			return False
+		if index.column() == self.NAME_COLUMN:
+			branch.setName(value)
+		else:
+			branch.setValue(value)
+		self.dataChanged.emit(index, index, [role])
+		return True
+
+	def flags(self, index:QtCore.QModelIndex):
+		if not index.isValid():
+			return QtCore.Qt.NoItemFlags
+		return (QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+		        | QtCore.Qt.ItemIsEditable)
+
+	def headerData(self, section:int, orientation, role=QtCore.Qt.DisplayRole):
+		if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+			return ("branch", "value")[section]
+		return None
+	#endregion
+
+	#region updating from tree deltas
+	def onTreeEdited(self, delta:TreeDeltas.Base):
+		self.applyDelta(delta)
+
+	def applyDeltas(self, deltas:T.Iterable[TreeDeltas.Base]):
+		for i in deltas:
+			self.applyDelta(i)
+
+	def applyDelta(self, delta:TreeDeltas.Base):
+		"""update view for a delta that has ALREADY been applied to the tree -
+		only touches rows that have been fetched"""
+		root = self.tree
+		try:
+			branch = delta.resolveRef(delta.branchRef, root)
+		except (KeyError, LookupError):
+			branch = None
+
+		if isinstance(delta, (TreeDeltas.Value, TreeDeltas.Name,
+		                      TreeDeltas.Property)):
+			if branch is None:
+				return
+			self._emitBranchChanged(branch)
+			return
+
+		if isinstance(delta, TreeDeltas.Create):
+			parent = delta.resolveRef(delta.parentRef, root)
+			self._insertBranch(branch, parent)
+			return
+
+		if isinstance(delta, TreeDeltas.Delete):
+			# branch may no longer resolve - search fetched rows by uid
+			self._removeBranchByUid(delta.branchRef.uid
+			                        if branch is None else branch.uid)
+			return
+
+		if isinstance(delta, TreeDeltas.Move):
+			uid = delta.branchRef.uid if branch is None else branch.uid
+			self._removeBranchByUid(uid)
+			parent = delta.resolveRef(delta.parentRef, root)
+			if branch is None:
+				# ref may be stale - look for the branch under its new parent
+				branch = next((b for b in parent._getRawBranches()
+				               if b.uid == uid), None)
+				if branch is None:
+					return
+			self._insertBranch(branch, parent)
+			return
+
+		log("unknown delta for lazy model, resyncing", delta)
+		self.setTree(root)
+
+	def _emitBranchChanged(self, branch:Tree):
+		left = self.indexForBranch(branch, self.NAME_COLUMN)
+		if not left.isValid():
+			return
+		right = left.sibling(left.row(), self.VALUE_COLUMN)
+		self.dataChanged.emit(left, right)
+
+	def _insertBranch(self, branch:Tree, parent:Tree):
+		"""branch has been added to parent in tree -
+		insert it if the view has fetched up to its row,
+		otherwise fetchMore() picks it up later"""
+		parentIndex = self.indexForBranch(parent)
+		if not parentIndex.isValid():
+			return
+		fetched = self._fetched.get(parent.uid)
+		if fetched is None or branch.uid in self._rowMap(parent):
+			return
+		rawBranches = parent._getRawBranches()
+		row = next(i for i, b in enumerate(rawBranches) if b is branch)
+		if row > len(fetched):
+			return
+		self._changing = True
+		try:
+			self.beginInsertRows(parentIndex, row, row)
+			fetched.insert(row, branch)
+			self._parentOf[branch.uid] = parent
+			self._rowMaps.pop(parent.uid, None)
+			self.endInsertRows()
+		finally:
+			self._changing = False
+
+	def _removeBranchByUid(self, uid:str):
+		"""remove fetched row for branch uid, if the view has it -
+		branch has already left its parent in the tree, so look up
+		where the view last saw it"""
+		parent = self._parentOf.get(uid)
+		if parent is None:
+			return
+		row = self._rowMap(parent)[uid]
+		parentIndex = self.indexForBranch(parent)
+		fetched = self._fetched[parent.uid]
+		branch = fetched[row]
+		self._changing = True
+		try:
+			self.beginRemoveRows(parentIndex, row, row)
+			fetched.pop(row)
+			self._rowMaps.pop(parent.uid, None)
+			self._forgetBelow(branch)
+			self.endRemoveRows()
+		finally:
+			self._changing = False
+	#endregion
@@ -88,7 +88,8 @@ def qtOverrideAncestorsFn(obj, *args, **kwargs):
 		if not obj.parent(): return ()
 		return (obj.parent(), )
 	if isinstance(obj, QtWidgets.QGraphicsItem):
-		return obj.parentItem() if obj.parentItem() else obj.scene()
+		parent = obj.parentItem() or obj.scene()
+		return (parent, ) if parent is not None else ()
 
 
 class WidgetDex(WpDex):
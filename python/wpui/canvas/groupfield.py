@@ -221,17 +221,16 @@ class UserPolygon(QtWidgets.QGraphicsPolygonItem):
 		return [ (pointArr, distance, index) ]
 			[ (edgeArr, distance, index) ]
 		"""
-		points = []
-		lines = []
 		pos = arr(pos)
 		pointsArr = self.asArr()
-		for i in range(len(self.points())):
-			points.append((pointsArr[i], np.linalg.norm(pointsArr[i] - pos), i))
-			nextI = (i + 1) % len(pointsArr)
-			seg = shape.segmentFromPoints(pointsArr[i], pointsArr[nextI])
-			lines.append((seg,
-			               np.linalg.norm(pos - shape.closestPosOnSegment(seg, pos)),
-			               i))
+		if not len(pointsArr):
+			return [], []
+		# test against every point and edge at once
+		segments = shape.polygonSegments(pointsArr)
+		pointDistances = shape.distancesToPoints(pointsArr, pos)[0]
+		lineDistances = shape.distancesToSegments(segments, pos)[0]
+		points = [(pointsArr[i], pointDistances[i], i) for i in range(len(pointsArr))]
+		lines = [(segments[i], lineDistances[i], i) for i in range(len(segments))]
 		return points, lines
 
 	def mousePressEvent(self, event):
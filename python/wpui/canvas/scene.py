@@ -20,6 +20,7 @@ from wplib.serial import Serialisable
 from wpui.keystate import KeyState
 from wpui import lib as uilib
 from wplib.maths import shape, arr, fromArr, arrT
+from wplib.maths.spatial import PointGrid
 
 from wpui.canvas.element import WpCanvasElement, WpCanvasProxyWidget
 
@@ -126,6 +127,10 @@ class WpCanvasScene(QtWidgets.QGraphicsScene):
 		self._dragSource : ConnectionPoint = None # if not none, dragging in progress
 		self._candidateConnectPoint : ConnectionPoint = None
 
+		# scene positions of all connection points, for snapping dragged
+		# connections without checking every point on every mouse move
+		self._connectionPointGrid = PointGrid(self.DRAG_SNAP_MAX_DIST)
+
 		self._buildBackground()
 
 	def _buildBackground(self):
@@ -187,6 +192,31 @@ class WpCanvasScene(QtWidgets.QGraphicsScene):
 	def connectionPoints(self):
 		return (i for i in self.relationGraph if isinstance(i, ConnectionPoint))
 
+	def connectionPointScenePos(self, point:ConnectionPoint)->QtCore.QPointF:
+		pos, vec = point.connectionPoint(None)
+		return point.mapToScene(QtCore.QPointF(*pos))
+
+	def updateConnectionPointIndex(self, point:ConnectionPoint):
+		"""refresh indexed scene position of connection point -
+		moves are picked up automatically, call this if a point's
+		connectionPoint() changes without the item moving"""
+		self._connectionPointGrid.insert(
+			point, self.connectionPointScenePos(point).toTuple())
+
+	def nearestConnectionPoint(self, scenePos:QtCore.QPointF,
+	                           radius:float=None,
+	                           filterFn:T.Callable[[ConnectionPoint], bool]=None
+	                           )->tuple[(ConnectionPoint, None), (QtCore.QPointF, None)]:
+		"""return nearest connection point within radius of
+		scenePos, and its scene position"""
+		result = self._connectionPointGrid.nearest(
+			scenePos.toTuple(),
+			radius if radius is not None else self.DRAG_SNAP_MAX_DIST,
+			filterFn=filterFn)
+		if result is None:
+			return None, None
+		return result[0], QtCore.QPointF(*result[1])
+
 	def connectedItems(self,
 	                   seedItem,
 	                   key="connectPoint")->T.Iterable[WpCanvasElement]:
@@ -246,6 +276,8 @@ class WpCanvasScene(QtWidgets.QGraphicsScene):
 			self.relationGraph.add_node(i)
 			i.elementChanged.connect(self._onItemChanged)
 			self.objDelegateMap[i.obj].add(i)
+			if isinstance(i, ConnectionPoint):
+				self.updateConnectionPointIndex(i)
 			log("after addItem", item, item.obj)
 		return item
 
@@ -267,6 +299,7 @@ class WpCanvasScene(QtWidgets.QGraphicsScene):
 					self.objDelegateMap[child.obj].remove(child)
 
 			if isinstance(child, ConnectionPoint):
+				self._connectionPointGrid.remove(child)
 				# remove all individual groups / lines using this point
 				if child in self.relationGraph: # in case this gets fired twice
 					for i in tuple(nxlib.multiGraphAdjacentNodesForKey(
@@ -296,6 +329,8 @@ class WpCanvasScene(QtWidgets.QGraphicsScene):
 						QtWidgets.QGraphicsItem.ItemPositionHasChanged,
 						QtWidgets.QGraphicsItem.ItemScenePositionHasChanged):
 			if isinstance(item, ConnectionPoint):
+				if item in self._connectionPointGrid:
+					self.updateConnectionPointIndex(item)
 				for group in nxlib.multiGraphAdjacentNodesForKey(
 					self.relationGraph, item, key="connectGroup"
 				): #type:QtWidgets.QGraphicsItem
@@ -340,27 +375,13 @@ class WpCanvasScene(QtWidgets.QGraphicsScene):
 
 			# check any nearby available connectionPoint objects -
 			# if any within range, snap to the nearest one
-			rect = QtCore.QRectF(0, 0, self.DRAG_SNAP_MAX_DIST,
-			                     self.DRAG_SNAP_MAX_DIST)
-			rect.moveCenter(mousePos)
-			nearConnectPoint : ConnectionPoint = None
-			nearConnectPos : QtCore.QPointF = None
-			dist = 1000000
-			for i in self.connectionPoints():
-				if not i.isDragAvailable():
-					continue
-				testPos, testVec = i.connectionPoint(None)
-				testPoint = QtCore.QPointF(*testPos)
-				testDist = (testPoint - mousePos).manhattanLength()
-				if testDist < dist:
-					dist = testDist
-					nearConnectPoint = i
-					nearConnectPos = testPoint
+			nearConnectPoint, nearConnectPos = self.nearestConnectionPoint(
+				mousePos, filterFn=ConnectionPoint.isDragAvailable)
 
 			# if point is within range, snap the end of the path to it, and
 			# set it as the candidate point to connect on mouse up
-			if dist <= pow(self.DRAG_SNAP_MAX_DIST, 2): #
-				self._candidateConnectPoint = nearConnectPoint
+			self._candidateConnectPoint = nearConnectPoint
+			if nearConnectPoint is not None:
 				mousePos = nearConnectPos
 
 			path = QtGui.QPainterPath(point)